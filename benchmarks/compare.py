@@ -0,0 +1,46 @@
+""" Compares two JSON reports written by benchmarks.run:
+
+    python -m benchmarks.compare before.json after.json
+
+Prints the best time per workload in each and the speedup of the second.
+Exits with status 1 if any workload got slower than --threshold allows.
+"""
+import argparse
+import json
+import sys
+
+
+def compare(before, after):
+    """ Returns (name, before seconds, after seconds) for the workloads in
+    both reports.
+    """
+    rows = []
+    for name in sorted(set(before['results']) & set(after['results'])):
+        rows.append((name, before['results'][name]['best'],
+                     after['results'][name]['best']))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.compare')
+    parser.add_argument('before')
+    parser.add_argument('after')
+    parser.add_argument('--threshold', type=float, default=1.1,
+                        help="fail if a workload is this many times slower")
+    args = parser.parse_args(argv)
+    with open(args.before) as f:
+        before = json.load(f)
+    with open(args.after) as f:
+        after = json.load(f)
+
+    regressed = False
+    for name, old, new in compare(before, after):
+        speedup = old / new
+        regressed = regressed or new / old > args.threshold
+        print('{0:45} {1:12.3f} us {2:12.3f} us {3:8.2f}x'.format(
+            name, old * 1e6, new * 1e6, speedup))
+    return 1 if regressed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,70 @@
+""" Measures how long importing the package's modules takes in a fresh
+interpreter, and writes a report in the same format as benchmarks.run so two
+commits can be compared with `python -m benchmarks.compare`:
+
+    python -m benchmarks.import_time --output imports.json
+
+Only the import itself is timed, not interpreter startup.
+"""
+import argparse
+import json
+import platform
+import subprocess
+import sys
+
+from .run import git_revision
+
+MODULES = [
+    'business_rules',
+    'business_rules.actions',
+    'business_rules.compiler',
+    'business_rules.utils',
+    'business_rules.variables',
+]
+
+_SNIPPET = ('from timeit import default_timer; start = default_timer(); '
+            'import {0}; print(default_timer() - start)')
+
+
+def time_import(module, repeat=20):
+    """ Returns timing stats for importing `module`, each sample taken in a
+    new interpreter. Times are in seconds.
+    """
+    times = []
+    for _ in range(repeat):
+        output = subprocess.check_output(
+            [sys.executable, '-c', _SNIPPET.format(module)])
+        times.append(float(output.decode('ascii')))
+    return {'best': min(times),
+            'mean': sum(times) / len(times),
+            'number': 1,
+            'repeat': repeat}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.import_time')
+    parser.add_argument('--output', help="JSON file to write (default: "
+                                         "stdout)")
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args(argv)
+
+    results = {}
+    for module in MODULES:
+        name = 'import.' + module
+        results[name] = time_import(module, args.repeat)
+        sys.stderr.write('{0:45} {1:12.3f} us\n'.format(
+            name, results[name]['best'] * 1e6))
+
+    report = {'python': platform.python_version(),
+              'revision': git_revision(),
+              'results': results}
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    else:
+        sys.stdout.write(text + '\n')
+
+
+if __name__ == '__main__':
+    main()
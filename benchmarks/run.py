@@ -0,0 +1,72 @@
+""" Runs the benchmark workloads and writes the timings as JSON, so that runs
+on two commits can be compared with `python -m benchmarks.compare`.
+
+    python -m benchmarks.run --output before.json
+    python -m benchmarks.run --filter engine. --repeat 7
+"""
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import timeit
+
+from .workloads import WORKLOADS
+
+
+def measure(func, repeat=5, min_time=0.2):
+    """ Returns timing stats for `func`, called in loops sized to take at
+    least `min_time` seconds each. Times are seconds per call.
+    """
+    timer = timeit.Timer(func)
+    number = 1
+    while timer.timeit(number) < min_time:
+        number *= 2
+    times = [t / number for t in timer.repeat(repeat, number)]
+    return {'best': min(times),
+            'mean': sum(times) / len(times),
+            'number': number,
+            'repeat': repeat}
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', 'HEAD'],
+            stderr=subprocess.STDOUT).decode('ascii').strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.run')
+    parser.add_argument('--output', help="JSON file to write (default: "
+                                         "stdout)")
+    parser.add_argument('--filter', default='',
+                        help="only run workloads whose name contains this")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--min-time', type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    results = {}
+    for name in sorted(WORKLOADS):
+        if args.filter not in name:
+            continue
+        results[name] = measure(WORKLOADS[name](), args.repeat,
+                                args.min_time)
+        sys.stderr.write('{0:45} {1:12.3f} us\n'.format(
+            name, results[name]['best'] * 1e6))
+
+    report = {'python': platform.python_version(),
+              'revision': git_revision(),
+              'results': results}
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    else:
+        sys.stdout.write(text + '\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+""" Sweeps rule set size, tree depth, fan-out and select list size one at a
+time and reports evaluation throughput and peak memory for each point:
+
+    python -m benchmarks.scaling --output scaling.json
+
+Every other dimension stays at its baseline while one is swept.
+"""
+import argparse
+import json
+import sys
+import tracemalloc
+from timeit import default_timer
+
+from business_rules import compile_rules
+from business_rules.engine import check_conditions_recursively
+
+from .synthetic import RuleSetGenerator
+from .workloads import BenchActions, BenchVariables
+
+BASELINE = {'rules': 100, 'depth': 2, 'fan_out': 3, 'select_size': 10}
+
+SWEEPS = {
+    'rules': [10, 100, 1000, 5000],
+    'depth': [0, 1, 2, 3, 4],
+    'fan_out': [2, 4, 8, 16],
+    'select_size': [10, 100, 1000, 5000],
+}
+
+
+def measure_point(variables_cls, actions_cls, facts_count, rules, depth,
+                  fan_out, select_size):
+    generator = RuleSetGenerator(variables_cls, actions_cls, depth=depth,
+                                 fan_out=fan_out, select_size=select_size)
+    rule_list = generator.rules(rules)
+    facts = generator.facts(facts_count)
+
+    start = default_timer()
+    compiled = compile_rules(rule_list, type(facts[0]), actions_cls)
+    compile_time = default_timer() - start
+
+    start = default_timer()
+    for fact in facts:
+        compiled.evaluate(fact, None)
+    compiled_time = default_timer() - start
+
+    start = default_timer()
+    for fact in facts:
+        for rule in rule_list:
+            check_conditions_recursively(rule['conditions'], fact)
+    engine_time = default_timer() - start
+
+    # tracemalloc slows allocations down, so the peak comes from a separate
+    # compile and evaluate pass rather than from the timed ones.
+    tracemalloc.start()
+    try:
+        compiled = compile_rules(rule_list, type(facts[0]), actions_cls)
+        for fact in facts:
+            compiled.evaluate(fact, None)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {'compile_seconds': compile_time,
+            'compiled_facts_per_second': facts_count / compiled_time,
+            'engine_facts_per_second': facts_count / engine_time,
+            'peak_memory_bytes': peak}
+
+
+def sweep(variables_cls=BenchVariables, actions_cls=BenchActions,
+          facts_count=200, dimensions=None):
+    """ Returns {dimension: [point, ...]} where each point holds the swept
+    value and the measurements taken for it.
+    """
+    curves = {}
+    for dimension in dimensions or sorted(SWEEPS):
+        curves[dimension] = []
+        for value in SWEEPS[dimension]:
+            settings = dict(BASELINE)
+            settings[dimension] = value
+            point = measure_point(variables_cls, actions_cls, facts_count,
+                                  **settings)
+            point[dimension] = value
+            curves[dimension].append(point)
+            sys.stderr.write(
+                '{0:12} {1:>6} {2:14.0f} facts/s compiled {3:14.0f} facts/s '
+                'engine {4:10.1f} KiB peak\n'.format(
+                    dimension, value, point['compiled_facts_per_second'],
+                    point['engine_facts_per_second'],
+                    point['peak_memory_bytes'] / 1024.0))
+    return curves
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.scaling')
+    parser.add_argument('--output', help="JSON file to write (default: "
+                                         "stdout)")
+    parser.add_argument('--facts', type=int, default=200,
+                        help="facts evaluated per point")
+    parser.add_argument('--dimension', action='append',
+                        choices=sorted(SWEEPS),
+                        help="dimension to sweep (default: all)")
+    args = parser.parse_args(argv)
+    report = {'baseline': BASELINE,
+              'facts': args.facts,
+              'curves': sweep(facts_count=args.facts,
+                              dimensions=args.dimension)}
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    else:
+        sys.stdout.write(text + '\n')
+
+
+if __name__ == '__main__':
+    main()
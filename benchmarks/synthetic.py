@@ -0,0 +1,124 @@
+""" Random but valid rule sets and matching facts for any BaseVariables /
+BaseActions pair, built from the metadata their get_all_* methods export.
+"""
+import random
+import string
+
+from business_rules.fields import (FIELD_NO_INPUT, FIELD_NUMERIC,
+                                   FIELD_SELECT, FIELD_SELECT_MULTIPLE,
+                                   FIELD_TEXT)
+from business_rules.variables import rule_variable
+
+
+class RuleSetGenerator(object):
+    """ Generates rule lists against `variables_cls` and `actions_cls`.
+
+    - depth - levels of all/any groups above the leaf conditions (0 makes
+      every rule a single condition).
+    - fan_out - children per all/any group.
+    - select_size - length of the lists used by select variables and select
+      multiple conditions.
+    """
+
+    def __init__(self, variables_cls, actions_cls, seed=0, depth=2,
+                 fan_out=3, select_size=10):
+        self.variables_cls = variables_cls
+        self.actions_cls = actions_cls
+        self.random = random.Random(seed)
+        self.depth = depth
+        self.fan_out = fan_out
+        self.select_size = select_size
+        self.variables = [
+            (variable['name'], getattr(variables_cls,
+                                       variable['name']).field_type)
+            for variable in variables_cls.get_all_variables()]
+        self.actions = actions_cls.get_all_actions()
+        self.vocabulary = [self._word() for _ in range(max(select_size, 10)
+                                                       * 4)]
+
+    def rules(self, count):
+        return [self.rule() for _ in range(count)]
+
+    def rule(self):
+        actions = [self.action()] if self.actions else []
+        return {'conditions': self.conditions(self.depth),
+                'actions': actions}
+
+    def conditions(self, depth):
+        if depth == 0:
+            return self.condition()
+        key = self.random.choice(['all', 'any'])
+        return {key: [self.conditions(depth - 1)
+                      for _ in range(self.fan_out)]}
+
+    def condition(self):
+        name, field_type = self.random.choice(self.variables)
+        operator = self.random.choice(field_type.get_all_operators())
+        return {'name': name,
+                'operator': operator['name'],
+                'value': self.value(operator['input_type'])}
+
+    def action(self):
+        action = self.random.choice(self.actions)
+        params = dict((param['name'], self.value(param['fieldType']))
+                      for param in action['params'] or [])
+        return {'name': action['name'], 'params': params}
+
+    def value(self, input_type):
+        """ A random rule constant for an operator input or action param. """
+        if input_type == FIELD_NUMERIC:
+            return round(self.random.uniform(-100, 100), 2)
+        if input_type == FIELD_TEXT:
+            return self.random.choice(self.vocabulary)[:3]
+        if input_type == FIELD_SELECT:
+            return self.random.choice(self.vocabulary)
+        if input_type == FIELD_SELECT_MULTIPLE:
+            return self.random.sample(self.vocabulary, self.select_size)
+        assert input_type == FIELD_NO_INPUT, input_type
+        return ''
+
+    def fact_values(self):
+        """ Raw values for every variable, as a dict keyed by name. """
+        return dict((name, self._fact_value(field_type.name))
+                    for name, field_type in self.variables)
+
+    def facts(self, count):
+        fact_cls = fact_class(self.variables_cls)
+        return [fact_cls(self.fact_values()) for _ in range(count)]
+
+    def _fact_value(self, type_name):
+        if type_name == 'numeric':
+            return round(self.random.uniform(-100, 100), 2)
+        if type_name == 'string':
+            return ' '.join(self.random.sample(self.vocabulary, 3))
+        if type_name == 'boolean':
+            return self.random.random() < 0.5
+        return self.random.sample(self.vocabulary, self.select_size)
+
+    def _word(self):
+        return ''.join(self.random.choice(string.ascii_lowercase)
+                       for _ in range(self.random.randint(4, 9)))
+
+
+def fact_class(variables_cls):
+    """ Returns a subclass of `variables_cls` built from a dict of raw values,
+    whose rule variables return those values instead of computing them.
+    """
+    attributes = {'__init__': _fact_init}
+    for variable in variables_cls.get_all_variables():
+        method = getattr(variables_cls, variable['name'])
+        attributes[variable['name']] = rule_variable(
+            method.field_type, label=method.label, options=method.options)(
+                _fact_getter(variable['name']))
+    return type('Fact' + variables_cls.__name__, (variables_cls,), attributes)
+
+
+def _fact_init(self, values):
+    self.values = values
+
+
+def _fact_getter(name):
+    def getter(self):
+        return self.values[name]
+    getter.__name__ = name
+    return getter
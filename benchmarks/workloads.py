@@ -0,0 +1,168 @@
+""" Representative workloads for the benchmark runner. Each workload is a
+function returning a zero-argument callable that does one unit of work.
+"""
+import json
+
+from business_rules import compile_rules, export_rule_data, run_all
+from business_rules.actions import BaseActions, rule_action
+from business_rules.engine import check_conditions_recursively
+from business_rules.fields import FIELD_NUMERIC
+from business_rules.operators import NumericType, SelectMultipleType
+from business_rules.serialization import dumps, loads
+from business_rules.variables import (BaseVariables,
+                                      numeric_rule_variable,
+                                      select_multiple_rule_variable,
+                                      select_rule_variable,
+                                      string_rule_variable)
+
+
+class BenchVariables(BaseVariables):
+
+    def __init__(self, amount=42.5, tags=None, text='order-12345-express'):
+        self.amount_value = amount
+        self.tags_value = tags if tags is not None else ['tag1', 'tag2']
+        self.text_value = text
+
+    @numeric_rule_variable
+    def amount(self):
+        return self.amount_value
+
+    @numeric_rule_variable
+    def count(self):
+        return 7
+
+    @string_rule_variable
+    def text(self):
+        return self.text_value
+
+    @select_rule_variable()
+    def tag(self):
+        return self.tags_value
+
+    @select_multiple_rule_variable()
+    def tags(self):
+        return self.tags_value
+
+
+class BenchActions(BaseActions):
+
+    @rule_action(params={'amount': FIELD_NUMERIC})
+    def noop(self, amount):
+        pass
+
+
+def _rule(conditions):
+    return {'conditions': conditions,
+            'actions': [{'name': 'noop', 'params': {'amount': 1}}]}
+
+
+def _leaf(index):
+    return {'name': 'amount', 'operator': 'greater_than', 'value': index}
+
+
+def deep_tree(depth=12):
+    """ Alternating all/any groups `depth` levels deep. """
+    conditions = _leaf(0)
+    for level in range(depth):
+        key = 'all' if level % 2 else 'any'
+        conditions = {key: [_leaf(1000 + level), conditions]}
+    return [_rule(conditions)]
+
+
+def wide_rules(count=500):
+    return [_rule({'all': [_leaf(i), {'name': 'count', 'operator': 'less_than',
+                                      'value': i}]})
+            for i in range(count)]
+
+
+def numeric_rules(count=200):
+    operators = ['equal_to', 'greater_than', 'greater_than_or_equal_to',
+                 'less_than', 'less_than_or_equal_to']
+    return [_rule({'name': 'amount', 'operator': operators[i % 5],
+                   'value': i * 0.25})
+            for i in range(count)]
+
+
+def select_rules(count=20, size=2000):
+    values = ['Tag{0}'.format(i) for i in range(0, size, 3)]
+    operators = ['contains_all', 'is_contained_by',
+                 'shares_at_least_one_element_with',
+                 'shares_exactly_one_element_with', 'shares_no_elements_with']
+    return [_rule({'name': 'tags', 'operator': operators[i % 5],
+                   'value': values})
+            for i in range(count)]
+
+
+def regex_rules(count=200):
+    return [_rule({'name': 'text', 'operator': 'matches_regex',
+                   'value': r'^order-\d+-(?:x{0}|express)$'.format(i)})
+            for i in range(count)]
+
+
+def unanchored_regex_rules(count=50):
+    return [_rule({'name': 'text', 'operator': 'matches_regex',
+                   'value': 'word{0}x'.format(i)})
+            for i in range(count)]
+
+
+def _long_text(size=2000):
+    return ('lorem ipsum ' * size)[:size]
+
+
+def _large_tags(size=2000):
+    return ['tag{0}'.format(i) for i in range(size)]
+
+
+def _run_all(rules, variables):
+    actions = BenchActions()
+    return lambda: run_all(rules, variables, actions)
+
+
+def _compiled(rules, variables, **options):
+    compiled = compile_rules(rules, BenchVariables, BenchActions, **options)
+    actions = BenchActions()
+    return lambda: compiled.run(variables, actions)
+
+
+def _loading_rules():
+    return wide_rules() + numeric_rules() + regex_rules() + deep_tree()
+
+
+WORKLOADS = {
+    'engine.deep_tree': lambda: _run_all(deep_tree(), BenchVariables()),
+    'engine.wide_rules': lambda: _run_all(wide_rules(), BenchVariables()),
+    'engine.numeric_rules': lambda: _run_all(numeric_rules(),
+                                             BenchVariables()),
+    'engine.select_rules': lambda: _run_all(
+        select_rules(), BenchVariables(tags=_large_tags())),
+    'engine.regex_rules': lambda: _run_all(regex_rules(), BenchVariables()),
+    'engine.check_conditions_recursively': lambda: (
+        lambda conditions=deep_tree()[0]['conditions'],
+        variables=BenchVariables():
+        check_conditions_recursively(conditions, variables)),
+    'compiled.wide_rules': lambda: _compiled(wide_rules(), BenchVariables()),
+    'compiled.numeric_rules': lambda: _compiled(numeric_rules(),
+                                                BenchVariables()),
+    'compiled.shared_regex_rules': lambda: _compiled(
+        regex_rules(), BenchVariables(), share_conditions=True),
+    'compiled.shared_unanchored_regex_rules': lambda: _compiled(
+        unanchored_regex_rules(), BenchVariables(text=_long_text()),
+        share_conditions=True),
+    'compiled.shared_numeric_thresholds': lambda: _compiled(
+        numeric_rules(2000), BenchVariables(), share_conditions=True),
+    'operators.numeric_greater_than': lambda: (
+        lambda: NumericType(10.5).greater_than(3.25)),
+    'operators.select_multiple_contains_all': lambda: (
+        lambda tags=_large_tags(), other=_large_tags()[::3]:
+        SelectMultipleType(tags).contains_all(other)),
+    'serialization.json_load': lambda: (
+        lambda text=json.dumps(_loading_rules()): json.loads(text)),
+    'serialization.json_compile': lambda: (
+        lambda text=json.dumps(_loading_rules()): compile_rules(
+            json.loads(text), BenchVariables, BenchActions)),
+    'serialization.binary_load': lambda: (
+        lambda data=dumps(_loading_rules(), BenchVariables, BenchActions):
+        loads(data, BenchVariables, BenchActions)),
+    'export_rule_data': lambda: (
+        lambda: export_rule_data(BenchVariables, BenchActions)),
+}
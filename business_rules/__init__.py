@@ -1,8 +1,42 @@
 __version__ = '1.1.1'
 
+import sys
+
 from .engine import run_all
-from .utils import export_rule_data
+
+# Entry points whose modules pull in the operators (and with them re and
+# decimal). Where modules support __getattr__ they're imported on first use,
+# so scripts that only run rules don't pay for them at import time.
+_LAZY_EXPORTS = {
+    'compile_rules': 'compiler',
+    'run_all_batch': 'batch',
+    'cached_rule_data': 'utils',
+    'export_rule_data': 'utils',
+}
+
+if sys.version_info >= (3, 7):
+    def __getattr__(name):
+        if name not in _LAZY_EXPORTS:
+            raise AttributeError("module {0!r} has no attribute {1!r}".format(
+                __name__, name))
+        from importlib import import_module
+        value = getattr(import_module('.' + _LAZY_EXPORTS[name], __name__),
+                        name)
+        globals()[name] = value
+        return value
+
+    def __dir__():
+        return sorted(set(globals()) | set(_LAZY_EXPORTS))
+else:
+    from .compiler import compile_rules
+    from .batch import run_all_batch
+    from .utils import cached_rule_data, export_rule_data
+
+    # Appease pyflakes by "using" these exports
+    assert compile_rules
+    assert run_all_batch
+    assert cached_rule_data
+    assert export_rule_data
 
 # Appease pyflakes by "using" these exports
 assert run_all
-assert export_rule_data
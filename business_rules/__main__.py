@@ -0,0 +1,74 @@
+""" Evaluates a rule set over a stream of JSON facts:
+
+    python -m business_rules --rules rules.json \\
+        --variables myapp.rules:EventVariables < events.jsonl > results.jsonl
+
+Each input line is one JSON fact, passed to the variables class (and the
+actions class, if given) as its only argument. Each output line is
+{"line": <input line number>, "triggered": [<indices of triggered rules>]}.
+"""
+import argparse
+import importlib
+import json
+import sys
+
+from .compiler import compile_rules
+from .stream import evaluate_jsonl, open_binary
+
+
+def import_class(path):
+    """ Imports a class given as 'package.module:ClassName'. """
+    module_name, _, class_name = path.partition(':')
+    if not class_name:
+        raise argparse.ArgumentTypeError(
+            "{0} should look like package.module:ClassName".format(path))
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(
+        prog='python -m business_rules',
+        description="Evaluate business rules over JSON lines facts.")
+    parser.add_argument('--rules', required=True,
+                        help="JSON file holding the rule list")
+    parser.add_argument('--variables', required=True, type=import_class,
+                        help="BaseVariables subclass, as module:Class")
+    parser.add_argument('--actions', type=import_class,
+                        help="BaseActions subclass, as module:Class; "
+                             "actions are only run when this is given")
+    parser.add_argument('--input', default='-',
+                        help="JSON lines file of facts (default: stdin)")
+    parser.add_argument('--output', default='-',
+                        help="file to write results to (default: stdout)")
+    parser.add_argument('--stop-on-first-trigger', action='store_true')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    with open(args.rules) as f:
+        rule_list = json.load(f)
+    rule_set = compile_rules(rule_list, args.variables, args.actions)
+
+    input_file = (_std_binary(sys.stdin) if args.input == '-'
+                  else open_binary(args.input, 'r'))
+    output_file = (_std_binary(sys.stdout) if args.output == '-'
+                   else open_binary(args.output, 'w'))
+    try:
+        evaluate_jsonl(rule_set, input_file, output_file, args.variables,
+                       args.actions, args.stop_on_first_trigger)
+    finally:
+        output_file.flush()
+        if args.input != '-':
+            input_file.close()
+        if args.output != '-':
+            output_file.close()
+    return 0
+
+
+def _std_binary(stream):
+    return getattr(stream, 'buffer', stream)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
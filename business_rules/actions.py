@@ -1,29 +1,27 @@
-import inspect
+from six import string_types, with_metaclass
 
 from . import fields
-from .utils import fn_name_to_pretty_label
+from .utils import RuleMemberRegistry, fn_name_to_pretty_label
 
 
-class BaseActions(object):
+class BaseActions(with_metaclass(RuleMemberRegistry, object)):
     """ Classes that hold a collection of actions to use with the rules
     engine should inherit from this.
     """
+    _rule_member_marker = 'is_rule_action'
+
     @classmethod
     def get_all_actions(cls):
-        methods = inspect.getmembers(cls)
-        return [{'name': m[0],
-                 'label': m[1].label,
-                 'params': m[1].params
-                } for m in methods if getattr(m[1], 'is_rule_action', False)]
+        return [{'name': name,
+                 'label': m.label,
+                 'params': m.params
+                } for name, m in cls.rule_members().items()]
 
 def _validate_action_parameters(func, params):
     """ Verifies that the parameters specified are actual parameters for the
     function `func`, and that the field types are FIELD_* types in fields.
     """
     if params is not None:
-        # Verify field name is valid
-        valid_fields = [getattr(fields, f) for f in dir(fields) \
-                if f.startswith("FIELD_")]
         for param in params:
             param_name, field_type = param['name'], param['fieldType']
             if param_name not in func.__code__.co_varnames:
@@ -31,14 +29,27 @@ def _validate_action_parameters(func, params):
                         " action {1}".format(
                         param_name, func.__name__))
 
-            if field_type not in valid_fields:
+            if field_type not in fields.FIELD_TYPES:
                 raise AssertionError("Unknown field type {0} specified for"\
                         " action {1} param {2}".format(
                         field_type, func.__name__, param_name))
 
-def rule_action(label=None, params=None):
+def rule_action(label=None, params=None, batch_handler=None,
+                concurrent=False):
     """ Decorator to make a function into a rule action
+
+    `concurrent=True` marks an action that doesn't depend on the other
+    actions of its rule, e.g. a slow network call. The engine runs such
+    actions on a thread pool, alongside the rule's other actions.
+
+    `batch_handler` names another method of the actions class that performs
+    many calls of this action at once. An ActionBatcher (see deferred.py)
+    queues calls of the action and hands them to that method in bulk.
     """
+    if batch_handler is not None and not isinstance(batch_handler,
+                                                    string_types):
+        raise AssertionError("batch_handler must be the name of a method, "
+                             "got {0!r}".format(batch_handler))
     def wrapper(func):
         params_ = params
         if isinstance(params, dict):
@@ -51,5 +62,7 @@ def rule_action(label=None, params=None):
         func.label = label \
                 or fn_name_to_pretty_label(func.__name__)
         func.params = params_
+        func.batch_handler = batch_handler
+        func.concurrent = concurrent
         return func
     return wrapper
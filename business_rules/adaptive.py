@@ -0,0 +1,146 @@
+import json
+from timeit import default_timer
+
+
+class ConditionStats(object):
+    """ How often a condition was evaluated, how often it was true and how
+    long it took in total (in seconds).
+    """
+    __slots__ = ('evaluations', 'true_count', 'total_time')
+
+    def __init__(self, evaluations=0, true_count=0, total_time=0.0):
+        self.evaluations = evaluations
+        self.true_count = true_count
+        self.total_time = total_time
+
+    def cost(self):
+        return self.total_time / self.evaluations
+
+    def true_rate(self):
+        return float(self.true_count) / self.evaluations
+
+
+class AdaptiveCondition(object):
+    """ Wraps a child of an `all`/`any` group and records its ConditionStats.
+    Children with the same `key` in different rules share their stats.
+    """
+    __slots__ = ('node', 'key', 'stats')
+
+    def __init__(self, node, key, stats):
+        self.node = node
+        self.key = key
+        self.stats = stats
+
+    def check(self, defined_variables):
+        stats = self.stats
+        start = default_timer()
+        result = self.node.check(defined_variables)
+        stats.total_time += default_timer() - start
+        stats.evaluations += 1
+        if result:
+            stats.true_count += 1
+        return result
+
+    def explain(self, defined_variables, trace):
+        # Traced runs aren't timed, so they don't skew the stats
+        return self.node.explain(defined_variables, trace)
+
+
+class AdaptiveOrder(object):
+    """ Reorders the children of the `all`/`any` groups of a compiled rule set
+    using the stats recorded while it runs: `all` groups check the conditions
+    that are cheapest and most likely to be false first, `any` groups the ones
+    that are cheapest and most likely to be true. Only the order changes, so
+    results stay the same.
+
+    - reorder_interval - number of runs between automatic reorders.
+    """
+    reorder_interval = 1000
+
+    def __init__(self, rules, rule_list, group_types):
+        self.stats = {}
+        self.groups = []
+        self.runs = 0
+        self._group_types = group_types
+        seen = set()
+        for rule, source in zip(rules, rule_list):
+            self._wrap(rule.conditions, source['conditions'], seen)
+
+    def _wrap(self, node, conditions, seen):
+        node = getattr(node, 'node', node)  # unwrap shared conditions
+        if not isinstance(node, self._group_types) or id(node) in seen:
+            return
+        seen.add(id(node))
+        key = 'all' if 'all' in conditions else 'any'
+        children = []
+        for child, source in zip(node.children, conditions[key]):
+            self._wrap(child, source, seen)
+            condition_key = condition_key_for(source)
+            stats = self.stats.get(condition_key)
+            if stats is None:
+                stats = self.stats[condition_key] = ConditionStats()
+            children.append(AdaptiveCondition(child, condition_key, stats))
+        node.children = children
+        self.groups.append((node, key == 'all'))
+
+    def record_run(self):
+        self.runs += 1
+        if self.runs % self.reorder_interval == 0:
+            self.reorder()
+
+    def reorder(self):
+        """ Reorders every group that has been evaluated. Children that were
+        never evaluated, e.g. because an earlier child always decides the
+        group, are moved to the front so the next runs measure them. The new
+        order is swapped in as a new list, so runs in progress on other
+        threads finish with the old one.
+        """
+        for group, is_all in self.groups:
+            children = group.children
+            if not any(child.stats.evaluations for child in children):
+                continue
+            group.children = sorted(
+                children, key=lambda child: _rank(child.stats, is_all))
+
+    def export_stats(self):
+        """ Returns the recorded stats as a JSON-serializable dict keyed by
+        condition, for import_stats on another worker.
+        """
+        return dict((key, [stats.evaluations, stats.true_count,
+                           stats.total_time])
+                    for key, stats in self.stats.items())
+
+    def import_stats(self, data):
+        """ Adds stats exported by export_stats to the ones recorded here and
+        reorders right away. Conditions not in this rule set are ignored.
+        """
+        for key, (evaluations, true_count, total_time) in data.items():
+            stats = self.stats.get(key)
+            if stats is not None:
+                stats.evaluations += evaluations
+                stats.true_count += true_count
+                stats.total_time += total_time
+        self.reorder()
+
+
+def condition_key_for(conditions):
+    """ A stable key for a condition dict, independent of dict ordering. """
+    return json.dumps(conditions, sort_keys=True, default=_tagged)
+
+
+def _tagged(value):
+    # Values JSON can't encode keep their type, so Decimal('5') and '5'
+    # get different keys.
+    return [type(value).__name__, str(value)]
+
+
+def _rank(stats, is_all):
+    if not stats.evaluations:
+        return -1.0
+    # Expected cost paid per short-circuit: a condition that rarely decides
+    # the group is worth checking only if it's cheap.
+    if is_all:
+        decisive = 1.0 - stats.true_rate()
+    else:
+        decisive = stats.true_rate()
+    return stats.cost() / max(decisive, 1e-9)
@@ -0,0 +1,127 @@
+""" An asyncio version of the engine, for rule variables and actions defined
+with `async def`. Requires Python 3.5+, so it isn't imported by the package
+itself: use `from business_rules.async_engine import run_all_async`.
+"""
+import asyncio
+import inspect
+
+from . import engine
+
+
+async def run_all_async(rule_list,
+                        defined_variables,
+                        defined_actions,
+                        stop_on_first_trigger=False,
+                        max_concurrency=10):
+    """ Same as engine.run_all, except that every `async def` rule variable
+    the rules could need is fetched up front, at most `max_concurrency` at a
+    time, so a run waits about as long as its slowest lookup rather than the
+    sum of all of them. Plain variables are still called lazily during
+    evaluation, so `all`/`any` keep short-circuiting them. Actions may be
+    `async def` too; they are awaited in order, except that those declared
+    with rule_action(concurrent=True) run as tasks alongside the rule's
+    other actions.
+    """
+    names = set()
+    for rule in rule_list:
+        names.update(engine.get_variable_names(rule['conditions']))
+    values = await fetch_variables(defined_variables, names, max_concurrency)
+    resolved = PrefetchedVariables(defined_variables, values)
+
+    owns_cache = engine._start_variable_cache(resolved)
+    try:
+        rule_was_triggered = False
+        for rule in rule_list:
+            if engine.check_conditions_recursively(rule['conditions'],
+                                                   resolved):
+                await do_actions_async(rule['actions'], defined_actions)
+                rule_was_triggered = True
+                if stop_on_first_trigger:
+                    return True
+        return rule_was_triggered
+    finally:
+        if owns_cache:
+            engine._clear_variable_cache(resolved)
+
+
+async def fetch_variables(defined_variables, names, max_concurrency=10):
+    """ Concurrently awaits the `async def` rule variables among `names` and
+    returns a dict of their raw values. Other names are left out.
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def fetch(method):
+        async with semaphore:
+            return await method()
+
+    coroutine_names = [
+        name for name in sorted(names)
+        if asyncio.iscoroutinefunction(getattr(defined_variables, name, None))]
+    results = await asyncio.gather(
+        *[fetch(getattr(defined_variables, name)) for name in coroutine_names])
+    return dict(zip(coroutine_names, results))
+
+
+async def do_actions_async(actions, defined_actions):
+    tasks = []
+    try:
+        for action in actions:
+            method_name = action['name']
+            method = getattr(defined_actions, method_name, None)
+            if method is None:
+                raise AssertionError("Action {0} is not defined in class {1}"\
+                        .format(method_name,
+                                defined_actions.__class__.__name__))
+            result = method(**(action.get('params') or {}))
+            if not inspect.isawaitable(result):
+                continue
+            if getattr(method, 'concurrent', False) is True:
+                tasks.append(asyncio.ensure_future(result))
+            else:
+                await result
+    except Exception as error:
+        if not tasks:
+            raise
+        await _gather_actions(tasks, [error])
+    if tasks:
+        await _gather_actions(tasks, [])
+
+
+async def _gather_actions(tasks, errors):
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    errors.extend(result for result in results
+                  if isinstance(result, Exception))
+    engine._raise_action_errors(errors)
+
+
+class PrefetchedVariables(object):
+    """ Stands in for a variables object during evaluation, answering
+    prefetched variables from `values` and everything else from the object.
+    """
+
+    def __init__(self, defined_variables, values):
+        self._defined_variables = defined_variables
+        self._values = values
+
+    @property
+    def __class__(self):
+        # Keeps the engine's error messages naming the real class.
+        return self._defined_variables.__class__
+
+    def __getattr__(self, name):
+        method = getattr(self._defined_variables, name)
+        if name in self._values:
+            return _PrefetchedVariable(method, self._values[name])
+        return method
+
+
+class _PrefetchedVariable(object):
+    __slots__ = ('field_type', 'cached', 'value')
+
+    def __init__(self, method, value):
+        self.field_type = method.field_type
+        self.cached = getattr(method, 'cached', False)
+        self.value = value
+
+    def __call__(self):
+        return self.value
@@ -0,0 +1,105 @@
+from .compiler import CompiledAll, CompiledAny, compile_conditions
+
+
+def run_all_batch(rule_list, variables_cls, columns):
+    """ Evaluates the conditions of every rule in `rule_list` over many
+    objects at once.
+
+    `columns` maps each rule variable name on `variables_cls` to a sequence of
+    raw values, one per object (a list, an `array.array` or a NumPy array).
+    Each condition is evaluated over a whole column, and each variable is cast
+    to its field type at most once per row. `all`/`any` groups are combined as
+    boolean masks, and later conditions in a group only look at rows that can
+    still change the result.
+
+    Returns a list with one entry per row: the indices of the rules in
+    `rule_list` whose conditions were met for that row. Actions are not run.
+    """
+    conditions = [compile_conditions(rule['conditions'], variables_cls)
+                  for rule in rule_list]
+    table = _ColumnTable(variables_cls, columns)
+    everything = [True] * table.row_count
+    triggered = [[] for _ in range(table.row_count)]
+    if not table.row_count:
+        return triggered
+    for index, condition in enumerate(conditions):
+        mask = _evaluate(condition, everything, table)
+        for row, matched in enumerate(mask):
+            if matched:
+                triggered[row].append(index)
+    return triggered
+
+
+def _evaluate(node, active, table):
+    """ Returns the mask of rows in `active` for which `node` is true. Rows
+    that aren't active are always False in the result.
+    """
+    if isinstance(node, CompiledAll):
+        for child in node.children:
+            active = _evaluate(child, active, table)
+            if not any(active):
+                break
+        return active
+
+    if isinstance(node, CompiledAny):
+        result = [False] * len(active)
+        remaining = active
+        for child in node.children:
+            matched = _evaluate(child, remaining, table)
+            result = [r or m for r, m in zip(result, matched)]
+            remaining = [r and not m for r, m in zip(remaining, matched)]
+            if not any(remaining):
+                break
+        return result
+
+    return table.evaluate(node, active)
+
+
+class _ColumnTable(object):
+    """ The input columns plus the operands cast from them so far. Values are
+    cast on first use, so rows that drop out of a group before reaching a
+    variable never pay for casting it.
+    """
+
+    def __init__(self, variables_cls, columns):
+        self.variables_cls = variables_cls
+        self.columns = dict((name, _as_list(column))
+                            for name, column in columns.items())
+        lengths = set(len(column) for column in self.columns.values())
+        if len(lengths) > 1:
+            raise AssertionError("All columns must have the same length")
+        self.row_count = lengths.pop() if lengths else 0
+        self._operands = {}
+
+    def evaluate(self, condition, active):
+        name, cast = condition.name, condition.cast
+        if name not in self.columns:
+            raise AssertionError("No column given for variable {0} of "
+                                 "class {1}".format(
+                                     name, self.variables_cls.__name__))
+        values = self.columns[name]
+        operands = self._operands.setdefault(name, [None] * len(values))
+        func, value, no_input = (condition.operator_func, condition.value,
+                                 condition.no_input)
+        mask = []
+        for row, is_active in enumerate(active):
+            if not is_active:
+                mask.append(False)
+                continue
+            operand = operands[row]
+            if operand is None:
+                operand = operands[row] = cast(values[row])
+            if no_input:
+                mask.append(bool(func(operand)))
+            else:
+                mask.append(bool(func(operand, value)))
+        return mask
+
+
+def _as_list(column):
+    """ array.array and NumPy arrays hold machine numbers; tolist() gives back
+    the python ints, floats and bools the field types expect.
+    """
+    if hasattr(column, 'tolist'):
+        return column.tolist()
+    return list(column)
@@ -0,0 +1,581 @@
+from .engine import (_clear_variable_cache, _get_cached_variable_value,
+                     _start_variable_cache, run_action_calls)
+from .trace import ConditionTrace, RuleTrace, Trace
+
+
+def compile_rules(rule_list, variables_cls, actions_cls,
+                  share_conditions=False, adaptive=False):
+    """ Validates `rule_list` against the given variables and actions classes
+    once and returns a CompiledRuleSet that can be run many times.
+
+    Variable, operator and action names are resolved up front and rule
+    constants are cast to the variable's type at compile time, so running the
+    compiled rule set does none of the dict walking `engine.run_all` does.
+
+    If `actions_cls` is None the actions are left out and the compiled rule
+    set only checks conditions.
+
+    - share_conditions - if True, identical conditions and identical `all`/
+      `any` groups anywhere in `rule_list` are compiled into a single node,
+      and a node used by several rules is evaluated at most once per run.
+      `matches_regex` conditions on the same variable anchored with `^` are
+      also answered by a single combined regex match, and numeric
+      comparisons of a variable against many thresholds by a few binary
+      searches.
+    - adaptive - if True, the children of `all`/`any` groups are timed and
+      periodically reordered so that the conditions most likely to decide the
+      group cheaply are checked first. See adaptive.AdaptiveOrder.
+    """
+    nodes = ConditionNetwork() if share_conditions else None
+    rules = [compile_rule(rule, variables_cls, actions_cls, nodes)
+             for rule in rule_list]
+    if nodes is not None:
+        nodes.share(rules)
+    order = None
+    if adaptive:
+        from .adaptive import AdaptiveOrder
+        order = AdaptiveOrder(rules, rule_list, (CompiledAll, CompiledAny))
+    return CompiledRuleSet(rules, order)
+
+
+def compile_rule(rule, variables_cls, actions_cls, nodes=None):
+    conditions = compile_conditions(rule['conditions'], variables_cls, nodes)
+    actions = []
+    if actions_cls is not None:
+        actions = [compile_action(action, actions_cls)
+                   for action in rule['actions']]
+    return CompiledRule(conditions, actions)
+
+
+def compile_conditions(conditions, variables_cls, nodes=None):
+    """ Compiles a condition tree. When a ConditionNetwork is given as
+    `nodes`, identical subtrees come back as the same node object.
+    """
+    keys = list(conditions.keys())
+    if keys == ['all']:
+        assert len(conditions['all']) >= 1
+        children = [compile_conditions(condition, variables_cls, nodes)
+                    for condition in conditions['all']]
+        if nodes is not None:
+            return nodes.group(CompiledAll, children)
+        return CompiledAll(children)
+
+    elif keys == ['any']:
+        assert len(conditions['any']) >= 1
+        children = [compile_conditions(condition, variables_cls, nodes)
+                    for condition in conditions['any']]
+        if nodes is not None:
+            return nodes.group(CompiledAny, children)
+        return CompiledAny(children)
+
+    else:
+        # help prevent errors - any and all can only be in the condition dict
+        # if they're the only item
+        assert not ('any' in keys or 'all' in keys)
+        if nodes is not None:
+            return nodes.condition(conditions, variables_cls)
+        return compile_condition(conditions, variables_cls)
+
+
+def compile_condition(condition, variables_cls):
+    """ Resolves a single condition's variable and operator and casts its
+    comparison value. Raises AssertionError with the same messages as the
+    engine when the variable or operator doesn't exist.
+    """
+    name, op, value = condition['name'], condition['operator'], condition['value']
+    variable, field_type, operator = _resolve_condition(name, op,
+                                                        variables_cls)
+    return _build_condition(name, op, _cast_argument(operator, value),
+                            variable, field_type, operator)
+
+
+def cast_condition_value(condition, variables_cls):
+    """ Validates a condition against `variables_cls` and returns its
+    comparison value cast to the variable's type.
+    """
+    operator = _resolve_condition(condition['name'], condition['operator'],
+                                  variables_cls)[2]
+    return _cast_argument(operator, condition['value'])
+
+
+def condition_builder(name, op, variables_cls):
+    """ Resolves the variable and operator of conditions on `name` with
+    `op` once, and returns a function that compiles such a condition from a
+    value cast_condition_value has already cast.
+    """
+    variable, field_type, operator = _resolve_condition(name, op,
+                                                        variables_cls)
+    # _build_condition, with everything but the value looked up up front
+    function, no_input, cast = (operator.function, operator.no_input,
+                                operator.cast)
+    prepare = None if no_input else operator.prepare_argument
+    cached = getattr(variable, 'cached', False) is True
+    def build(value):
+        if prepare is not None:
+            value = prepare(value)
+        return CompiledCondition(name, op, value, field_type, function,
+                                 no_input, cached, cast)
+    return build
+
+
+def _cast_argument(operator, value):
+    if not operator.no_input and operator.cast_arguments:
+        return operator.cast(value)
+    return value
+
+
+def _build_condition(name, op, value, variable, field_type, operator):
+    if not operator.no_input and operator.prepare_argument is not None:
+        value = operator.prepare_argument(value)
+    return CompiledCondition(name, op, value, field_type, operator.function,
+                             operator.no_input,
+                             getattr(variable, 'cached', False) is True,
+                             operator.cast)
+
+
+def _resolve_condition(name, op, variables_cls):
+    """ Returns the variable, its concrete field type and the
+    operators.OperatorFunction a condition refers to.
+    """
+    variable = getattr(variables_cls, name, None)
+    if variable is None or not hasattr(variable, 'field_type'):
+        raise AssertionError("Variable {0} is not defined in class {1}".format(
+                name, variables_cls.__name__))
+    # NumericType picks its concrete class when instantiated
+    field_type = variable.field_type._concrete_type()
+
+    operator = field_type.operator_function(op)
+    if operator is None:
+        raise AssertionError("Operator {0} does not exist for type {1}".format(
+            op, field_type.__name__))
+    return variable, field_type, operator
+
+
+def compile_action(action, actions_cls):
+    return action_builder(action['name'], actions_cls)(
+        action.get('params') or {})
+
+
+def action_builder(method_name, actions_cls):
+    """ Resolves action `method_name` of `actions_cls` once, and returns a
+    function that compiles a call of it from its params.
+    """
+    method = getattr(actions_cls, method_name, None)
+    if method is None:
+        raise AssertionError("Action {0} is not defined in class {1}"\
+                .format(method_name, actions_cls.__name__))
+    concurrent = getattr(method, 'concurrent', False) is True
+    def build(params):
+        return CompiledAction(method_name, params, concurrent)
+    return build
+
+
+class CompiledRuleSet(object):
+    """ A list of compiled rules. Use compile_rules to build one.
+
+    `adaptive` is the rule set's AdaptiveOrder when it was compiled with
+    adaptive=True, and None otherwise.
+
+    - trace_rate - fraction of evaluate/run calls to trace, as explain does,
+      while `trace_handler` is set. Each trace is passed to
+      `trace_handler(trace)`.
+    """
+    trace_rate = 0.0
+    trace_handler = None
+
+    def __init__(self, rules, adaptive=None):
+        self.rules = rules
+        self.adaptive = adaptive
+
+    def run(self, defined_variables, defined_actions,
+            stop_on_first_trigger=False):
+        """ Equivalent to engine.run_all for the rules this set was compiled
+        from.
+        """
+        return bool(self.evaluate(defined_variables, defined_actions,
+                                  stop_on_first_trigger))
+
+    def evaluate(self, defined_variables, defined_actions,
+                 stop_on_first_trigger=False):
+        """ Same as run, but returns the indices of the rules that were
+        triggered instead of whether any was.
+        """
+        if self.trace_handler is not None and self.trace_rate:
+            from random import random
+            if random() < self.trace_rate:
+                trace = self.explain(defined_variables, defined_actions,
+                                     stop_on_first_trigger)
+                self.trace_handler(trace)
+                return trace.triggered
+        owns_cache = _start_variable_cache(defined_variables)
+        try:
+            triggered = []
+            for index, rule in enumerate(self.rules):
+                if rule.run(defined_variables, defined_actions):
+                    triggered.append(index)
+                    if stop_on_first_trigger:
+                        break
+            return triggered
+        finally:
+            if owns_cache:
+                _clear_variable_cache(defined_variables)
+            if self.adaptive is not None:
+                self.adaptive.record_run()
+
+    def explain(self, defined_variables, defined_actions=None,
+                stop_on_first_trigger=False):
+        """ Same as evaluate, but returns a trace.Trace recording which
+        conditions decided each rule and the variable values they saw. The
+        rules are evaluated once, with the usual short-circuiting; only the
+        conditions actually checked appear in the trace.
+        """
+        trace = Trace()
+        owns_cache = _start_variable_cache(defined_variables)
+        try:
+            for index, rule in enumerate(self.rules):
+                result, decided_by = rule.conditions.explain(defined_variables,
+                                                             trace)
+                trace.rules.append(RuleTrace(index, bool(result), decided_by))
+                if result:
+                    rule.run_actions(defined_actions)
+                    trace.triggered.append(index)
+                    if stop_on_first_trigger:
+                        break
+            return trace
+        finally:
+            if owns_cache:
+                _clear_variable_cache(defined_variables)
+
+
+class CompiledRule(object):
+    __slots__ = ('conditions', 'actions', 'concurrent')
+
+    def __init__(self, conditions, actions):
+        self.conditions = conditions
+        self.actions = actions
+        self.concurrent = any(action.concurrent for action in actions)
+
+    def run(self, defined_variables, defined_actions):
+        """ Checks the rule's conditions and, if they're met and
+        `defined_actions` isn't None, runs its actions.
+        """
+        if self.conditions.check(defined_variables):
+            self.run_actions(defined_actions)
+            return True
+        return False
+
+    def run_actions(self, defined_actions):
+        if defined_actions is None:
+            return
+        if self.concurrent:
+            run_action_calls([(action.name,
+                               getattr(defined_actions, action.name),
+                               action.params) for action in self.actions])
+        else:
+            for action in self.actions:
+                action.run(defined_actions)
+
+
+class CompiledAll(object):
+    __slots__ = ('children',)
+
+    def __init__(self, children):
+        self.children = children
+
+    def check(self, defined_variables):
+        for child in self.children:
+            if not child.check(defined_variables):
+                return False
+        return True
+
+    def explain(self, defined_variables, trace):
+        """ Returns the result and the ConditionTraces of the leaves that
+        decided it.
+        """
+        decided_by = []
+        for child in self.children:
+            result, leaves = child.explain(defined_variables, trace)
+            if not result:
+                return False, leaves
+            decided_by.extend(leaves)
+        return True, decided_by
+
+
+class CompiledAny(object):
+    __slots__ = ('children',)
+
+    def __init__(self, children):
+        self.children = children
+
+    def check(self, defined_variables):
+        for child in self.children:
+            if child.check(defined_variables):
+                return True
+        return False
+
+    def explain(self, defined_variables, trace):
+        decided_by = []
+        for child in self.children:
+            result, leaves = child.explain(defined_variables, trace)
+            if result:
+                return True, leaves
+            decided_by.extend(leaves)
+        return False, decided_by
+
+
+class CompiledCondition(object):
+    """ A single leaf condition. `value` has already been cast to
+    `field_type`, `cast` casts variable values to it, and `operator_func`
+    takes the cast variable value (and `value`), see operators.get_operator.
+    """
+    __slots__ = ('name', 'operator', 'value', 'field_type', 'operator_func',
+                 'no_input', 'cached', 'cast')
+
+    def __init__(self, name, operator, value, field_type, operator_func,
+                 no_input, cached=False, cast=None):
+        self.name = name
+        self.operator = operator
+        self.value = value
+        self.field_type = field_type
+        self.operator_func = operator_func
+        self.no_input = no_input
+        self.cached = cached
+        self.cast = cast
+
+    def check(self, defined_variables):
+        operand = self.operand(defined_variables)
+        if self.no_input:
+            return self.operator_func(operand)
+        return self.operator_func(operand, self.value)
+
+    def operand(self, defined_variables):
+        """ The cast value of this condition's variable. """
+        method = getattr(defined_variables, self.name)
+        cache = None
+        if self.cached:
+            cache = getattr(defined_variables, '_rule_variable_cache', None)
+        if cache is not None:
+            return _get_cached_variable_value(cache, method, self.name,
+                                              self.cast)
+        return self.cast(method())
+
+    def explain(self, defined_variables, trace):
+        operand = trace.variables[self.name] = self.operand(defined_variables)
+        if self.no_input:
+            result = self.operator_func(operand)
+        else:
+            result = self.operator_func(operand, self.value)
+        return result, [ConditionTrace(self.name, self.operator, self.value,
+                                       bool(result))]
+
+
+class IndexedCondition(object):
+    """ Stands in for a numeric comparison whose variable is compared with
+    many thresholds; see ConditionNetwork.index_thresholds. The first of
+    these conditions checked in a run reads the variable and looks its value
+    up in the ThresholdIndex, and keeps the result in the per-run cache for
+    the others, which then each only compare two integers.
+    """
+    __slots__ = ('condition', 'index', 'compare')
+
+    def __init__(self, condition, index, compare):
+        self.condition = condition
+        self.index = index
+        self.compare = compare
+
+    def check(self, defined_variables):
+        cache = getattr(defined_variables, '_rule_variable_cache', None)
+        if cache is None:
+            return self.compare(self.index.boundaries(
+                self.condition.operand(defined_variables)))
+        try:
+            boundaries = cache[self.index]
+        except KeyError:
+            boundaries = cache[self.index] = self.index.boundaries(
+                self.condition.operand(defined_variables))
+        return self.compare(boundaries)
+
+    def explain(self, defined_variables, trace):
+        return self.condition.explain(defined_variables, trace)
+
+
+class SharedCondition(object):
+    """ Wraps a node that more than one parent refers to. Its result is kept
+    in the per-run cache so the node is evaluated at most once per run.
+    """
+    __slots__ = ('node',)
+
+    def __init__(self, node):
+        self.node = node
+
+    def check(self, defined_variables):
+        cache = getattr(defined_variables, '_rule_variable_cache', None)
+        if cache is None:
+            return self.node.check(defined_variables)
+        try:
+            return cache[self]
+        except KeyError:
+            result = cache[self] = self.node.check(defined_variables)
+            return result
+
+    def explain(self, defined_variables, trace):
+        try:
+            return trace.shared[self]
+        except KeyError:
+            explained = trace.shared[self] = self.node.explain(
+                defined_variables, trace)
+            return explained
+
+
+class ConditionNetwork(object):
+    """ Hash-conses the nodes of every rule in a rule set while they are
+    compiled, so identical conditions and groups become one node, then wraps
+    the nodes with more than one parent in SharedCondition.
+    """
+
+    def __init__(self):
+        self.nodes = {}
+
+    def condition(self, condition, variables_cls):
+        key = (condition['name'], condition['operator'],
+               _freeze(condition['value']))
+        node = self.nodes.get(key)
+        if node is None:
+            node = self.nodes[key] = compile_condition(condition,
+                                                       variables_cls)
+        return node
+
+    def group(self, node_cls, children):
+        key = (node_cls, tuple(id(child) for child in children))
+        node = self.nodes.get(key)
+        if node is None:
+            node = self.nodes[key] = node_cls(children)
+        return node
+
+    def share(self, rules):
+        """ Counts the parents of each distinct node and replaces references
+        to the nodes that have several with a single SharedCondition each.
+        """
+        self.index_thresholds(rules)
+        parents = {}
+        seen = set()
+        stack = [rule.conditions for rule in rules]
+        for node in stack:
+            parents[id(node)] = parents.get(id(node), 0) + 1
+        while stack:
+            node = stack.pop()
+            if id(node) in seen:
+                continue
+            seen.add(id(node))
+            for child in getattr(node, 'children', ()):
+                parents[id(child)] = parents.get(id(child), 0) + 1
+                stack.append(child)
+
+        shared = {}
+        def wrap(node):
+            if parents[id(node)] < 2:
+                return node
+            if id(node) not in shared:
+                shared[id(node)] = SharedCondition(node)
+            return shared[id(node)]
+
+        for node in self.nodes.values():
+            if hasattr(node, 'children'):
+                node.children = [wrap(child) for child in node.children]
+        for rule in rules:
+            rule.conditions = wrap(rule.conditions)
+        self.combine_regexes()
+
+    def combine_regexes(self):
+        """ Gives the `matches_regex` conditions on the same variable whose
+        patterns are anchored at the start one RegexScan, so a single match
+        call answers every one of them. Other patterns are searched for one by
+        one.
+        """
+        import re
+        from .operators import REGEX_TYPE, RegexScan
+        by_variable = {}
+        for node in self.nodes.values():
+            if (isinstance(node, CompiledCondition)
+                    and node.operator == 'matches_regex'
+                    and isinstance(node.value, REGEX_TYPE)
+                    and RegexScan.can_combine(node.value)):
+                by_variable.setdefault(node.name, []).append(node)
+        for conditions in by_variable.values():
+            if len(conditions) < 2:
+                continue
+            try:
+                scan = RegexScan([c.value for c in conditions])
+            except re.error:
+                continue
+            for index, condition in enumerate(conditions):
+                condition.operator_func = scan.operator_for(index)
+
+    def index_thresholds(self, rules, min_conditions=8):
+        """ Replaces the numeric comparisons of each variable against at
+        least `min_conditions` thresholds of the same type with
+        IndexedConditions sharing one ThresholdIndex. Constants that don't
+        sort, like NaN, are left as plain conditions.
+        """
+        from .operators import (NativeNumericType, NumericType,
+                                ThresholdIndex, takes_instances)
+        groups = {}
+        for node in self.nodes.values():
+            if (isinstance(node, CompiledCondition)
+                    and node.field_type in (NumericType, NativeNumericType)
+                    and node.operator in ThresholdIndex.OPERATORS
+                    and _orderable(node.value)
+                    and not takes_instances(node.field_type)):
+                key = (node.name, node.field_type, type(node.value))
+                groups.setdefault(key, []).append(node)
+        indexed = {}
+        for (_, field_type, _), conditions in groups.items():
+            if len(conditions) < min_conditions:
+                continue
+            index = ThresholdIndex(field_type,
+                                   [c.value for c in conditions],
+                                   set(c.operator for c in conditions))
+            for condition in conditions:
+                indexed[id(condition)] = IndexedCondition(
+                    condition, index,
+                    index.comparison(condition.operator, condition.value))
+        if not indexed:
+            return
+        for node in self.nodes.values():
+            if hasattr(node, 'children'):
+                node.children = [indexed.get(id(child), child)
+                                 for child in node.children]
+        for rule in rules:
+            rule.conditions = indexed.get(id(rule.conditions),
+                                          rule.conditions)
+
+
+def _orderable(value):
+    """ Whether `value` sorts consistently among values of its type, which
+    NaNs, comparing false with everything, don't.
+    """
+    return value == value
+
+
+def _freeze(value):
+    """ Makes a rule constant hashable, keeping its type in the key so e.g.
+    1, 1.0 and True stay distinct.
+    """
+    if isinstance(value, (list, tuple)):
+        return (type(value).__name__, tuple(_freeze(v) for v in value))
+    if isinstance(value, dict):
+        return ('dict', tuple(sorted((k, _freeze(v))
+                                     for k, v in value.items())))
+    return (type(value).__name__, value)
+
+
+class CompiledAction(object):
+    __slots__ = ('name', 'params', 'concurrent')
+
+    def __init__(self, name, params, concurrent=False):
+        self.name = name
+        self.params = params
+        self.concurrent = concurrent
+
+    def run(self, defined_actions):
+        getattr(defined_actions, self.name)(**self.params)
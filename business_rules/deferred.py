@@ -0,0 +1,144 @@
+""" Deferring rule actions and running them in bulk. """
+import threading
+from collections import OrderedDict, namedtuple
+from timeit import default_timer
+
+from six import string_types
+
+# One queued call of a batched action: the actions object it was called on
+# and the params it was called with.
+BatchedCall = namedtuple('BatchedCall', ['actions', 'params'])
+
+
+class ActionBatcher(object):
+    """ Queues calls of the actions declared with a `batch_handler` (see
+    rule_action) instead of running them, and runs them in bulk. Pass
+    `batcher.wrap(defined_actions)` wherever the engine takes the actions
+    object:
+
+        with ActionBatcher(max_size=500) as batcher:
+            for product in products:
+                run_all(rules, ProductVariables(product),
+                        batcher.wrap(ProductActions(product)))
+
+    A flush calls each action's handler once, with the list of BatchedCalls
+    queued for it in the order the rules triggered them. Calls are grouped by
+    action name and actions class, and the groups are flushed in the order
+    their first call was queued. Actions without a batch handler still run
+    right away.
+
+    - max_size - flush once this many calls are queued.
+    - max_delay - flush when a call is queued this many seconds or more after
+      the oldest one still queued. There is no timer thread, so call flush,
+      or leave the `with` block, once no more rules run.
+    """
+
+    def __init__(self, max_size=1000, max_delay=None):
+        self.max_size = max_size
+        self.max_delay = max_delay
+        self._batches = OrderedDict()
+        self._pending = 0
+        self._oldest = None
+        self._lock = threading.RLock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.flush()
+
+    @property
+    def pending(self):
+        """ The number of calls queued and not flushed yet. """
+        return self._pending
+
+    def wrap(self, defined_actions):
+        """ Returns a stand-in for `defined_actions` that queues calls of its
+        batched actions on this batcher.
+        """
+        return _BatchingActions(self, defined_actions)
+
+    def queue(self, defined_actions, name, params):
+        with self._lock:
+            now = default_timer()
+            if self._oldest is None:
+                self._oldest = now
+            key = (type(defined_actions), name)
+            self._batches.setdefault(key, []).append(
+                BatchedCall(defined_actions, params))
+            self._pending += 1
+            if self._pending >= self.max_size or (
+                    self.max_delay is not None
+                    and now - self._oldest >= self.max_delay):
+                self.flush()
+
+    def flush(self):
+        """ Runs every queued batch and returns the number of calls run. If a
+        handler raises, its batch and the batches queued after it stay
+        queued, and the next flush retries them.
+        """
+        with self._lock:
+            flushed = 0
+            while self._batches:
+                key, calls = next(iter(self._batches.items()))
+                # Calls the handler queues for the same action go here, and
+                # the batch keeps its place in the queue.
+                self._batches[key] = []
+                try:
+                    handler = getattr(calls[0].actions, key[1]).batch_handler
+                    getattr(calls[0].actions, handler)(calls)
+                except Exception:
+                    self._batches[key] = calls + self._batches[key]
+                    raise
+                if not self._batches[key]:
+                    del self._batches[key]
+                self._pending -= len(calls)
+                flushed += len(calls)
+            self._oldest = None
+            return flushed
+
+
+class _BatchingActions(object):
+    """ Forwards attribute lookups to the wrapped actions object, except
+    that its batched actions queue their calls on the batcher.
+    """
+
+    def __init__(self, batcher, defined_actions):
+        self._batcher = batcher
+        self._actions = defined_actions
+
+    @property
+    def wrapped_class(self):
+        """ The class of the wrapped actions object, which is what rules
+        are compiled against.
+        """
+        return type(self._actions)
+
+    def __getattr__(self, name):
+        method = getattr(self._actions, name)
+        handler = getattr(method, 'batch_handler', None)
+        if isinstance(handler, string_types):
+            if getattr(self._actions, handler, None) is None:
+                raise AssertionError(
+                    "Batch handler {0} of action {1} is not defined in "
+                    "class {2}".format(handler, name,
+                                       self._actions.__class__.__name__))
+            method = _queueing(self._batcher, self._actions, name)
+        # Looked up once per wrapped object
+        self.__dict__[name] = method
+        return method
+
+
+def _queueing(batcher, defined_actions, name):
+    def queue(**params):
+        batcher.queue(defined_actions, name, params)
+    return queue
+
+
+def actions_class(defined_actions):
+    """ Returns the class of `defined_actions`, or of the actions object it
+    stands for if it was returned by ActionBatcher.wrap.
+    """
+    if isinstance(defined_actions, _BatchingActions):
+        return defined_actions.wrapped_class
+    return type(defined_actions)
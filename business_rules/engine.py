@@ -1,18 +1,57 @@
-from .fields import FIELD_NO_INPUT
+import threading
+from timeit import default_timer
+
+# The observers.BaseObserver notified of what the engine does, if any. Set it
+# with set_observer; while it's None the engine skips all instrumentation.
+_observer = None
+
+def set_observer(observer):
+    """ Attaches `observer` (an observers.BaseObserver, or None to detach) to
+    the engine and returns the previously attached one.
+    """
+    global _observer
+    previous, _observer = _observer, observer
+    return previous
 
 def run_all(rule_list,
             defined_variables,
             defined_actions,
             stop_on_first_trigger=False):
 
-    rule_was_triggered = False
-    for rule in rule_list:
-        result = run(rule, defined_variables, defined_actions)
-        if result:
-            rule_was_triggered = True
-            if stop_on_first_trigger:
-                return True
-    return rule_was_triggered
+    owns_cache = _start_variable_cache(defined_variables)
+    try:
+        rule_was_triggered = False
+        for index, rule in enumerate(rule_list):
+            observer = _observer
+            if observer is None:
+                result = run(rule, defined_variables, defined_actions)
+            else:
+                observer.rule_started(index, rule)
+                start = default_timer()
+                result = run(rule, defined_variables, defined_actions)
+                observer.rule_finished(index, rule, result,
+                                       default_timer() - start)
+            if result:
+                rule_was_triggered = True
+                if stop_on_first_trigger:
+                    return True
+        return rule_was_triggered
+    finally:
+        if owns_cache:
+            _clear_variable_cache(defined_variables)
+
+def _start_variable_cache(defined_variables):
+    """ Gives defined_variables an empty cache for `cached` rule variables.
+    Returns False if a cache is already in place (e.g. a nested run_all), in
+    which case the caller must leave it for its owner to clear.
+    """
+    if getattr(defined_variables, '_rule_variable_cache', None) is not None:
+        return False
+    defined_variables._rule_variable_cache = {}
+    return True
+
+def _clear_variable_cache(defined_variables):
+    defined_variables._rule_variable_cache = None
 
 def run(rule, defined_variables, defined_actions):
     conditions, actions = rule['conditions'], rule['actions']
@@ -45,52 +84,189 @@ def check_conditions_recursively(conditions, defined_variables):
         assert not ('any' in keys or 'all' in keys)
         return check_condition(conditions, defined_variables)
 
+def get_variable_names(conditions):
+    """ Returns the set of variable names referenced anywhere in the given
+    conditions tree.
+    """
+    keys = list(conditions.keys())
+    if keys == ['all'] or keys == ['any']:
+        names = set()
+        for condition in conditions[keys[0]]:
+            names.update(get_variable_names(condition))
+        return names
+    return set([conditions['name']])
+
 def check_condition(condition, defined_variables):
     """ Checks a single rule condition - the condition will be made up of
     variables, values, and the comparison operator. The defined_variables
     object must have a variable defined for any variables in this condition.
     """
     name, op, value = condition['name'], condition['operator'], condition['value']
-    operator_type = _get_variable_value(defined_variables, name)
-    return _do_operator_comparison(operator_type, op, value)
-
-def _get_variable_value(defined_variables, name):
-    """ Call the function provided on the defined_variables object with the
-    given name (raise exception if that doesn't exist) and casts it to the
-    specified type.
+    method = _get_variable_method(defined_variables, name)
+    operator = _get_operator(method.field_type, op)
+    operand = _get_variable_value(defined_variables, method, name,
+                                  operator.cast)
+    if operator.no_input:
+        result = operator.function(operand)
+    else:
+        if operator.cast_arguments:
+            value = operator.cast(value)
+        result = operator.function(operand, value)
+    if _observer is not None:
+        _observer.condition_checked(condition, result)
+    return result
 
-    Returns an instance of operators.BaseType
-    """
-    def fallback(*args, **kwargs):
+def _get_variable_method(defined_variables, name):
+    method = getattr(defined_variables, name, None)
+    if method is None:
         raise AssertionError("Variable {0} is not defined in class {1}".format(
                 name, defined_variables.__class__.__name__))
-    method = getattr(defined_variables, name, fallback)
-    val = method()
-    return method.field_type(val)
-
-def _do_operator_comparison(operator_type, operator_name, comparison_value):
-    """ Finds the method on the given operator_type and compares it to the
-    given comparison_value.
+    return method
 
-    operator_type should be an instance of operators.BaseType
-    comparison_value is whatever python type to compare to
-    returns a bool
+def _get_operator(field_type, operator_name):
+    """ Returns the operators.OperatorFunction for the given operator of
+    `field_type`.
     """
-    def fallback(*args, **kwargs):
+    operator = field_type.operator_function(operator_name)
+    if operator is None:
         raise AssertionError("Operator {0} does not exist for type {1}".format(
-            operator_name, operator_type.__class__.__name__))
-    method = getattr(operator_type, operator_name, fallback)
-    if getattr(method, 'input_type', '') == FIELD_NO_INPUT:
-        return method()
-    return method(comparison_value)
+            operator_name, field_type._concrete_type().__name__))
+    return operator
+
+def _get_variable_value(defined_variables, method, name, cast):
+    """ Calls the variable `method` and casts its result with `cast`, the
+    cast function of the variable's field type.
+
+    Variables declared with `cached=True` are only computed once while a
+    run_all cache is in place.
+    """
+    if getattr(method, 'cached', False) is True:
+        cache = getattr(defined_variables, '_rule_variable_cache', None)
+        if cache is not None:
+            return _get_cached_variable_value(cache, method, name, cast)
+    return _fetch_variable_value(method, name, cast)
+
+def _get_cached_variable_value(cache, method, name, cast):
+    try:
+        return cache[name]
+    except KeyError:
+        value = cache[name] = _fetch_variable_value(method, name, cast)
+        return value
+
+def _fetch_variable_value(method, name, cast):
+    observer = _observer
+    if observer is None:
+        return cast(method())
+    start = default_timer()
+    value = cast(method())
+    observer.variable_fetched(name, default_timer() - start)
+    return value
 
 
 def do_actions(actions, defined_actions):
+    calls = []
     for action in actions:
         method_name = action['name']
-        def fallback(*args, **kwargs):
-            raise AssertionError("Action {0} is not defined in class {1}"\
-                    .format(method_name, defined_actions.__class__.__name__))
+        method = getattr(defined_actions, method_name, None)
+        if method is None:
+            method = _undefined_action(method_name,
+                                       defined_actions.__class__.__name__)
         params = action.get('params') or {}
-        method = getattr(defined_actions, method_name, fallback)
+        calls.append((method_name, method, params))
+    run_action_calls(calls)
+
+def _undefined_action(name, cls_name):
+    # Raises when its turn comes, so the actions before it still run
+    def fallback(*args, **kwargs):
+        raise AssertionError("Action {0} is not defined in class {1}"\
+                .format(name, cls_name))
+    return fallback
+
+def run_action_calls(calls):
+    """ Runs the `(name, method, params)` action calls of a triggered rule.
+
+    Actions declared with rule_action(concurrent=True) are started on the
+    action executor (see set_action_executor) as they're reached. The others
+    run in order on this thread. Once they're done, the concurrent actions
+    are waited for, so the rule takes about as long as its slowest action.
+    If one action fails its error is raised. If several fail, ActionErrors
+    is raised with all of their errors. No action starts after a sequential
+    action fails.
+    """
+    pending = []
+    try:
+        for name, method, params in calls:
+            if getattr(method, 'concurrent', False) is True:
+                pending.append(_action_executor_or_default().submit(
+                    _execute_action, name, method, params))
+            else:
+                _execute_action(name, method, params)
+    except Exception as error:
+        if not pending:
+            raise
+        _wait_for_actions(pending, [error])
+    if pending:
+        _wait_for_actions(pending, [])
+
+def _execute_action(name, method, params):
+    observer = _observer
+    if observer is None:
         method(**params)
+    else:
+        start = default_timer()
+        method(**params)
+        observer.action_executed(name, default_timer() - start)
+
+def _wait_for_actions(pending, errors):
+    for future in pending:
+        try:
+            future.result()
+        except Exception as error:
+            errors.append(error)
+    _raise_action_errors(errors)
+
+def _raise_action_errors(errors):
+    if len(errors) == 1:
+        raise errors[0]
+    if errors:
+        raise ActionErrors(errors)
+
+
+class ActionErrors(Exception):
+    """ Raised when several actions of a triggered rule fail. `errors` holds
+    their exceptions, the failing sequential action's first.
+    """
+
+    def __init__(self, errors):
+        super(ActionErrors, self).__init__(
+            "{0} actions failed: {1}".format(
+                len(errors), "; ".join(repr(error) for error in errors)))
+        self.errors = errors
+
+
+# The executor that runs concurrent actions: set with set_action_executor, or
+# created on first use with `action_workers` threads.
+action_workers = 8
+_action_executor = None
+_action_executor_lock = threading.Lock()
+
+def set_action_executor(executor):
+    """ Makes `executor` (a concurrent.futures.Executor, or None for the
+    default thread pool) run concurrent actions, and returns the previous one.
+    The engine doesn't shut executors down.
+    """
+    global _action_executor
+    with _action_executor_lock:
+        previous, _action_executor = _action_executor, executor
+    return previous
+
+def _action_executor_or_default():
+    global _action_executor
+    executor = _action_executor
+    if executor is None:
+        with _action_executor_lock:
+            if _action_executor is None:
+                from concurrent.futures import ThreadPoolExecutor
+                _action_executor = ThreadPoolExecutor(action_workers)
+            executor = _action_executor
+    return executor
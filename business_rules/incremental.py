@@ -0,0 +1,101 @@
+""" Re-evaluating a rule set after some of an object's variables change,
+without re-checking conditions that don't depend on them.
+"""
+from .compiler import (CompiledAll, CompiledAny, ConditionNetwork,
+                       compile_conditions)
+from .engine import (_clear_variable_cache, _start_variable_cache,
+                     get_variable_names)
+
+
+class IncrementalEvaluator(object):
+    """ Keeps the outcome of every rule in `rule_list`, and of every leaf
+    condition checked so far, for one `defined_variables` object whose
+    values change over time.
+
+    Call `evaluate` once, then `update(names)` whenever the variables with
+    those names may have changed. Only the leaf conditions reading them are
+    checked again, and only the rules using them are re-decided, from the
+    leaf outcomes kept for everything else. Actions are not run.
+    """
+
+    def __init__(self, rule_list, defined_variables):
+        self.defined_variables = defined_variables
+        network = ConditionNetwork()
+        variables_cls = defined_variables.__class__
+        # Identical leaves in different rules become one node, and so share
+        # one cached outcome.
+        self.conditions = [compile_conditions(rule['conditions'],
+                                              variables_cls, network)
+                           for rule in rule_list]
+        self.rules_by_variable = {}
+        for index, rule in enumerate(rule_list):
+            for name in get_variable_names(rule['conditions']):
+                self.rules_by_variable.setdefault(name, []).append(index)
+        self.leaves_by_variable = {}
+        for node in network.nodes.values():
+            if not isinstance(node, (CompiledAll, CompiledAny)):
+                self.leaves_by_variable.setdefault(node.name, []).append(node)
+        self.outcomes = None
+        self._leaf_outcomes = {}
+
+    @property
+    def triggered(self):
+        """ The indices of the rules whose conditions are currently met. """
+        if self.outcomes is None:
+            return []
+        return [index for index, outcome in enumerate(self.outcomes)
+                if outcome]
+
+    def evaluate(self):
+        """ Checks every rule from scratch and returns the indices of the
+        rules whose conditions are met.
+        """
+        self._leaf_outcomes = {}
+        self.outcomes = self._decide(range(len(self.conditions)))
+        return self.triggered
+
+    def update(self, changed_variables):
+        """ Re-decides the rules that use any of the variables named in
+        `changed_variables` and returns the indices of those that were false
+        before and are true now. The first call evaluates every rule.
+        """
+        if self.outcomes is None:
+            return self.evaluate()
+        affected = set()
+        for name in changed_variables:
+            for leaf in self.leaves_by_variable.get(name, ()):
+                self._leaf_outcomes.pop(leaf, None)
+            affected.update(self.rules_by_variable.get(name, ()))
+        affected = sorted(affected)
+        newly_true = []
+        for index, outcome in zip(affected, self._decide(affected)):
+            if outcome and not self.outcomes[index]:
+                newly_true.append(index)
+            self.outcomes[index] = outcome
+        return newly_true
+
+    def _decide(self, indices):
+        owns_cache = _start_variable_cache(self.defined_variables)
+        try:
+            return [self._check(self.conditions[index]) for index in indices]
+        finally:
+            if owns_cache:
+                _clear_variable_cache(self.defined_variables)
+
+    def _check(self, node):
+        if isinstance(node, CompiledAll):
+            for child in node.children:
+                if not self._check(child):
+                    return False
+            return True
+        if isinstance(node, CompiledAny):
+            for child in node.children:
+                if self._check(child):
+                    return True
+            return False
+        try:
+            return self._leaf_outcomes[node]
+        except KeyError:
+            outcome = self._leaf_outcomes[node] = bool(
+                node.check(self.defined_variables))
+            return outcome
@@ -0,0 +1,64 @@
+""" Hot reloading of compiled rule sets. """
+import hashlib
+import threading
+
+from .adaptive import condition_key_for
+from .compiler import CompiledRuleSet, compile_rule
+
+
+class RuleSetManager(object):
+    """ Holds the live CompiledRuleSet for a variables and actions class pair
+    and replaces it when `load` is given a new rule list.
+
+    Each rule is identified by a hash of its content, and only rules whose
+    hash wasn't in the previous list are compiled; the others reuse their
+    compiled form. The new rule set is swapped in with a single assignment,
+    so calls already running on the old one finish with it unchanged.
+
+    Rules are compiled one by one, so share_conditions and adaptive aren't
+    available here.
+    """
+
+    def __init__(self, variables_cls, actions_cls, rule_list=()):
+        self.variables_cls = variables_cls
+        self.actions_cls = actions_cls
+        self.rule_set = CompiledRuleSet([])
+        self._compiled = {}
+        self._lock = threading.Lock()
+        self.load(rule_list)
+
+    def load(self, rule_list):
+        """ Makes `rule_list` the live rule set and returns the number of
+        rules that had to be compiled. If a rule doesn't compile the error
+        is raised and the current rule set stays live.
+        """
+        with self._lock:
+            compiled = {}
+            rules = []
+            for rule in rule_list:
+                key = rule_hash(rule)
+                compiled_rule = compiled.get(key) or self._compiled.get(key)
+                if compiled_rule is None:
+                    compiled_rule = compile_rule(rule, self.variables_cls,
+                                                 self.actions_cls)
+                compiled[key] = compiled_rule
+                rules.append(compiled_rule)
+            built = len(set(compiled) - set(self._compiled))
+            self._compiled = compiled
+            self.rule_set = CompiledRuleSet(rules)
+            return built
+
+    def run(self, defined_variables, defined_actions,
+            stop_on_first_trigger=False):
+        return self.rule_set.run(defined_variables, defined_actions,
+                                 stop_on_first_trigger)
+
+    def evaluate(self, defined_variables, defined_actions,
+                 stop_on_first_trigger=False):
+        return self.rule_set.evaluate(defined_variables, defined_actions,
+                                      stop_on_first_trigger)
+
+
+def rule_hash(rule):
+    """ A hash of a rule's content that doesn't depend on dict ordering. """
+    return hashlib.sha1(condition_key_for(rule).encode('utf-8')).hexdigest()
@@ -0,0 +1,119 @@
+""" Observers receive callbacks from the engine as it runs rules, e.g. to
+collect stats. Attach one with engine.set_observer; while none is attached
+the engine doesn't time anything.
+"""
+import math
+import threading
+from collections import defaultdict
+
+
+class BaseObserver(object):
+    """ Subclass this and override the callbacks you're interested in.
+    Durations are in seconds.
+    """
+
+    def rule_started(self, index, rule):
+        pass
+
+    def rule_finished(self, index, rule, triggered, duration):
+        pass
+
+    def condition_checked(self, condition, result):
+        pass
+
+    def variable_fetched(self, name, duration):
+        pass
+
+    def action_executed(self, name, duration):
+        pass
+
+
+class Histogram(object):
+    """ Durations counted in power-of-two microsecond buckets: bucket n holds
+    durations from 2**(n-1) up to (not including) 2**n microseconds, and
+    bucket 0 those under a microsecond.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = defaultdict(int)
+
+    def add(self, duration):
+        self.count += 1
+        self.total += duration
+        self.max = max(self.max, duration)
+        microseconds = duration * 1e6
+        bucket = 0
+        if microseconds >= 1:
+            bucket = int(math.log(microseconds, 2)) + 1
+        self.buckets[bucket] += 1
+
+    def to_dict(self):
+        return {'count': self.count,
+                'total': self.total,
+                'max': self.max,
+                'buckets': dict(self.buckets)}
+
+
+class StatsCollector(BaseObserver):
+    """ Keeps in-memory counts and timing histograms for rules (by index in
+    the rule list), conditions (by variable name and operator), variables and
+    actions. Safe to share between threads.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.rule_runs = defaultdict(int)
+            self.rule_triggers = defaultdict(int)
+            self.rule_times = defaultdict(Histogram)
+            self.condition_results = defaultdict(lambda: [0, 0])
+            self.variable_times = defaultdict(Histogram)
+            self.action_times = defaultdict(Histogram)
+
+    def rule_finished(self, index, rule, triggered, duration):
+        with self._lock:
+            self.rule_runs[index] += 1
+            if triggered:
+                self.rule_triggers[index] += 1
+            self.rule_times[index].add(duration)
+
+    def condition_checked(self, condition, result):
+        key = (condition['name'], condition['operator'])
+        with self._lock:
+            self.condition_results[key][0 if result else 1] += 1
+
+    def variable_fetched(self, name, duration):
+        with self._lock:
+            self.variable_times[name].add(duration)
+
+    def action_executed(self, name, duration):
+        with self._lock:
+            self.action_times[name].add(duration)
+
+    def snapshot(self):
+        """ Returns the stats collected so far as plain dicts. Condition
+        results are keyed "name operator" and hold [true count, false count].
+        """
+        with self._lock:
+            return {
+                'rules': dict(
+                    (index, {'runs': self.rule_runs[index],
+                             'triggered': self.rule_triggers[index],
+                             'time': self.rule_times[index].to_dict()})
+                    for index in self.rule_runs),
+                'conditions': dict(
+                    ('{0} {1}'.format(*key), list(counts))
+                    for key, counts in self.condition_results.items()),
+                'variables': dict(
+                    (name, histogram.to_dict())
+                    for name, histogram in self.variable_times.items()),
+                'actions': dict(
+                    (name, histogram.to_dict())
+                    for name, histogram in self.action_times.items()),
+            }
@@ -1,27 +1,50 @@
-import inspect
 import re
+import threading
+from bisect import bisect_left
+from collections import OrderedDict
 from functools import wraps
-from six import string_types, integer_types
+from types import FunctionType, MethodType
+from six import (string_types, integer_types, with_metaclass,
+                 get_unbound_function)
 
 from .fields import (FIELD_TEXT, FIELD_NUMERIC, FIELD_NO_INPUT,
                      FIELD_SELECT, FIELD_SELECT_MULTIPLE)
-from .utils import fn_name_to_pretty_label, float_to_decimal
+from .utils import (RuleMemberRegistry, fn_name_to_pretty_label,
+                    float_to_decimal)
 from decimal import Decimal, Inexact, Context
 
-class BaseType(object):
+class BaseType(with_metaclass(RuleMemberRegistry, object)):
+    __slots__ = ('value',)
+
+    _rule_member_marker = 'is_operator'
+
     def __init__(self, value):
         self.value = self._assert_valid_value_and_cast(value)
 
     def _assert_valid_value_and_cast(self, value):
         raise NotImplemented()
 
+    @classmethod
+    def _concrete_type(cls):
+        """ The class instances of this type actually get, for types whose
+        __new__ picks a subclass.
+        """
+        return cls
+
+    @classmethod
+    def operator_function(cls, name):
+        """ Returns the OperatorFunction for operator `name` of this type (or
+        the concrete type it stands for), or None if there is no such
+        operator. See get_operator.
+        """
+        return get_operator(cls._concrete_type(), name)
+
     @classmethod
     def get_all_operators(cls):
-        methods = inspect.getmembers(cls)
-        return [{'name': m[0],
-                 'label': m[1].label,
-                 'input_type': m[1].input_type}
-                for m in methods if getattr(m[1], 'is_operator', False)]
+        return [{'name': name,
+                 'label': m.label,
+                 'input_type': m.input_type}
+                for name, m in cls.rule_members().items()]
 
 
 def export_type(cls):
@@ -31,12 +54,15 @@ def export_type(cls):
 
 
 def type_operator(input_type, label=None,
-                  assert_type_for_arguments=True):
+                  assert_type_for_arguments=True, prepare_argument=None):
     """ Decorator to make a function into a type operator.
 
     - assert_type_for_arguments - if True this patches the operator function
       so that arguments passed to it will have _assert_valid_value_and_cast
       called on them to make type errors explicit.
+    - prepare_argument - optional function that turns a (cast) rule constant
+      into a form the operator can use more cheaply, e.g. a compiled regex.
+      Compiled rule sets call it once when the rules are loaded.
     """
     def wrapper(func):
         func.is_operator = True
@@ -51,12 +77,305 @@ def type_operator(input_type, label=None,
                 kwargs = dict((k, self._assert_valid_value_and_cast(v))
                               for k, v in kwargs.items())
             return func(self, *args, **kwargs)
+        # Expose the undecorated operator so callers that have already cast
+        # the argument (e.g. compiled rules) can skip the re-cast.
+        inner.raw_operator = func
+        inner.assert_type_for_arguments = assert_type_for_arguments
+        inner.prepare_argument = prepare_argument
         return inner
     return wrapper
 
 
+def value_operator(input_type, label=None,
+                   assert_type_for_arguments=True, prepare_argument=None):
+    """ Like type_operator, for operators written as functions of the field
+    type, the cast variable value and the (cast) arguments:
+
+        @value_operator(FIELD_TEXT)
+        def equal_to(cls, value, other_string):
+            return value == other_string
+
+    The method this defines works like any other type operator. get_operator
+    also binds the function to the field type, so callers holding cast values
+    can evaluate the operator without creating a BaseType instance.
+    """
+    def wrapper(func):
+        @wraps(func)
+        def method(self, *args):
+            return func(type(self), self.value, *args)
+        method = type_operator(input_type, label, assert_type_for_arguments,
+                               prepare_argument)(method)
+        method.value_function = func
+        return method
+    return wrapper
+
+
+class OperatorFunction(object):
+    """ An operator of a field type, resolved by get_operator.
+
+    - function - called with the result of `cast` for the variable value,
+      then the rule constant unless `no_input` is set.
+    - cast - casts a variable value (or a rule constant) to the field type.
+      For types whose operators take instances (see takes_instances) it is
+      the type itself, and rule constants are never cast up front.
+    - cast_arguments - whether rule constants must go through `cast` first.
+    - prepare_argument - the operator's prepare_argument, or None.
+    """
+    __slots__ = ('function', 'cast', 'no_input', 'cast_arguments',
+                 'prepare_argument')
+
+    def __init__(self, function, cast, no_input, cast_arguments,
+                 prepare_argument):
+        self.function = function
+        self.cast = cast
+        self.no_input = no_input
+        self.cast_arguments = cast_arguments
+        self.prepare_argument = prepare_argument
+
+
+def get_operator(field_type, name):
+    """ Returns the OperatorFunction for operator `name` of `field_type`,
+    or None if the type has no such operator.
+
+    `field_type` must be the concrete type, see BaseType._concrete_type.
+    Results are kept in a table keyed by (type, operator) until an operator
+    is added, replaced or removed on any type.
+    """
+    global _operator_table, _operator_table_generation
+    if _operator_table_generation != RuleMemberRegistry.generation:
+        _operator_table = {}
+        _operator_table_generation = RuleMemberRegistry.generation
+    key = (field_type, name)
+    try:
+        return _operator_table[key]
+    except KeyError:
+        operator = _operator_table[key] = _resolve_operator(field_type, name)
+        return operator
+
+_operator_table = {}
+_operator_table_generation = None
+
+
+def _resolve_operator(field_type, name):
+    method = getattr(field_type, name, None)
+    if method is None:
+        return None
+    no_input = getattr(method, 'input_type', '') == FIELD_NO_INPUT
+    if takes_instances(field_type):
+        # The operator runs on a real instance, built once per variable
+        # value, and casts its own arguments.
+        def function(operand, *args):
+            return getattr(operand, name)(*args)
+        return OperatorFunction(function, field_type, no_input, False, None)
+    return OperatorFunction(
+        MethodType(method.value_function, field_type),
+        field_type.__new__(field_type)._assert_valid_value_and_cast,
+        no_input,
+        getattr(method, 'assert_type_for_arguments', False) is True,
+        getattr(method, 'prepare_argument', None))
+
+
+def takes_instances(field_type):
+    """ Whether the operators of `field_type` must run on instances of it,
+    built with `field_type(value)`. That's the case when the type defines its
+    own __init__, which may set attributes its operators use, or when any of
+    its operators is not a value_operator.
+    """
+    if get_unbound_function(field_type.__init__) is not \
+            get_unbound_function(BaseType.__init__):
+        return True
+    return not all(isinstance(getattr(member, 'value_function', None),
+                              FunctionType)
+                   for member in field_type.rule_members().values())
+
+
+class RegexCache(object):
+    """ A bounded, thread-safe LRU cache of compiled regular expressions.
+    The `re` module's own cache is small and is cleared wholesale when it
+    fills up, which thrashes once a rule set uses more patterns than it holds.
+    """
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self._patterns = OrderedDict()
+        self._lock = threading.Lock()
+
+    def compile(self, pattern):
+        if isinstance(pattern, REGEX_TYPE):
+            return pattern
+        with self._lock:
+            try:
+                compiled = self._patterns.pop(pattern)
+            except KeyError:
+                compiled = re.compile(pattern)
+                if len(self._patterns) >= self.maxsize:
+                    self._patterns.popitem(last=False)
+            self._patterns[pattern] = compiled
+            return compiled
+
+    def clear(self):
+        with self._lock:
+            self._patterns.clear()
+
+    def __len__(self):
+        return len(self._patterns)
+
+
+REGEX_TYPE = type(re.compile(''))
+regex_cache = RegexCache()
+
+
+class RegexScan(object):
+    """ Tells which of many patterns anchored at the start of the string
+    `re.search` would find in it with a single match call. Each pattern is
+    wrapped in an optional lookahead with a named group, so the groups that
+    took part in the match at position 0 are exactly the patterns found.
+
+    Only patterns that start with `^` or `\\A`, have no top-level `|` and
+    no groups or global inline flags of their own can be combined; see
+    `can_combine`. Unanchored patterns would each need a scan of the whole
+    string inside the combined pattern, which is much slower than searching
+    for them one by one.
+    """
+    _default_flags = re.compile('').flags
+
+    def __init__(self, patterns):
+        self.patterns = list(patterns)
+        self.combined = re.compile(''.join(
+            r'(?:(?=(?P<p{0}>{1})))?'.format(index, pattern.pattern)
+            for index, pattern in enumerate(self.patterns)))
+        self._last = (None, frozenset())
+
+    @classmethod
+    def can_combine(cls, pattern):
+        return (pattern.groups == 0 and pattern.flags == cls._default_flags
+                and _anchored_at_start(pattern.pattern))
+
+    def matches(self, text):
+        """ Returns the indices of the patterns found in `text`. The result
+        for the last string seen is kept, since every rule checking the same
+        variable asks about the same string.
+        """
+        last_text, last_matches = self._last
+        if last_text is not None and last_text == text:
+            return last_matches
+        groups = self.combined.match(text).groups()
+        matches = frozenset(index for index, group in enumerate(groups)
+                            if group is not None)
+        self._last = (text, matches)
+        return matches
+
+    def operator_for(self, index):
+        """ A drop-in for StringType.matches_regex for pattern `index`. """
+        def matches_regex(value, regex):
+            return index in self.matches(value)
+        return matches_regex
+
+
+def _anchored_at_start(pattern):
+    """ Whether every match of the regex source `pattern` must start at the
+    beginning of the string (when MULTILINE isn't set).
+    """
+    if not (pattern.startswith('^') or pattern.startswith('\\A')):
+        return False
+    depth = 0
+    index = 0
+    while index < len(pattern):
+        char = pattern[index]
+        if char == '\\':
+            index += 1
+        elif char == '[':
+            # Skip the class; a ] right after [ or [^ is a literal
+            index += 1
+            if pattern[index:index + 1] == '^':
+                index += 1
+            if pattern[index:index + 1] == ']':
+                index += 1
+            while index < len(pattern) and pattern[index] != ']':
+                if pattern[index] == '\\':
+                    index += 1
+                index += 1
+        elif char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+        elif char == '|' and depth == 0:
+            return False
+        index += 1
+    return True
+
+
+class ThresholdIndex(object):
+    """ Answers many numeric comparisons of one value against different
+    thresholds with a few binary searches.
+
+    The thresholds are sorted once. For a given value, `greater_than` and
+    `greater_than_or_equal_to` hold for a prefix of them and `less_than` and
+    `less_than_or_equal_to` for a suffix, so each boundary is found by
+    bisecting with the type's own operator. Epsilon handling is therefore
+    exactly that of the type. `equal_to` holds where both `_or_equal_to`
+    operators do.
+
+    `thresholds` must all be of one type and compared with the built-in
+    operators of `field_type`.
+    """
+    OPERATORS = ('equal_to', 'greater_than', 'greater_than_or_equal_to',
+                 'less_than', 'less_than_or_equal_to')
+    _PREFIX = ('greater_than', 'greater_than_or_equal_to')
+    # The boundaries each operator's result is read from
+    _BOUNDARIES = {
+        'greater_than': ('greater_than',),
+        'greater_than_or_equal_to': ('greater_than_or_equal_to',),
+        'less_than': ('less_than',),
+        'less_than_or_equal_to': ('less_than_or_equal_to',),
+        'equal_to': ('greater_than_or_equal_to', 'less_than_or_equal_to'),
+    }
+
+    def __init__(self, field_type, thresholds, operators):
+        self.thresholds = sorted(thresholds)
+        needed = set()
+        for operator in operators:
+            needed.update(self._BOUNDARIES[operator])
+        self._searches = [(name, name in self._PREFIX,
+                           get_operator(field_type, name).function)
+                          for name in sorted(needed)]
+
+    def boundaries(self, value):
+        """ Returns a dict giving, for each operator searched, the number of
+        thresholds it holds for (for the prefix operators) or the position of
+        the first one it holds for (for the others).
+        """
+        thresholds = self.thresholds
+        boundaries = {}
+        for name, prefix, function in self._searches:
+            low, high = 0, len(thresholds)
+            while low < high:
+                middle = (low + high) // 2
+                if bool(function(value, thresholds[middle])) == prefix:
+                    low = middle + 1
+                else:
+                    high = middle
+            boundaries[name] = low
+        return boundaries
+
+    def comparison(self, operator, threshold):
+        """ Returns a function telling from the boundaries of a value whether
+        `operator` holds for that value and `threshold`.
+        """
+        # Equal thresholds always compare the same, so the first will do
+        position = bisect_left(self.thresholds, threshold)
+        if operator in self._PREFIX:
+            return lambda boundaries: position < boundaries[operator]
+        if operator == 'equal_to':
+            return lambda boundaries: (
+                boundaries['less_than_or_equal_to'] <= position
+                < boundaries['greater_than_or_equal_to'])
+        return lambda boundaries: position >= boundaries[operator]
+
+
 @export_type
 class StringType(BaseType):
+    __slots__ = ()
 
     name = "string"
 
@@ -67,41 +386,55 @@ class StringType(BaseType):
                                  format(value))
         return value
 
-    @type_operator(FIELD_TEXT)
-    def equal_to(self, other_string):
-        return self.value == other_string
+    @value_operator(FIELD_TEXT)
+    def equal_to(cls, value, other_string):
+        return value == other_string
 
-    @type_operator(FIELD_TEXT, label="Equal To (case insensitive)")
-    def equal_to_case_insensitive(self, other_string):
-        return self.value.lower() == other_string.lower()
+    @value_operator(FIELD_TEXT, label="Equal To (case insensitive)")
+    def equal_to_case_insensitive(cls, value, other_string):
+        return value.lower() == other_string.lower()
 
-    @type_operator(FIELD_TEXT)
-    def starts_with(self, other_string):
-        return self.value.startswith(other_string)
+    @value_operator(FIELD_TEXT)
+    def starts_with(cls, value, other_string):
+        return value.startswith(other_string)
 
-    @type_operator(FIELD_TEXT)
-    def ends_with(self, other_string):
-        return self.value.endswith(other_string)
+    @value_operator(FIELD_TEXT)
+    def ends_with(cls, value, other_string):
+        return value.endswith(other_string)
 
-    @type_operator(FIELD_TEXT)
-    def contains(self, other_string):
-        return other_string in self.value
+    @value_operator(FIELD_TEXT)
+    def contains(cls, value, other_string):
+        return other_string in value
 
-    @type_operator(FIELD_TEXT)
-    def matches_regex(self, regex):
-        return re.search(regex, self.value)
+    @value_operator(FIELD_TEXT, prepare_argument=regex_cache.compile)
+    def matches_regex(cls, value, regex):
+        return regex_cache.compile(regex).search(value)
 
-    @type_operator(FIELD_NO_INPUT)
-    def non_empty(self):
-        return bool(self.value)
+    @value_operator(FIELD_NO_INPUT)
+    def non_empty(cls, value):
+        return bool(value)
 
 
 @export_type
 class NumericType(BaseType):
+    __slots__ = ()
     EPSILON = Decimal('0.000001')
 
     name = "numeric"
 
+    # Set to True to evaluate every NumericType variable as a
+    # NativeNumericType. Rules compiled before the switch keep their mode.
+    native_numbers = False
+
+    def __new__(cls, *args, **kwargs):
+        return object.__new__(cls._concrete_type())
+
+    @classmethod
+    def _concrete_type(cls):
+        if cls is NumericType and cls.native_numbers:
+            return NativeNumericType
+        return cls
+
     @staticmethod
     def _assert_valid_value_and_cast(value):
         if isinstance(value, float):
@@ -115,29 +448,102 @@ class NumericType(BaseType):
             raise AssertionError("{0} is not a valid numeric type.".
                                  format(value))
 
-    @type_operator(FIELD_NUMERIC)
-    def equal_to(self, other_numeric):
-        return abs(self.value - other_numeric) <= self.EPSILON
+    @classmethod
+    def _compare(cls, name, value, other_numeric):
+        """ Runs comparison `name` of this type on a cast value. A subclass
+        may have replaced it with a plain type_operator.
+        """
+        function = getattr(getattr(cls, name), 'value_function', None)
+        if function is None:
+            return getattr(cls(value), name)(other_numeric)
+        return function(cls, value, other_numeric)
+
+    @value_operator(FIELD_NUMERIC)
+    def equal_to(cls, value, other_numeric):
+        return abs(value - other_numeric) <= cls.EPSILON
+
+    @value_operator(FIELD_NUMERIC)
+    def greater_than(cls, value, other_numeric):
+        return (value - other_numeric) > cls.EPSILON
+
+    @value_operator(FIELD_NUMERIC)
+    def greater_than_or_equal_to(cls, value, other_numeric):
+        return (cls._compare('greater_than', value, other_numeric)
+                or cls._compare('equal_to', value, other_numeric))
+
+    @value_operator(FIELD_NUMERIC)
+    def less_than(cls, value, other_numeric):
+        return (other_numeric - value) > cls.EPSILON
+
+    @value_operator(FIELD_NUMERIC)
+    def less_than_or_equal_to(cls, value, other_numeric):
+        return (cls._compare('less_than', value, other_numeric)
+                or cls._compare('equal_to', value, other_numeric))
+
+
+class NativeNumericType(NumericType):
+    """ A NumericType that compares python ints and floats as they are
+    instead of converting them to Decimal, which is much cheaper. The same
+    epsilon is used, as a float, so results only differ from NumericType for
+    differences within float rounding error of EPSILON. Decimal values are
+    still compared as Decimals, converting the other side when it's a float.
+
+    Use it per variable with `numeric_rule_variable(native=True)`, or for
+    every numeric variable by setting `NumericType.native_numbers = True`.
+    """
+    __slots__ = ()
+
+    FLOAT_EPSILON = float(NumericType.EPSILON)
+
+    # Same operators as NumericType, so it isn't exported separately.
+    export_in_rule_data = False
+
+    @staticmethod
+    def _assert_valid_value_and_cast(value):
+        if isinstance(value, (float, Decimal) + integer_types):
+            return value
+        raise AssertionError("{0} is not a valid numeric type.".
+                             format(value))
+
+    @staticmethod
+    def _difference(minuend, subtrahend):
+        try:
+            return minuend - subtrahend
+        except TypeError:
+            # Only Decimal and float don't mix.
+            return _to_decimal(minuend) - _to_decimal(subtrahend)
+
+    @classmethod
+    def _epsilon_for(cls, difference):
+        if isinstance(difference, Decimal):
+            return cls.EPSILON
+        return cls.FLOAT_EPSILON
 
-    @type_operator(FIELD_NUMERIC)
-    def greater_than(self, other_numeric):
-        return (self.value - other_numeric) > self.EPSILON
+    @value_operator(FIELD_NUMERIC)
+    def equal_to(cls, value, other_numeric):
+        difference = abs(cls._difference(value, other_numeric))
+        return difference <= cls._epsilon_for(difference)
 
-    @type_operator(FIELD_NUMERIC)
-    def greater_than_or_equal_to(self, other_numeric):
-        return self.greater_than(other_numeric) or self.equal_to(other_numeric)
+    @value_operator(FIELD_NUMERIC)
+    def greater_than(cls, value, other_numeric):
+        difference = cls._difference(value, other_numeric)
+        return difference > cls._epsilon_for(difference)
 
-    @type_operator(FIELD_NUMERIC)
-    def less_than(self, other_numeric):
-        return (other_numeric - self.value) > self.EPSILON
+    @value_operator(FIELD_NUMERIC)
+    def less_than(cls, value, other_numeric):
+        difference = cls._difference(other_numeric, value)
+        return difference > cls._epsilon_for(difference)
 
-    @type_operator(FIELD_NUMERIC)
-    def less_than_or_equal_to(self, other_numeric):
-        return self.less_than(other_numeric) or self.equal_to(other_numeric)
+
+def _to_decimal(value):
+    if isinstance(value, float):
+        return float_to_decimal(value)
+    return value
 
 
 @export_type
 class BooleanType(BaseType):
+    __slots__ = ()
 
     name = "boolean"
 
@@ -147,16 +553,72 @@ class BooleanType(BaseType):
                                  format(value))
         return value
 
-    @type_operator(FIELD_NO_INPUT)
-    def is_true(self):
-        return self.value
+    @value_operator(FIELD_NO_INPUT)
+    def is_true(cls, value):
+        return value
+
+    @value_operator(FIELD_NO_INPUT)
+    def is_false(cls, value):
+        return not value
+
+def _select_key(value):
+    """ The key select operators compare by: strings compare case
+    insensitively, everything else with ==.
+    """
+    if isinstance(value, string_types):
+        return value.lower()
+    return value
+
+
+def _select_keys(values):
+    """ Returns a frozenset of the select keys of `values`, or None if some
+    value is unhashable and callers need to fall back to comparing pairwise.
+    """
+    try:
+        # _select_key inlined: this runs once per value of large lists
+        return frozenset([value.lower() if isinstance(value, string_types)
+                          else value for value in values])
+    except TypeError:
+        return None
+
+
+class SelectValues(tuple):
+    """ A tuple of rule-side select values that builds its key set once, so
+    compiled rules don't rebuild it on every evaluation.
+    """
+
+    def __new__(cls, values):
+        self = tuple.__new__(cls, values)
+        self.keys = _select_keys(self)
+        return self
+
+
+class SelectOperand(list):
+    """ A cast select multiple value. Its key set is built the first time an
+    operator needs it and then kept, so every condition reading the same
+    cast value (e.g. a cached variable) builds it once.
+    """
+    __slots__ = ('_keys',)
+
+    def select_keys(self):
+        try:
+            return self._keys
+        except AttributeError:
+            keys = self._keys = _select_keys(self)
+            return keys
+
+
+def _keys_of(values):
+    if isinstance(values, SelectValues):
+        return values.keys
+    if isinstance(values, SelectOperand):
+        return values.select_keys()
+    return _select_keys(values)
 
-    @type_operator(FIELD_NO_INPUT)
-    def is_false(self):
-        return not self.value
 
 @export_type
 class SelectType(BaseType):
+    __slots__ = ()
 
     name = "select"
 
@@ -174,23 +636,41 @@ class SelectType(BaseType):
         else:
             return value_from_list == other_value
 
-    @type_operator(FIELD_SELECT, assert_type_for_arguments=False)
-    def contains(self, other_value):
-        for val in self.value:
-            if self._case_insensitive_equal_to(val, other_value):
+    @classmethod
+    def _contains(cls, value, other_value, keys=None):
+        """ Whether `other_value` is in `value`, whose key set is `keys` if
+        it has been built.
+        """
+        if keys is not None:
+            try:
+                return _select_key(other_value) in keys
+            except TypeError:
+                pass
+        if not isinstance(other_value, string_types):
+            return any(val == other_value for val in value)
+        # _case_insensitive_equal_to, with other_value lowered once
+        other_key = other_value.lower()
+        for val in value:
+            if isinstance(val, string_types):
+                if val.lower() == other_key:
+                    return True
+            elif val == other_value:
                 return True
         return False
 
-    @type_operator(FIELD_SELECT, assert_type_for_arguments=False)
-    def does_not_contain(self, other_value):
-        for val in self.value:
-            if self._case_insensitive_equal_to(val, other_value):
-                return False
-        return True
+    @value_operator(FIELD_SELECT, assert_type_for_arguments=False)
+    def contains(cls, value, other_value):
+        # A single lookup: scanning beats building a key set first
+        return cls._contains(value, other_value)
+
+    @value_operator(FIELD_SELECT, assert_type_for_arguments=False)
+    def does_not_contain(cls, value, other_value):
+        return not cls._contains(value, other_value)
 
 
 @export_type
 class SelectMultipleType(BaseType):
+    __slots__ = ()
 
     name = "select_multiple"
 
@@ -198,40 +678,54 @@ class SelectMultipleType(BaseType):
         if not hasattr(value, '__iter__'):
             raise AssertionError("{0} is not a valid select multiple type".
                                  format(value))
-        return value
+        if isinstance(value, SelectOperand):
+            return value
+        return SelectOperand(value)
 
-    @type_operator(FIELD_SELECT_MULTIPLE)
-    def contains_all(self, other_value):
-        select = SelectType(self.value)
+    @value_operator(FIELD_SELECT_MULTIPLE, prepare_argument=SelectValues)
+    def contains_all(cls, value, other_value):
+        keys, other_keys = _keys_of(value), _keys_of(other_value)
+        if keys is not None and other_keys is not None:
+            return other_keys <= keys
         for other_val in other_value:
-            if not select.contains(other_val):
+            if not SelectType._contains(value, other_val, keys):
                 return False
         return True
 
-    @type_operator(FIELD_SELECT_MULTIPLE)
-    def is_contained_by(self, other_value):
-        other_select_multiple = SelectMultipleType(other_value)
-        return other_select_multiple.contains_all(self.value)
+    @value_operator(FIELD_SELECT_MULTIPLE, prepare_argument=SelectValues)
+    def is_contained_by(cls, value, other_value):
+        keys, other_keys = _keys_of(value), _keys_of(other_value)
+        if keys is not None and other_keys is not None:
+            return keys <= other_keys
+        for val in value:
+            if not SelectType._contains(other_value, val, other_keys):
+                return False
+        return True
 
-    @type_operator(FIELD_SELECT_MULTIPLE)
-    def shares_at_least_one_element_with(self, other_value):
-        select = SelectType(self.value)
+    @value_operator(FIELD_SELECT_MULTIPLE, prepare_argument=SelectValues)
+    def shares_at_least_one_element_with(cls, value, other_value):
+        keys, other_keys = _keys_of(value), _keys_of(other_value)
+        if keys is not None and other_keys is not None:
+            return not keys.isdisjoint(other_keys)
         for other_val in other_value:
-            if select.contains(other_val):
+            if SelectType._contains(value, other_val, keys):
                 return True
         return False
 
-    @type_operator(FIELD_SELECT_MULTIPLE)
-    def shares_exactly_one_element_with(self, other_value):
+    @value_operator(FIELD_SELECT_MULTIPLE, prepare_argument=SelectValues)
+    def shares_exactly_one_element_with(cls, value, other_value):
+        # Repeated rule-side values count once each, so this can't be a
+        # set intersection.
         found_one = False
-        select = SelectType(self.value)
+        keys = _keys_of(value)
         for other_val in other_value:
-            if select.contains(other_val):
+            if SelectType._contains(value, other_val, keys):
                 if found_one:
                     return False
                 found_one = True
         return found_one
 
-    @type_operator(FIELD_SELECT_MULTIPLE)
-    def shares_no_elements_with(self, other_value):
-        return not self.shares_at_least_one_element_with(other_value)
+    @value_operator(FIELD_SELECT_MULTIPLE, prepare_argument=SelectValues)
+    def shares_no_elements_with(cls, value, other_value):
+        return not get_operator(cls, 'shares_at_least_one_element_with'
+                                ).function(value, other_value)
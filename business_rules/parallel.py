@@ -0,0 +1,114 @@
+""" Evaluating one rule set over many objects on several cores (or threads).
+Requires concurrent.futures (Python 3, or the `futures` backport on 2.7).
+"""
+import multiprocessing
+from collections import deque
+from itertools import islice
+
+from .compiler import compile_rules
+from .deferred import actions_class
+
+# Set in each worker process by _init_worker: the rule list, the factories
+# and the rule sets compiled from them so far.
+_worker_state = None
+
+
+def run_all_parallel(rule_list, objects, variables_factory, actions_factory,
+                     workers=None, chunksize=100, stop_on_first_trigger=False,
+                     executor='process'):
+    """ Runs `rule_list` against every object in `objects`, spreading the
+    objects over a pool of `workers`. Yields, in the order of `objects`, the
+    indices of the rules triggered for each object.
+
+    `variables_factory(obj)` and `actions_factory(obj)` build the variables
+    and actions objects for an object; actions run in the worker. The rules
+    are compiled once per worker for the classes the factories return.
+
+    - chunksize - number of objects sent to a worker at a time. Only a few
+      chunks per worker are in flight at once, so `objects` can be a lazy
+      iterable of any size.
+    - executor - 'process' (the default) for CPU-bound rules, or 'thread'
+      for rules whose variables mostly wait on I/O. With processes, the
+      rules, factories and objects must be picklable.
+    """
+    state = _WorkerState(rule_list, variables_factory, actions_factory)
+    pool, task_state = _make_pool(executor, workers, state)
+    max_in_flight = 2 * (workers or multiprocessing.cpu_count())
+    iterator = iter(objects)
+    pending = deque()
+    try:
+        while True:
+            while len(pending) < max_in_flight:
+                chunk = list(islice(iterator, chunksize))
+                if not chunk:
+                    break
+                pending.append(pool.submit(_run_chunk, chunk,
+                                           stop_on_first_trigger, task_state))
+            if not pending:
+                return
+            for triggered in pending.popleft().result():
+                yield triggered
+    finally:
+        for future in pending:
+            future.cancel()
+        pool.shutdown(wait=True)
+
+
+def _make_pool(executor, workers, state):
+    """ Returns the pool and the state to send along with each chunk (None
+    when the workers already hold it).
+    """
+    from concurrent import futures
+    if executor == 'thread':
+        return futures.ThreadPoolExecutor(workers), state
+    if executor != 'process':
+        raise AssertionError("Unknown executor {0}, expected 'process' or "
+                             "'thread'".format(executor))
+    try:
+        return futures.ProcessPoolExecutor(workers,
+                                           initializer=_init_worker,
+                                           initargs=(state,)), None
+    except TypeError:
+        # No initializer before Python 3.7: ship the rules with every chunk.
+        return futures.ProcessPoolExecutor(workers), state
+
+
+def _init_worker(state):
+    global _worker_state
+    _worker_state = state
+
+
+def _run_chunk(chunk, stop_on_first_trigger, state=None):
+    state = state or _worker_state
+    results = []
+    for obj in chunk:
+        defined_variables = state.variables_factory(obj)
+        defined_actions = state.actions_factory(obj)
+        compiled = state.compiled_for(defined_variables, defined_actions)
+        results.append(compiled.evaluate(defined_variables, defined_actions,
+                                         stop_on_first_trigger))
+    return results
+
+
+class _WorkerState(object):
+
+    def __init__(self, rule_list, variables_factory, actions_factory):
+        self.rule_list = rule_list
+        self.variables_factory = variables_factory
+        self.actions_factory = actions_factory
+        self.compiled = {}
+
+    def __getstate__(self):
+        # Compiled rule sets stay in the process that compiled them.
+        return (self.rule_list, self.variables_factory, self.actions_factory)
+
+    def __setstate__(self, state):
+        self.__init__(*state)
+
+    def compiled_for(self, defined_variables, defined_actions):
+        key = (type(defined_variables), actions_class(defined_actions))
+        compiled = self.compiled.get(key)
+        if compiled is None:
+            compiled = self.compiled[key] = compile_rules(self.rule_list,
+                                                          *key)
+        return compiled
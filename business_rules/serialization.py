@@ -0,0 +1,176 @@
+""" A compact binary format for validated rule sets.
+
+`dumps` checks a rule list against the variables and actions classes and
+casts its constants, and stores the result with `marshal`. `loads` builds a
+CompiledRuleSet from it without parsing JSON or casting constants again. It
+still looks up each distinct variable, operator and action on the classes,
+once per load:
+
+    data = dumps(rule_list, ProductVariables, ProductActions)
+    rule_set = loads(data, ProductVariables, ProductActions)
+
+The data starts with a header naming the format version, the marshal
+version and the NumericType.native_numbers setting it was written with. When
+any of them differ from the running process, `loads` compiles the JSON rule
+list passed as `fallback_json` instead.
+"""
+import json
+import marshal
+import struct
+from decimal import Decimal
+
+from six import binary_type, integer_types, string_types, text_type
+
+from .compiler import (CompiledAll, CompiledAny, CompiledRule,
+                       CompiledRuleSet, action_builder, cast_condition_value,
+                       compile_action, compile_rules, condition_builder)
+from .operators import NumericType
+
+MAGIC = b'BRS'
+FORMAT_VERSION = 2
+
+_HEADER = struct.Struct('>3sBBB')
+# Every rule constant is stored as a (kind, payload) pair. marshal can't
+# store Decimals or list subclasses, and a plain tuple must not be taken for
+# an encoded Decimal. Lists and tuples of plain values, e.g. select options,
+# are stored as they are; others have each item encoded.
+(_VALUE, _DECIMAL, _VALUE_LIST, _LIST, _VALUE_TUPLE, _TUPLE,
+ _DICT) = range(7)
+_PLAIN_TYPES = frozenset(string_types + integer_types +
+                         (text_type, binary_type, float, bool, type(None)))
+
+def dumps(rule_list, variables_cls, actions_cls):
+    """ Returns `rule_list` in the binary format. Raises AssertionError, like
+    compile_rules, when a rule refers to something the classes don't define.
+    If `actions_cls` is None the actions are stored without being checked.
+    """
+    rules = tuple((_encode_conditions(rule['conditions'], variables_cls),
+                   _encode_actions(rule['actions'], actions_cls))
+                  for rule in rule_list)
+    return _header() + marshal.dumps(rules)
+
+
+def loads(data, variables_cls, actions_cls, fallback_json=None):
+    """ Returns the CompiledRuleSet stored in `data` by dumps. If `actions_cls`
+    is None the actions are left out, as with compile_rules.
+
+    When `data` can't be used by this process, `fallback_json` (the rule list
+    as JSON text) is compiled instead, or ValueError is raised without one.
+    """
+    if data[:_HEADER.size] != _header():
+        if fallback_json is None:
+            raise ValueError("Unsupported rule set data: expected format "
+                             "version {0}".format(FORMAT_VERSION))
+        return compile_rules(json.loads(fallback_json), variables_cls,
+                             actions_cls)
+    rules = marshal.loads(data[_HEADER.size:])
+    decoder = _Decoder(variables_cls, actions_cls)
+    return CompiledRuleSet([
+        CompiledRule(decoder.conditions(conditions),
+                     decoder.actions(actions))
+        for conditions, actions in rules])
+
+
+def dump(rule_list, variables_cls, actions_cls, fp):
+    """ Writes dumps(...) to the binary file `fp`. """
+    fp.write(dumps(rule_list, variables_cls, actions_cls))
+
+
+def load(fp, variables_cls, actions_cls, fallback_json=None):
+    """ Reads a rule set written by dump from the binary file `fp`. """
+    return loads(fp.read(), variables_cls, actions_cls, fallback_json)
+
+
+def _header():
+    return _HEADER.pack(MAGIC, FORMAT_VERSION, marshal.version,
+                        bool(NumericType.native_numbers))
+
+
+def _encode_conditions(conditions, variables_cls):
+    keys = list(conditions.keys())
+    if keys == ['all'] or keys == ['any']:
+        assert len(conditions[keys[0]]) >= 1
+        return (keys[0], tuple(_encode_conditions(condition, variables_cls)
+                               for condition in conditions[keys[0]]))
+    assert not ('any' in keys or 'all' in keys)
+    value = cast_condition_value(conditions, variables_cls)
+    return (conditions['name'], conditions['operator'], _encode_value(value))
+
+
+def _encode_value(value):
+    if isinstance(value, Decimal):
+        return (_DECIMAL, str(value))
+    if isinstance(value, (list, tuple)):
+        # Including operators.SelectOperand
+        is_list = isinstance(value, list)
+        if all(type(v) in _PLAIN_TYPES for v in value):
+            return (_VALUE_LIST if is_list else _VALUE_TUPLE, tuple(value))
+        return (_LIST if is_list else _TUPLE,
+                tuple(_encode_value(v) for v in value))
+    if isinstance(value, dict):
+        return (_DICT, tuple((k, _encode_value(v)) for k, v in value.items()))
+    return (_VALUE, value)
+
+
+def _decode_value(value):
+    kind, payload = value
+    if kind == _VALUE or kind == _VALUE_TUPLE:
+        return payload
+    if kind == _DECIMAL:
+        return Decimal(payload)
+    if kind == _VALUE_LIST:
+        return list(payload)
+    if kind == _LIST:
+        return [_decode_value(v) for v in payload]
+    if kind == _TUPLE:
+        return tuple(_decode_value(v) for v in payload)
+    return dict((k, _decode_value(v)) for k, v in payload)
+
+
+class _Decoder(object):
+    """ Builds compiled conditions and actions from their stored form. Each
+    variable and operator pair, and each action, is resolved on the classes
+    once per load rather than once per use.
+    """
+
+    def __init__(self, variables_cls, actions_cls):
+        self.variables_cls = variables_cls
+        self.actions_cls = actions_cls
+        self._condition_builders = {}
+        self._action_builders = {}
+
+    def conditions(self, conditions):
+        if len(conditions) == 2:
+            key, children = conditions
+            group = CompiledAll if key == 'all' else CompiledAny
+            return group([self.conditions(child) for child in children])
+        name, op, value = conditions
+        try:
+            build = self._condition_builders[name, op]
+        except KeyError:
+            build = self._condition_builders[name, op] = condition_builder(
+                name, op, self.variables_cls)
+        if value[0] == _VALUE:
+            return build(value[1])
+        return build(_decode_value(value))
+
+    def actions(self, actions):
+        if self.actions_cls is None:
+            return []
+        compiled = []
+        for name, params in actions:
+            try:
+                build = self._action_builders[name]
+            except KeyError:
+                build = self._action_builders[name] = action_builder(
+                    name, self.actions_cls)
+            compiled.append(build(params))
+        return compiled
+
+
+def _encode_actions(actions, actions_cls):
+    if actions_cls is not None:
+        for action in actions:
+            compile_action(action, actions_cls)
+    return tuple((action['name'], action.get('params') or {})
+                 for action in actions)
@@ -0,0 +1,81 @@
+""" Lazily evaluating a rule set over a stream of facts, and the JSON lines
+runner behind `python -m business_rules`.
+"""
+import io
+import json
+from itertools import tee
+
+from six.moves import zip
+
+from .compiler import CompiledRuleSet, compile_rules
+from .deferred import actions_class
+
+
+def iter_evaluate(rule_set, facts_iterable, variables_factory=None,
+                  actions_factory=None, stop_on_first_trigger=False):
+    """ Yields, for each fact in `facts_iterable`, the indices of the rules
+    in `rule_set` that were triggered. Facts are consumed one at a time, so
+    memory use doesn't grow with the length of the stream.
+
+    `rule_set` is a CompiledRuleSet or a rule list. A rule list is compiled
+    on the first fact for the classes the factories return.
+    `variables_factory(fact)` builds the variables object for a fact; without
+    one, the facts must already be variables objects. Actions are only run
+    when an `actions_factory` is given.
+    """
+    compiled = rule_set if isinstance(rule_set, CompiledRuleSet) else None
+    for fact in facts_iterable:
+        if variables_factory is not None:
+            defined_variables = variables_factory(fact)
+        else:
+            defined_variables = fact
+        defined_actions = None
+        if actions_factory is not None:
+            defined_actions = actions_factory(fact)
+        if compiled is None:
+            actions_cls = None
+            if defined_actions is not None:
+                actions_cls = actions_class(defined_actions)
+            compiled = compile_rules(rule_set, type(defined_variables),
+                                     actions_cls)
+        yield compiled.evaluate(defined_variables, defined_actions,
+                                stop_on_first_trigger)
+
+
+def evaluate_jsonl(rule_set, input_file, output_file, variables_factory,
+                   actions_factory=None, stop_on_first_trigger=False,
+                   batch_size=1000):
+    """ Reads one JSON fact per line from the binary file `input_file` and
+    writes one JSON result per line to the binary file `output_file`, in the
+    form {"line": <line number>, "triggered": [<rule indices>]}. Blank lines
+    are skipped. Output is written `batch_size` lines at a time.
+
+    Returns the number of facts evaluated.
+    """
+    numbered, facts = tee(_read_jsonl(input_file))
+    results = iter_evaluate(rule_set, (fact for _, fact in facts),
+                            variables_factory, actions_factory,
+                            stop_on_first_trigger)
+    count = 0
+    buffer = []
+    for (number, _), triggered in zip(numbered, results):
+        buffer.append(json.dumps({'line': number, 'triggered': triggered},
+                                 separators=(',', ':')).encode('utf-8'))
+        buffer.append(b'\n')
+        count += 1
+        if len(buffer) >= 2 * batch_size:
+            output_file.writelines(buffer)
+            buffer = []
+    output_file.writelines(buffer)
+    return count
+
+
+def _read_jsonl(input_file):
+    for number, line in enumerate(input_file, 1):
+        if line.strip():
+            yield number, json.loads(line.decode('utf-8'))
+
+
+def open_binary(path, mode, buffer_size=1 << 20):
+    """ Opens `path` for buffered binary I/O. """
+    return io.open(path, mode + 'b', buffering=buffer_size)
@@ -0,0 +1,65 @@
+""" Records of traced runs of a compiled rule set, see
+CompiledRuleSet.explain.
+"""
+
+
+class Trace(object):
+    """ What one traced run of a compiled rule set saw and decided.
+
+    - triggered - the indices of the triggered rules, as evaluate returns.
+    - rules - a RuleTrace for each rule evaluated, in order.
+    - variables - the cast value of every variable a condition read, by
+      name.
+    """
+    __slots__ = ('triggered', 'rules', 'variables', 'shared')
+
+    def __init__(self):
+        self.triggered = []
+        self.rules = []
+        self.variables = {}
+        # Results of shared conditions explained so far in this run
+        self.shared = {}
+
+    def to_dict(self):
+        return {'triggered': list(self.triggered),
+                'rules': [rule.to_dict() for rule in self.rules],
+                'variables': dict(self.variables)}
+
+
+class RuleTrace(object):
+    """ How rule `index` was decided. `decided_by` holds the conditions that
+    decided it, in evaluation order: for a rule that fired, every condition
+    needed to make it true; for one that didn't, the conditions that made it
+    false (the first false child of an `all`, every child of an `any`).
+    """
+    __slots__ = ('index', 'triggered', 'decided_by')
+
+    def __init__(self, index, triggered, decided_by):
+        self.index = index
+        self.triggered = triggered
+        self.decided_by = decided_by
+
+    def to_dict(self):
+        return {'index': self.index,
+                'triggered': self.triggered,
+                'decided_by': [condition.to_dict()
+                               for condition in self.decided_by]}
+
+
+class ConditionTrace(object):
+    """ A leaf condition and its result. `value` is the rule constant as
+    compiled, e.g. cast to Decimal or a compiled regex.
+    """
+    __slots__ = ('name', 'operator', 'value', 'result')
+
+    def __init__(self, name, operator, value, result):
+        self.name = name
+        self.operator = operator
+        self.value = value
+        self.result = result
+
+    def to_dict(self):
+        return {'name': self.name,
+                'operator': self.operator,
+                'value': self.value,
+                'result': self.result}
@@ -1,9 +1,60 @@
-from decimal import Decimal, Inexact, Context
-import inspect
+from collections import OrderedDict
 
 def fn_name_to_pretty_label(name):
     return ' '.join([w.title() for w in name.split('_')])
 
+class RuleMemberRegistry(type):
+    """ Metaclass of BaseVariables, BaseActions and BaseType. Gives each class
+    a registry of its rule members: the members, inherited or not, on which
+    the attribute named by the class's `_rule_member_marker` is true.
+
+    A class's registry is built the first time it's asked for. Setting or
+    deleting a rule member on any class using this metaclass bumps
+    `generation`, which makes every class rebuild its registry on next use.
+    """
+    generation = 0
+
+    def rule_members(cls):
+        """ Returns an OrderedDict of the class's rule members by name, sorted
+        by name like inspect.getmembers.
+        """
+        cached = cls.__dict__.get('_rule_members_cache')
+        generation = RuleMemberRegistry.generation
+        if cached is not None and cached[0] == generation:
+            return cached[1]
+        marker = cls._rule_member_marker
+        names = set()
+        for klass in cls.__mro__:
+            names.update(vars(klass))
+        members = OrderedDict()
+        for name in sorted(names):
+            try:
+                member = getattr(cls, name)
+            except AttributeError:
+                continue
+            if getattr(member, marker, False):
+                members[name] = member
+        type.__setattr__(cls, '_rule_members_cache', (generation, members))
+        return members
+
+    def __setattr__(cls, name, value):
+        changed = cls._is_rule_member(name) or getattr(
+            value, cls._rule_member_marker, False)
+        type.__setattr__(cls, name, value)
+        if changed:
+            RuleMemberRegistry.generation += 1
+
+    def __delattr__(cls, name):
+        changed = cls._is_rule_member(name)
+        type.__delattr__(cls, name)
+        if changed:
+            RuleMemberRegistry.generation += 1
+
+    def _is_rule_member(cls, name):
+        # Inherited members count: shadowing one removes it from the registry
+        return bool(getattr(getattr(cls, name, None), cls._rule_member_marker,
+                            False))
+
 def export_rule_data(variables, actions):
     """ export_rule_data is used to export all information about the
     variables, actions, and operators to the client. This will return a
@@ -11,32 +62,111 @@ def export_rule_data(variables, actions):
     - variables: a list of all available variables along with their label, type and options
     - actions: a list of all actions along with their label and params
     - variable_type_operators: a dictionary of all field_types -> list of available operators
+
+    `variables` and `actions` may be classes or instances. The result is
+    built once per pair of classes (see cached_rule_data) and a copy is
+    returned, so callers are free to modify it.
     """
-    from . import operators
-    actions_data = actions.get_all_actions()
-    variables_data = variables.get_all_variables()
+    return _copy_data(cached_rule_data(variables, actions).data)
+
+def cached_rule_data(variables, actions):
+    """ Returns the RuleData for a variables and actions pair (classes or
+    instances). It is computed on first use and recomputed only after a rule
+    variable, action or operator is added, removed or replaced on some class.
+    """
+    variables_cls = _class_of(variables)
+    actions_cls = _class_of(actions)
+    key = (variables_cls, actions_cls)
+    fingerprint = (RuleMemberRegistry.generation, tuple(_exported_types()))
+    cached = _rule_data_cache.get(key)
+    if cached is None or cached.fingerprint != fingerprint:
+        cached = _rule_data_cache[key] = RuleData(
+            _build_rule_data(variables_cls, actions_cls), fingerprint)
+    return cached
+
+class RuleData(object):
+    """ The output of export_rule_data for one variables and actions pair.
+
+    - data - the exported dict. It is shared by every caller, so don't
+      modify it.
+    - json - `data` serialized as UTF-8 JSON bytes, with sorted keys.
+    - etag - a hash of `json`, for use as an HTTP ETag.
+
+    `json` and `etag` are computed the first time they're read, so
+    export_rule_data works for data that json can't serialize, like Decimal
+    select options.
+    """
+
+    def __init__(self, data, fingerprint):
+        self.data = data
+        self.fingerprint = fingerprint
+        self._json = None
+        self._etag = None
+
+    @property
+    def json(self):
+        if self._json is None:
+            import json
+            self._json = json.dumps(self.data, sort_keys=True,
+                                    separators=(',', ':')).encode('utf-8')
+        return self._json
+
+    @property
+    def etag(self):
+        if self._etag is None:
+            import hashlib
+            self._etag = hashlib.sha1(self.json).hexdigest()
+        return self._etag
+
+_rule_data_cache = {}
+
+def _build_rule_data(variables_cls, actions_cls):
+    actions_data = actions_cls.get_all_actions()
+    variables_data = variables_cls.get_all_variables()
     variable_type_operators = {}
-    for variable_class in inspect.getmembers(operators, lambda x: getattr(x, 'export_in_rule_data', False)):
-        variable_type = variable_class[1] # getmembers returns (name, value)
+    for variable_type in _exported_types():
         variable_type_operators[variable_type.name] = variable_type.get_all_operators()
 
     return {"variables": variables_data,
             "actions": actions_data,
             "variable_type_operators": variable_type_operators}
 
+def _exported_types():
+    from . import operators
+    return [member for _, member in sorted(vars(operators).items())
+            if getattr(member, 'export_in_rule_data', False)]
+
+def _copy_data(data):
+    # Faster than copy.deepcopy for the plain dicts and lists exported here
+    if isinstance(data, dict):
+        return dict((k, _copy_data(v)) for k, v in data.items())
+    if isinstance(data, list):
+        return [_copy_data(v) for v in data]
+    return data
+
+def _class_of(obj):
+    return obj if isinstance(obj, type) else type(obj)
+
+# The decimal names float_to_decimal uses, imported on its first call so
+# that importing actions or variables doesn't load decimal.
+_Context = _Decimal = _Inexact = None
+
 def float_to_decimal(f):
     """
     Convert a floating point number to a Decimal with
     no loss of information. Intended for Python 2.6 where
     casting float to Decimal does not work.
     """
+    global _Context, _Decimal, _Inexact
+    if _Decimal is None:
+        from decimal import Context, Decimal, Inexact
+        _Context, _Decimal, _Inexact = Context, Decimal, Inexact
     n, d = f.as_integer_ratio()
-    numerator, denominator = Decimal(n), Decimal(d)
-    ctx = Context(prec=60)
+    numerator, denominator = _Decimal(n), _Decimal(d)
+    ctx = _Context(prec=60)
     result = ctx.divide(numerator, denominator)
-    while ctx.flags[Inexact]:
-        ctx.flags[Inexact] = False
+    while ctx.flags[_Inexact]:
+        ctx.flags[_Inexact] = False
         ctx.prec *= 2
         result = ctx.divide(numerator, denominator)
     return result
-
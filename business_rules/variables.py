@@ -1,33 +1,44 @@
-import inspect
 from functools import wraps
-from .utils import fn_name_to_pretty_label
+
+from six import with_metaclass
+
+from .utils import RuleMemberRegistry, fn_name_to_pretty_label
 from .operators import (BaseType,
                         NumericType,
+                        NativeNumericType,
                         StringType,
                         BooleanType,
                         SelectType,
                         SelectMultipleType)
 
-class BaseVariables(object):
+class BaseVariables(with_metaclass(RuleMemberRegistry, object)):
     """ Classes that hold a collection of variables to use with the rules
     engine should inherit from this.
     """
+    _rule_member_marker = 'is_rule_variable'
+
+    # Holds cast values of `cached` rule variables while engine.run_all is
+    # evaluating rules against this object. None outside of a run.
+    _rule_variable_cache = None
+
     @classmethod
     def get_all_variables(cls):
-        methods = inspect.getmembers(cls)
-        return [{'name': m[0],
-                 'label': m[1].label,
-                 'field_type': m[1].field_type.name,
-                 'options': m[1].options,
-                } for m in methods if getattr(m[1], 'is_rule_variable', False)]
+        return [{'name': name,
+                 'label': m.label,
+                 'field_type': m.field_type.name,
+                 'options': m.options,
+                } for name, m in cls.rule_members().items()]
 
 
-def rule_variable(field_type, label=None, options=None):
+def rule_variable(field_type, label=None, options=None, cached=False):
     """ Decorator to make a function into a rule variable
+
+    - cached - if True the variable is computed and cast at most once per
+      run_all call, no matter how many conditions reference it.
     """
     options = options or []
     def wrapper(func):
-        if not (type(field_type) == type and issubclass(field_type, BaseType)):
+        if not (isinstance(field_type, type) and issubclass(field_type, BaseType)):
             raise AssertionError("{0} is not instance of BaseType in"\
                     " rule_variable field_type".format(field_type))
         func.field_type = field_type
@@ -35,27 +46,34 @@ def rule_variable(field_type, label=None, options=None):
         func.label = label \
                 or fn_name_to_pretty_label(func.__name__)
         func.options = options
+        func.cached = cached
         return func
     return wrapper
 
 
-def _rule_variable_wrapper(field_type, label):
+def _rule_variable_wrapper(field_type, label, cached=False):
     if callable(label):
         # Decorator is being called with no args, label is actually the decorated func
         return rule_variable(field_type)(label)
-    return rule_variable(field_type, label=label)
+    return rule_variable(field_type, label=label, cached=cached)
 
-def numeric_rule_variable(label=None):
-    return _rule_variable_wrapper(NumericType, label)
+def numeric_rule_variable(label=None, cached=False, native=False):
+    """ With native=True the variable is compared as a plain int or float,
+    see operators.NativeNumericType.
+    """
+    return _rule_variable_wrapper(NativeNumericType if native else NumericType,
+                                  label, cached)
 
-def string_rule_variable(label=None):
-    return _rule_variable_wrapper(StringType, label)
+def string_rule_variable(label=None, cached=False):
+    return _rule_variable_wrapper(StringType, label, cached)
 
-def boolean_rule_variable(label=None):
-    return _rule_variable_wrapper(BooleanType, label)
+def boolean_rule_variable(label=None, cached=False):
+    return _rule_variable_wrapper(BooleanType, label, cached)
 
-def select_rule_variable(label=None, options=None):
-    return rule_variable(SelectType, label=label, options=options)
+def select_rule_variable(label=None, options=None, cached=False):
+    return rule_variable(SelectType, label=label, options=options,
+                         cached=cached)
 
-def select_multiple_rule_variable(label=None, options=None):
-    return rule_variable(SelectMultipleType, label=label, options=options)
+def select_multiple_rule_variable(label=None, options=None, cached=False):
+    return rule_variable(SelectMultipleType, label=label, options=options,
+                         cached=cached)
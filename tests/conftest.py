@@ -0,0 +1,17 @@
+import sys
+
+# The asyncio engine uses `async def`, which Python 2 can't parse.
+collect_ignore = []
+if sys.version_info < (3, 5):
+    collect_ignore.append('test_async_engine.py')
+
+# concurrent.futures is Python 3 only, unless the `futures` backport is
+# installed. The concurrent action tests also use threading.Barrier, which
+# the backport doesn't provide.
+try:
+    import concurrent.futures  # noqa: F401
+except ImportError:
+    collect_ignore.extend(['test_concurrent_actions.py', 'test_parallel.py'])
+else:
+    if sys.version_info < (3,):
+        collect_ignore.append('test_concurrent_actions.py')
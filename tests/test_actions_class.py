@@ -51,3 +51,4 @@ class ActionsClassTests(TestCase):
         def some_action(self): pass
 
         self.assertTrue(some_action.is_rule_action)
+        self.assertFalse(some_action.concurrent)
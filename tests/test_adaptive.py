@@ -0,0 +1,175 @@
+from business_rules import compile_rules, run_all
+from business_rules.actions import BaseActions, rule_action
+from business_rules.adaptive import condition_key_for
+from business_rules.variables import (BaseVariables,
+                                      boolean_rule_variable,
+                                      numeric_rule_variable)
+
+import time
+from unittest import TestCase
+
+
+class SomeVariables(BaseVariables):
+
+    def __init__(self, number=0):
+        self.number = number
+        self.evaluated = []
+
+    @numeric_rule_variable
+    def slow(self):
+        self.evaluated.append('slow')
+        return self.number
+
+    @boolean_rule_variable
+    def rarely_true(self):
+        self.evaluated.append('rarely_true')
+        return self.number > 100
+
+    @boolean_rule_variable
+    def usually_true(self):
+        self.evaluated.append('usually_true')
+        return self.number < 100
+
+
+class SomeActions(BaseActions):
+
+    def __init__(self):
+        self.fired = 0
+
+    @rule_action()
+    def fire(self):
+        self.fired += 1
+
+
+SLOW = {'name': 'slow', 'operator': 'greater_than_or_equal_to', 'value': 0}
+RARELY_TRUE = {'name': 'rarely_true', 'operator': 'is_true', 'value': ''}
+USUALLY_TRUE = {'name': 'usually_true', 'operator': 'is_true', 'value': ''}
+
+RULES = [
+    {'conditions': {'all': [SLOW, USUALLY_TRUE, RARELY_TRUE]},
+     'actions': [{'name': 'fire'}]},
+    {'conditions': {'any': [SLOW, RARELY_TRUE, USUALLY_TRUE]},
+     'actions': [{'name': 'fire'}]},
+]
+
+
+class AdaptiveOrderTests(TestCase):
+
+    def _names(self, group):
+        return [child.key for child in group.children]
+
+    def test_not_adaptive_by_default(self):
+        compiled = compile_rules(RULES, SomeVariables, SomeActions)
+        self.assertEqual(compiled.adaptive, None)
+
+    def test_reorders_all_and_any(self):
+        compiled = compile_rules(RULES, SomeVariables, SomeActions,
+                                 adaptive=True)
+        stats = compiled.adaptive.stats
+        stats[condition_key_for(SLOW)].__init__(10, 10, 10.0)
+        stats[condition_key_for(RARELY_TRUE)].__init__(10, 1, 0.1)
+        stats[condition_key_for(USUALLY_TRUE)].__init__(10, 9, 0.1)
+        compiled.adaptive.reorder()
+
+        all_group = compiled.rules[0].conditions
+        any_group = compiled.rules[1].conditions
+        self.assertEqual(self._names(all_group),
+                         [condition_key_for(c)
+                          for c in [RARELY_TRUE, USUALLY_TRUE, SLOW]])
+        self.assertEqual(self._names(any_group),
+                         [condition_key_for(c)
+                          for c in [USUALLY_TRUE, RARELY_TRUE, SLOW]])
+
+        variables = SomeVariables(5)
+        compiled.run(variables, SomeActions())
+        self.assertEqual(variables.evaluated, ['rarely_true', 'usually_true'])
+
+    def test_results_stay_the_same(self):
+        compiled = compile_rules(RULES, SomeVariables, SomeActions,
+                                 adaptive=True)
+        compiled.adaptive.reorder_interval = 3
+        for number in [5, 500, -5, 50, 150, 5, -500]:
+            expected_actions, actions = SomeActions(), SomeActions()
+            expected = run_all(RULES, SomeVariables(number), expected_actions)
+            self.assertEqual(compiled.run(SomeVariables(number), actions),
+                             expected)
+            self.assertEqual(actions.fired, expected_actions.fired)
+        self.assertEqual(compiled.adaptive.runs, 7)
+
+    def test_records_stats(self):
+        compiled = compile_rules(RULES, SomeVariables, SomeActions,
+                                 adaptive=True)
+        compiled.run(SomeVariables(5), SomeActions())
+        stats = compiled.adaptive.stats[condition_key_for(SLOW)]
+        # evaluated once by each rule
+        self.assertEqual(stats.evaluations, 2)
+        self.assertEqual(stats.true_count, 2)
+        self.assertTrue(stats.total_time >= 0)
+
+    def test_export_and_import(self):
+        trained = compile_rules(RULES, SomeVariables, SomeActions,
+                                adaptive=True)
+        stats = trained.adaptive.stats
+        stats[condition_key_for(SLOW)].__init__(10, 10, 10.0)
+        stats[condition_key_for(RARELY_TRUE)].__init__(10, 1, 0.1)
+        stats[condition_key_for(USUALLY_TRUE)].__init__(10, 9, 0.1)
+        exported = trained.adaptive.export_stats()
+        exported['not in this rule set'] = [1, 1, 1.0]
+
+        fresh = compile_rules(RULES, SomeVariables, SomeActions,
+                              adaptive=True)
+        fresh.adaptive.import_stats(exported)
+        self.assertEqual(self._names(fresh.rules[0].conditions)[0],
+                         condition_key_for(RARELY_TRUE))
+        self.assertEqual(
+            fresh.adaptive.export_stats()[condition_key_for(SLOW)],
+            [10, 10, 10.0])
+
+    def test_measures_children_that_were_never_evaluated(self):
+        compiled = compile_rules(RULES, SomeVariables, SomeActions,
+                                 adaptive=True)
+        compiled.adaptive.reorder()
+        # groups that never ran are left alone
+        self.assertEqual(self._names(compiled.rules[0].conditions),
+                         [condition_key_for(c)
+                          for c in [SLOW, USUALLY_TRUE, RARELY_TRUE]])
+        compiled.adaptive.stats[condition_key_for(SLOW)].__init__(1, 1, 9.0)
+        compiled.adaptive.reorder()
+        self.assertEqual(self._names(compiled.rules[0].conditions),
+                         [condition_key_for(c)
+                          for c in [USUALLY_TRUE, RARELY_TRUE, SLOW]])
+
+    def test_child_behind_a_decisive_sibling_gets_reordered(self):
+        class TimedVariables(BaseVariables):
+
+            @boolean_rule_variable
+            def slow_false(self):
+                time.sleep(0.001)
+                return False
+
+            @boolean_rule_variable
+            def fast_false(self):
+                return False
+
+        slow = {'name': 'slow_false', 'operator': 'is_true', 'value': ''}
+        fast = {'name': 'fast_false', 'operator': 'is_true', 'value': ''}
+        compiled = compile_rules([{'conditions': {'all': [slow, fast]},
+                                   'actions': []}],
+                                 TimedVariables, SomeActions, adaptive=True)
+        compiled.adaptive.reorder_interval = 10
+        for _ in range(30):
+            compiled.run(TimedVariables(), SomeActions())
+        self.assertEqual(self._names(compiled.rules[0].conditions),
+                         [condition_key_for(fast), condition_key_for(slow)])
+        self.assertTrue(
+            compiled.adaptive.stats[condition_key_for(fast)].evaluations)
+
+    def test_shared_groups_are_wrapped_once(self):
+        rules = [RULES[0], RULES[0]]
+        compiled = compile_rules(rules, SomeVariables, SomeActions,
+                                 share_conditions=True, adaptive=True)
+        self.assertEqual(len(compiled.adaptive.groups), 1)
+        for number in [5, 500]:
+            self.assertEqual(
+                compiled.run(SomeVariables(number), SomeActions()),
+                run_all(rules, SomeVariables(number), SomeActions()))
@@ -0,0 +1,177 @@
+import asyncio
+
+from business_rules.actions import BaseActions, rule_action
+from business_rules.async_engine import (do_actions_async, fetch_variables,
+                                         run_all_async)
+from business_rules.engine import ActionErrors, get_variable_names
+from business_rules.fields import FIELD_TEXT
+from business_rules.variables import (BaseVariables,
+                                      numeric_rule_variable,
+                                      string_rule_variable)
+
+from unittest import TestCase
+
+
+class AsyncVariables(BaseVariables):
+
+    def __init__(self):
+        self.calls = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def _lookup(self, name, value):
+        self.calls.append(name)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        return value
+
+    @numeric_rule_variable
+    async def balance(self):
+        return await self._lookup('balance', 100)
+
+    @string_rule_variable
+    async def country(self):
+        return await self._lookup('country', 'US')
+
+    @numeric_rule_variable(cached=True)
+    async def score(self):
+        return await self._lookup('score', 7)
+
+    @string_rule_variable
+    def name(self):
+        self.calls.append('name')
+        return 'bob'
+
+
+class AsyncActions(BaseActions):
+
+    def __init__(self):
+        self.log = []
+
+    @rule_action(params={'message': FIELD_TEXT})
+    async def notify(self, message):
+        await asyncio.sleep(0)
+        self.log.append(('notify', message))
+
+    @rule_action(params={'message': FIELD_TEXT})
+    def record(self, message):
+        self.log.append(('record', message))
+
+
+RULES = [
+    {'conditions': {'all': [
+        {'name': 'balance', 'operator': 'greater_than', 'value': 50},
+        {'name': 'country', 'operator': 'equal_to', 'value': 'US'}]},
+     'actions': [{'name': 'notify', 'params': {'message': 'rich'}},
+                 {'name': 'record', 'params': {'message': 'rich'}}]},
+    {'conditions': {'any': [
+        {'name': 'score', 'operator': 'less_than', 'value': 5},
+        {'name': 'name', 'operator': 'equal_to', 'value': 'bob'}]},
+     'actions': [{'name': 'record', 'params': {'message': 'bob'}}]},
+]
+
+
+def run(coroutine):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+class RunAllAsyncTests(TestCase):
+
+    def test_runs_rules_and_actions_in_order(self):
+        variables, actions = AsyncVariables(), AsyncActions()
+        self.assertTrue(run(run_all_async(RULES, variables, actions)))
+        self.assertEqual(actions.log, [('notify', 'rich'), ('record', 'rich'),
+                                       ('record', 'bob')])
+
+    def test_fetches_async_variables_concurrently(self):
+        variables = AsyncVariables()
+        run(run_all_async(RULES, variables, AsyncActions()))
+        self.assertEqual(variables.max_in_flight, 3)
+        self.assertEqual(sorted(variables.calls),
+                         ['balance', 'country', 'name', 'score'])
+
+    def test_bounded_concurrency(self):
+        variables = AsyncVariables()
+        run(run_all_async(RULES, variables, AsyncActions(),
+                          max_concurrency=1))
+        self.assertEqual(variables.max_in_flight, 1)
+
+    def test_sync_variables_still_short_circuit(self):
+        rules = [{'conditions': {'all': [
+            {'name': 'balance', 'operator': 'less_than', 'value': 50},
+            {'name': 'name', 'operator': 'equal_to', 'value': 'bob'}]},
+            'actions': []}]
+        variables = AsyncVariables()
+        self.assertFalse(run(run_all_async(rules, variables, AsyncActions())))
+        self.assertEqual(variables.calls, ['balance'])
+
+    def test_stop_on_first_trigger(self):
+        actions = AsyncActions()
+        self.assertTrue(run(run_all_async(RULES, AsyncVariables(), actions,
+                                          stop_on_first_trigger=True)))
+        self.assertEqual(actions.log, [('notify', 'rich'), ('record', 'rich')])
+
+    def test_unknown_variable(self):
+        rules = [{'conditions': {'name': 'nope', 'operator': 'equal_to',
+                                 'value': 1},
+                  'actions': []}]
+        err_string = 'Variable nope is not defined in class AsyncVariables'
+        with self.assertRaisesRegex(AssertionError, err_string):
+            run(run_all_async(rules, AsyncVariables(), AsyncActions()))
+
+    def test_concurrent_async_actions(self):
+        class ConcurrentActions(AsyncActions):
+
+            @rule_action(params={'message': FIELD_TEXT}, concurrent=True)
+            async def notify(self, message):
+                self.log.append(('started', message))
+                await asyncio.sleep(0.01)
+                self.log.append(('notify', message))
+
+        actions = ConcurrentActions()
+        run(run_all_async(RULES[:1], AsyncVariables(), actions))
+        # record doesn't wait for notify to finish
+        self.assertEqual(actions.log, [('record', 'rich'), ('started', 'rich'),
+                                       ('notify', 'rich')])
+
+    def test_concurrent_async_action_errors(self):
+        class FailingActions(AsyncActions):
+
+            @rule_action(params={'message': FIELD_TEXT}, concurrent=True)
+            async def notify(self, message):
+                raise ValueError(message)
+
+            @rule_action(params={'message': FIELD_TEXT})
+            def record(self, message):
+                raise KeyError(message)
+
+        with self.assertRaises(ActionErrors) as context:
+            run(run_all_async(RULES[:1], AsyncVariables(), FailingActions()))
+        self.assertEqual([type(error) for error in context.exception.errors],
+                         [KeyError, ValueError])
+        with self.assertRaisesRegex(ValueError, 'rich'):
+            run(do_actions_async(RULES[0]['actions'][:1], FailingActions()))
+
+    def test_unknown_action(self):
+        rules = [{'conditions': {'name': 'name', 'operator': 'equal_to',
+                                 'value': 'bob'},
+                  'actions': [{'name': 'nope'}]}]
+        err_string = 'Action nope is not defined in class AsyncActions'
+        with self.assertRaisesRegex(AssertionError, err_string):
+            run(run_all_async(rules, AsyncVariables(), AsyncActions()))
+
+    def test_fetch_variables(self):
+        variables = AsyncVariables()
+        values = run(fetch_variables(variables,
+                                     set(['balance', 'name', 'nope'])))
+        self.assertEqual(values, {'balance': 100})
+
+    def test_get_variable_names(self):
+        self.assertEqual(get_variable_names(RULES[0]['conditions']),
+                         set(['balance', 'country']))
@@ -0,0 +1,106 @@
+from business_rules import run_all_batch
+from business_rules.engine import check_conditions_recursively
+from business_rules.operators import NumericType
+from business_rules.variables import (BaseVariables,
+                                      boolean_rule_variable,
+                                      numeric_rule_variable,
+                                      rule_variable,
+                                      string_rule_variable)
+
+from array import array
+from unittest import TestCase
+
+
+class RowVariables(BaseVariables):
+
+    def __init__(self, row):
+        self.row = row
+
+    @numeric_rule_variable
+    def amount(self):
+        return self.row['amount']
+
+    @string_rule_variable
+    def country(self):
+        return self.row['country']
+
+    @boolean_rule_variable
+    def verified(self):
+        return self.row['verified']
+
+
+RULES = [
+    {'conditions': {'all': [
+        {'name': 'amount', 'operator': 'greater_than', 'value': 100},
+        {'name': 'verified', 'operator': 'is_false', 'value': ''}]},
+     'actions': []},
+    {'conditions': {'any': [
+        {'name': 'country', 'operator': 'equal_to', 'value': 'US'},
+        {'all': [
+            {'name': 'amount', 'operator': 'less_than_or_equal_to',
+             'value': 10.5},
+            {'name': 'country', 'operator': 'starts_with', 'value': 'C'}]}]},
+     'actions': []},
+    {'conditions': {'name': 'verified', 'operator': 'is_true', 'value': ''},
+     'actions': []},
+]
+
+COLUMNS = {
+    'amount': [150, 5, 10.5, 200.25, 99],
+    'country': ['US', 'CA', 'CH', 'FR', 'US'],
+    'verified': [False, True, False, True, False],
+}
+
+
+class RunAllBatchTests(TestCase):
+
+    def _expected(self, columns):
+        rows = [dict((name, columns[name][i]) for name in columns)
+                for i in range(len(columns['amount']))]
+        return [[index for index, rule in enumerate(RULES)
+                 if check_conditions_recursively(rule['conditions'],
+                                                 RowVariables(row))]
+                for row in rows]
+
+    def test_matches_row_by_row_evaluation(self):
+        self.assertEqual(run_all_batch(RULES, RowVariables, COLUMNS),
+                         self._expected(COLUMNS))
+        self.assertEqual(run_all_batch(RULES, RowVariables, COLUMNS),
+                         [[0, 1], [1, 2], [1], [2], [1]])
+
+    def test_accepts_arrays(self):
+        columns = dict(COLUMNS, amount=array('d', COLUMNS['amount']))
+        self.assertEqual(run_all_batch(RULES, RowVariables, columns),
+                         self._expected(COLUMNS))
+
+    def test_casts_each_value_at_most_once(self):
+        casts = []
+
+        class CountingType(NumericType):
+            @staticmethod
+            def _assert_valid_value_and_cast(value):
+                casts.append(value)
+                return NumericType._assert_valid_value_and_cast(value)
+
+        class CountingVariables(RowVariables):
+            @rule_variable(CountingType)
+            def amount(self):
+                pass
+
+        run_all_batch(RULES, CountingVariables, COLUMNS)
+        # plus the two rule constants, cast when the rules are compiled
+        self.assertEqual(sorted(casts), sorted(COLUMNS['amount'] + [100, 10.5]))
+
+    def test_empty_columns(self):
+        self.assertEqual(run_all_batch(RULES, RowVariables, {}), [])
+
+    def test_missing_column(self):
+        err_string = "No column given for variable verified of class " \
+            "RowVariables"
+        with self.assertRaisesRegex(AssertionError, err_string):
+            run_all_batch(RULES[2:], RowVariables, {'amount': [1]})
+
+    def test_mismatched_column_lengths(self):
+        with self.assertRaisesRegex(AssertionError, "same length"):
+            run_all_batch(RULES, RowVariables,
+                          {'amount': [1, 2], 'verified': [True]})
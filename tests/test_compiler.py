@@ -0,0 +1,483 @@
+from business_rules import compile_rules, run_all
+from business_rules.actions import BaseActions, rule_action
+from business_rules.compiler import (CompiledAll, CompiledAny,
+                                     CompiledCondition, IndexedCondition,
+                                     SharedCondition)
+from business_rules.fields import FIELD_NUMERIC, FIELD_TEXT
+from business_rules.operators import (REGEX_TYPE, NativeNumericType,
+                                      NumericType, StringType)
+from business_rules.variables import (BaseVariables,
+                                      boolean_rule_variable,
+                                      numeric_rule_variable,
+                                      string_rule_variable)
+
+from decimal import Decimal
+from mock import MagicMock
+from unittest import TestCase
+
+
+class SomeVariables(BaseVariables):
+
+    def __init__(self, number=10, word="hello"):
+        self.number = number
+        self.word = word
+
+    @numeric_rule_variable
+    def num(self):
+        return self.number
+
+    @string_rule_variable
+    def text(self):
+        return self.word
+
+    @boolean_rule_variable
+    def flag(self):
+        return True
+
+
+class SomeActions(BaseActions):
+
+    def __init__(self):
+        self.calls = []
+
+    @rule_action(params={'amount': FIELD_NUMERIC})
+    def record(self, amount):
+        self.calls.append(('record', amount))
+
+    @rule_action(params={'message': FIELD_TEXT})
+    def say(self, message):
+        self.calls.append(('say', message))
+
+
+RULES = [
+    {'conditions': {'all': [
+        {'name': 'num', 'operator': 'greater_than', 'value': 5.5},
+        {'name': 'text', 'operator': 'starts_with', 'value': 'he'}]},
+     'actions': [{'name': 'record', 'params': {'amount': 1}}]},
+    {'conditions': {'any': [
+        {'name': 'num', 'operator': 'less_than', 'value': 3},
+        {'name': 'flag', 'operator': 'is_false', 'value': ''}]},
+     'actions': [{'name': 'say', 'params': {'message': 'low'}}]},
+    {'conditions': {'name': 'flag', 'operator': 'is_true', 'value': ''},
+     'actions': [{'name': 'say', 'params': {'message': 'flag'}}]},
+]
+
+
+class CompileRulesTests(TestCase):
+
+    def test_compiles_condition_tree(self):
+        compiled = compile_rules(RULES, SomeVariables, SomeActions)
+        self.assertEqual(len(compiled.rules), 3)
+        self.assertTrue(isinstance(compiled.rules[0].conditions, CompiledAll))
+        self.assertTrue(isinstance(compiled.rules[1].conditions, CompiledAny))
+        self.assertTrue(isinstance(compiled.rules[2].conditions,
+                                   CompiledCondition))
+
+    def test_casts_constants_once(self):
+        compiled = compile_rules(RULES, SomeVariables, SomeActions)
+        condition = compiled.rules[0].conditions.children[0]
+        self.assertTrue(isinstance(condition.value, Decimal))
+        self.assertEqual(condition.value, Decimal('5.5'))
+
+    def test_same_results_as_run_all(self):
+        compiled = compile_rules(RULES, SomeVariables, SomeActions)
+        for number, word in [(10, 'hello'), (1, 'hello'), (10, 'bye'),
+                             (5.5, 'he')]:
+            expected_actions, actions = SomeActions(), SomeActions()
+            expected = run_all(RULES, SomeVariables(number, word),
+                               expected_actions)
+            result = compiled.run(SomeVariables(number, word), actions)
+            self.assertEqual(result, expected)
+            self.assertEqual(actions.calls, expected_actions.calls)
+
+    def test_stop_on_first_trigger(self):
+        compiled = compile_rules(RULES, SomeVariables, SomeActions)
+        actions = SomeActions()
+        self.assertTrue(compiled.run(SomeVariables(), actions,
+                                     stop_on_first_trigger=True))
+        self.assertEqual(actions.calls, [('record', 1)])
+
+    def test_no_rule_triggered(self):
+        rules = [{'conditions': {'name': 'flag', 'operator': 'is_false',
+                                 'value': ''},
+                  'actions': [{'name': 'say'}]}]
+        compiled = compile_rules(rules, SomeVariables, SomeActions)
+        self.assertFalse(compiled.run(SomeVariables(), SomeActions()))
+
+    def test_does_not_recast_variable_per_call(self):
+        compiled = compile_rules(RULES[:1], SomeVariables, SomeActions)
+        variables = SomeVariables()
+        variables.num = MagicMock(return_value=10)
+        compiled.run(variables, SomeActions())
+        variables.num.assert_called_once_with()
+
+    def test_unknown_variable(self):
+        rules = [{'conditions': {'name': 'nope', 'operator': 'equal_to',
+                                 'value': 1},
+                  'actions': []}]
+        err_string = 'Variable nope is not defined in class SomeVariables'
+        with self.assertRaisesRegex(AssertionError, err_string):
+            compile_rules(rules, SomeVariables, SomeActions)
+
+    def test_unknown_operator(self):
+        rules = [{'conditions': {'name': 'num', 'operator': 'bigger',
+                                 'value': 1},
+                  'actions': []}]
+        err_string = 'Operator bigger does not exist for type NumericType'
+        with self.assertRaisesRegex(AssertionError, err_string):
+            compile_rules(rules, SomeVariables, SomeActions)
+
+    def test_invalid_constant(self):
+        rules = [{'conditions': {'name': 'num', 'operator': 'equal_to',
+                                 'value': 'ten'},
+                  'actions': []}]
+        with self.assertRaisesRegex(AssertionError,
+                                    'ten is not a valid numeric type'):
+            compile_rules(rules, SomeVariables, SomeActions)
+
+    def test_unknown_action(self):
+        rules = [{'conditions': {'name': 'flag', 'operator': 'is_true',
+                                 'value': ''},
+                  'actions': [{'name': 'explode'}]}]
+        err_string = 'Action explode is not defined in class SomeActions'
+        with self.assertRaisesRegex(AssertionError, err_string):
+            compile_rules(rules, SomeVariables, SomeActions)
+
+    def test_empty_and_mixed_condition_groups(self):
+        for conditions in [{'all': []}, {'any': []},
+                           {'all': [], 'any': []}]:
+            with self.assertRaises(AssertionError):
+                compile_rules([{'conditions': conditions, 'actions': []}],
+                              SomeVariables, SomeActions)
+
+    def test_cached_variables(self):
+        class CachedVariables(SomeVariables):
+            calls = 0
+
+            @numeric_rule_variable(cached=True)
+            def num(self):
+                CachedVariables.calls += 1
+                return self.number
+
+        compiled = compile_rules(RULES, CachedVariables, SomeActions)
+        variables = CachedVariables()
+        compiled.run(variables, SomeActions())
+        self.assertEqual(CachedVariables.calls, 1)
+        self.assertEqual(variables._rule_variable_cache, None)
+
+
+class SharedConditionTests(TestCase):
+
+    def _rules(self):
+        leaf = {'name': 'num', 'operator': 'greater_than', 'value': 5}
+        group = {'any': [{'name': 'text', 'operator': 'equal_to',
+                          'value': 'hello'},
+                         {'name': 'flag', 'operator': 'is_false',
+                          'value': ''}]}
+        return [
+            {'conditions': {'all': [dict(leaf), dict(group)]},
+             'actions': [{'name': 'record', 'params': {'amount': 1}}]},
+            {'conditions': {'all': [dict(group), dict(leaf)]},
+             'actions': [{'name': 'record', 'params': {'amount': 2}}]},
+            {'conditions': dict(leaf),
+             'actions': [{'name': 'record', 'params': {'amount': 3}}]},
+            {'conditions': {'name': 'num', 'operator': 'greater_than',
+                            'value': 5.0},
+             'actions': [{'name': 'record', 'params': {'amount': 4}}]},
+        ]
+
+    def test_identical_nodes_are_shared(self):
+        compiled = compile_rules(self._rules(), SomeVariables, SomeActions,
+                                 share_conditions=True)
+        first, second, third, fourth = [rule.conditions
+                                        for rule in compiled.rules]
+        self.assertTrue(isinstance(third, SharedCondition))
+        self.assertTrue(first.children[0] is third)
+        self.assertTrue(second.children[1] is third)
+        self.assertTrue(first.children[1] is second.children[0])
+        # a different constant type is a different node
+        self.assertFalse(fourth is third)
+        self.assertFalse(isinstance(fourth, SharedCondition))
+
+    def test_shared_nodes_evaluated_once_per_run(self):
+        class CountingVariables(SomeVariables):
+            calls = 0
+
+            @numeric_rule_variable
+            def num(self):
+                CountingVariables.calls += 1
+                return self.number
+
+        rules = self._rules()[:3]
+        compiled = compile_rules(rules, CountingVariables, SomeActions,
+                                 share_conditions=True)
+        actions = SomeActions()
+        self.assertTrue(compiled.run(CountingVariables(), actions))
+        self.assertEqual(CountingVariables.calls, 1)
+        self.assertEqual(actions.calls,
+                         [('record', 1), ('record', 2), ('record', 3)])
+
+        # and again on the next run
+        compiled.run(CountingVariables(), SomeActions())
+        self.assertEqual(CountingVariables.calls, 2)
+
+    def test_same_results_as_run_all(self):
+        rules = self._rules()
+        compiled = compile_rules(rules, SomeVariables, SomeActions,
+                                 share_conditions=True)
+        for number, word in [(10, 'hello'), (1, 'hello'), (10, 'bye')]:
+            expected_actions, actions = SomeActions(), SomeActions()
+            expected = run_all(rules, SomeVariables(number, word),
+                               expected_actions)
+            self.assertEqual(compiled.run(SomeVariables(number, word),
+                                          actions), expected)
+            self.assertEqual(actions.calls, expected_actions.calls)
+
+    def test_shared_node_outside_run(self):
+        compiled = compile_rules(self._rules(), SomeVariables, SomeActions,
+                                 share_conditions=True)
+        self.assertTrue(compiled.rules[2].conditions.check(SomeVariables()))
+
+    def test_regexes_are_compiled_at_load_time(self):
+        rules = [{'conditions': {'name': 'text', 'operator': 'matches_regex',
+                                 'value': '^he'},
+                  'actions': []}]
+        compiled = compile_rules(rules, SomeVariables, SomeActions)
+        self.assertTrue(isinstance(compiled.rules[0].conditions.value,
+                                   REGEX_TYPE))
+        self.assertTrue(compiled.run(SomeVariables(), SomeActions()))
+        self.assertFalse(compiled.run(SomeVariables(word='bye'),
+                                      SomeActions()))
+
+    def test_regexes_on_same_variable_are_combined(self):
+        patterns = ['^he', 'lo$', '^z', '^(l)\\1', '^b(?=y)', 'l']
+        rules = [{'conditions': {'name': 'text', 'operator': 'matches_regex',
+                                 'value': pattern},
+                  'actions': [{'name': 'say', 'params': {'message': pattern}}]}
+                 for pattern in patterns]
+        compiled = compile_rules(rules, SomeVariables, SomeActions,
+                                 share_conditions=True)
+        funcs = [rule.conditions.operator_func for rule in compiled.rules]
+        # unanchored patterns and the one with a group of its own are
+        # left alone
+        plain = StringType.matches_regex.value_function
+        for index in [1, 3, 5]:
+            self.assertTrue(funcs[index].__func__ is plain)
+        for index in [0, 2, 4]:
+            self.assertFalse(getattr(funcs[index], '__func__', None) is plain)
+
+        for word in ['hello', 'bye', 'zoo', '']:
+            expected_actions, actions = SomeActions(), SomeActions()
+            run_all(rules, SomeVariables(word=word), expected_actions)
+            compiled.run(SomeVariables(word=word), actions)
+            self.assertEqual(actions.calls, expected_actions.calls)
+
+    def _threshold_rules(self):
+        operators = ['equal_to', 'greater_than', 'greater_than_or_equal_to',
+                     'less_than', 'less_than_or_equal_to']
+        thresholds = [1, 2, 3, 5, 5.000001, 5.0000005, 4.999999, 8, 9, 10]
+        rules = [{'conditions': {'name': 'num', 'operator': operator,
+                                 'value': threshold},
+                  'actions': []}
+                 for threshold in thresholds for operator in operators]
+        rules.append({'conditions': {'all': [
+            {'name': 'num', 'operator': 'less_than', 'value': 9},
+            {'name': 'text', 'operator': 'starts_with', 'value': 'he'}]},
+            'actions': []})
+        return rules
+
+    def test_numeric_thresholds_are_indexed(self):
+        rules = self._threshold_rules()
+        compiled = compile_rules(rules, SomeVariables, SomeActions,
+                                 share_conditions=True)
+        self.assertTrue(isinstance(compiled.rules[0].conditions,
+                                   IndexedCondition))
+        last = compiled.rules[-1].conditions.children[0]
+        self.assertTrue(isinstance(getattr(last, 'node', last),
+                                   IndexedCondition))
+        # epsilon semantics are those of NumericType
+        for number in [0, 1, 4.999999, 4.9999995, 5, 5.0000005, 5.000001,
+                       5.000002, 7, 9.0000001, 11, Decimal('5.000001')]:
+            self.assertEqual(
+                compiled.evaluate(SomeVariables(number), None),
+                [index for index, rule in enumerate(rules)
+                 if run_all([rule], SomeVariables(number), SomeActions())])
+
+    def test_native_thresholds_are_indexed(self):
+        class NativeVariables(SomeVariables):
+            @numeric_rule_variable(native=True)
+            def num(self):
+                return self.number
+
+        rules = self._threshold_rules()
+        compiled = compile_rules(rules, NativeVariables, SomeActions,
+                                 share_conditions=True)
+        plain = compile_rules(rules, NativeVariables, SomeActions)
+        for number in [0, 4.9999995, 5, 5.000001, 9.0000001, float('nan')]:
+            self.assertEqual(compiled.evaluate(NativeVariables(number), None),
+                             plain.evaluate(NativeVariables(number), None))
+
+    def test_nan_thresholds_are_not_indexed(self):
+        class NativeVariables(SomeVariables):
+            @numeric_rule_variable(native=True)
+            def num(self):
+                return self.number
+
+        def rules(nan):
+            return [{'conditions': {'name': 'num', 'operator': 'greater_than',
+                                    'value': threshold},
+                     'actions': []}
+                    for threshold in [1, 2, 3, nan, 4, 5, 6, 7, 8]]
+
+        nan_rules = rules(float('nan'))
+        compiled = compile_rules(nan_rules, NativeVariables, SomeActions,
+                                 share_conditions=True)
+        self.assertTrue(isinstance(compiled.rules[0].conditions,
+                                   IndexedCondition))
+        self.assertTrue(isinstance(compiled.rules[3].conditions,
+                                   CompiledCondition))
+        self.assertEqual(compiled.evaluate(NativeVariables(4.5), None),
+                         [0, 1, 2, 4])
+        self.assertEqual(
+            compiled.evaluate(NativeVariables(4.5), None),
+            [index for index, rule in enumerate(nan_rules)
+             if run_all([rule], NativeVariables(4.5), SomeActions())])
+
+        # Sorting Decimal NaNs raises
+        compiled = compile_rules(rules(Decimal('NaN')), SomeVariables,
+                                 SomeActions, share_conditions=True)
+        self.assertTrue(isinstance(compiled.rules[3].conditions,
+                                   CompiledCondition))
+        self.assertTrue(isinstance(compiled.rules[4].conditions,
+                                   IndexedCondition))
+
+    def test_indexed_variable_read_once_per_run(self):
+        class CountingVariables(SomeVariables):
+            calls = 0
+
+            @numeric_rule_variable
+            def num(self):
+                CountingVariables.calls += 1
+                return self.number
+
+        compiled = compile_rules(self._threshold_rules(), CountingVariables,
+                                 SomeActions, share_conditions=True)
+        compiled.evaluate(CountingVariables(5), None)
+        self.assertEqual(CountingVariables.calls, 1)
+        condition = compiled.rules[3].conditions  # num less_than 1
+        self.assertFalse(condition.check(CountingVariables(5)))
+        self.assertEqual(CountingVariables.calls, 2)
+        trace = compiled.explain(CountingVariables(5))
+        self.assertEqual(trace.triggered,
+                         compiled.evaluate(CountingVariables(5), None))
+
+    def test_few_thresholds_are_not_indexed(self):
+        compiled = compile_rules(RULES, SomeVariables, SomeActions,
+                                 share_conditions=True)
+        self.assertTrue(isinstance(compiled.rules[0].conditions.children[0],
+                                   CompiledCondition))
+
+    def test_native_numbers_precast_at_load_time(self):
+        class NativeVariables(SomeVariables):
+            @numeric_rule_variable(native=True)
+            def num(self):
+                return self.number
+
+        compiled = compile_rules(RULES, NativeVariables, SomeActions)
+        condition = compiled.rules[0].conditions.children[0]
+        self.assertEqual(condition.field_type, NativeNumericType)
+        self.assertTrue(type(condition.value) is float)
+        for number in [10, 5.5, 5.500001, Decimal('5.6')]:
+            self.assertEqual(
+                compiled.run(NativeVariables(number), SomeActions()),
+                run_all(RULES, SomeVariables(number), SomeActions()))
+
+    def test_global_native_numbers(self):
+        NumericType.native_numbers = True
+        try:
+            compiled = compile_rules(RULES, SomeVariables, SomeActions)
+        finally:
+            NumericType.native_numbers = False
+        condition = compiled.rules[0].conditions.children[0]
+        self.assertEqual(condition.field_type, NativeNumericType)
+
+    def test_evaluate_returns_triggered_rules(self):
+        compiled = compile_rules(RULES, SomeVariables, SomeActions)
+        self.assertEqual(compiled.evaluate(SomeVariables(), SomeActions()),
+                         [0, 2])
+        self.assertEqual(compiled.evaluate(SomeVariables(1), SomeActions()),
+                         [1, 2])
+        self.assertEqual(compiled.evaluate(SomeVariables(), SomeActions(),
+                                           stop_on_first_trigger=True), [0])
+
+
+class ExplainTests(TestCase):
+
+    def _decided_by(self, rule_trace):
+        return [(c.name, c.operator, c.result) for c in rule_trace.decided_by]
+
+    def test_explain(self):
+        compiled = compile_rules(RULES, SomeVariables, SomeActions)
+        actions = SomeActions()
+        trace = compiled.explain(SomeVariables(), actions)
+        self.assertEqual(trace.triggered, [0, 2])
+        self.assertEqual(actions.calls, [('record', 1), ('say', 'flag')])
+        self.assertEqual([r.triggered for r in trace.rules],
+                         [True, False, True])
+        # every condition of a true `all`, every child of a false `any`
+        self.assertEqual(self._decided_by(trace.rules[0]),
+                         [('num', 'greater_than', True),
+                          ('text', 'starts_with', True)])
+        self.assertEqual(self._decided_by(trace.rules[1]),
+                         [('num', 'less_than', False),
+                          ('flag', 'is_false', False)])
+        self.assertEqual(trace.variables,
+                         {'num': Decimal(10), 'text': 'hello', 'flag': True})
+
+    def test_explain_short_circuits(self):
+        compiled = compile_rules(RULES, SomeVariables, None)
+        trace = compiled.explain(SomeVariables(number=1, word='bye'))
+        # the first false child of an `all`, the first true child of an `any`
+        self.assertEqual(self._decided_by(trace.rules[0]),
+                         [('num', 'greater_than', False)])
+        self.assertEqual(self._decided_by(trace.rules[1]),
+                         [('num', 'less_than', True)])
+        self.assertTrue('text' not in trace.variables)
+
+        trace = compiled.explain(SomeVariables(number=1), None,
+                                 stop_on_first_trigger=True)
+        self.assertEqual(trace.triggered, [1])
+        self.assertEqual(len(trace.rules), 2)
+
+    def test_explain_shared_and_adaptive(self):
+        rules = RULES + [RULES[0]]
+        for options in [{'share_conditions': True}, {'adaptive': True}]:
+            compiled = compile_rules(rules, SomeVariables, None, **options)
+            trace = compiled.explain(SomeVariables())
+            self.assertEqual(trace.triggered, [0, 2, 3])
+            self.assertEqual(self._decided_by(trace.rules[3]),
+                             self._decided_by(trace.rules[0]))
+
+    def test_trace_to_dict(self):
+        compiled = compile_rules(RULES[2:], SomeVariables, None)
+        self.assertEqual(compiled.explain(SomeVariables()).to_dict(), {
+            'triggered': [0],
+            'rules': [{'index': 0, 'triggered': True, 'decided_by': [
+                {'name': 'flag', 'operator': 'is_true', 'value': '',
+                 'result': True}]}],
+            'variables': {'flag': True}})
+
+    def test_trace_sampling(self):
+        compiled = compile_rules(RULES, SomeVariables, SomeActions)
+        traces = []
+        compiled.trace_handler = traces.append
+        self.assertEqual(compiled.evaluate(SomeVariables(), SomeActions()),
+                         [0, 2])
+        self.assertEqual(traces, [])
+
+        compiled.trace_rate = 1.0
+        actions = SomeActions()
+        self.assertEqual(compiled.evaluate(SomeVariables(), actions), [0, 2])
+        self.assertEqual(actions.calls, [('record', 1), ('say', 'flag')])
+        self.assertEqual(len(traces), 1)
+        self.assertEqual(traces[0].triggered, [0, 2])
@@ -0,0 +1,131 @@
+from business_rules import compile_rules, engine
+from business_rules.actions import BaseActions, rule_action
+from business_rules.fields import FIELD_TEXT
+from business_rules.variables import BaseVariables, boolean_rule_variable
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from mock import patch
+from unittest import TestCase
+
+
+class ConcurrentActions(BaseActions):
+
+    def __init__(self):
+        self.log = []
+        self.barrier = threading.Barrier(2, timeout=5)
+
+    @rule_action(concurrent=True)
+    def webhook(self):
+        self.barrier.wait()
+        self.log.append('webhook')
+
+    @rule_action(concurrent=True)
+    def notify(self):
+        self.barrier.wait()
+        self.log.append('notify')
+
+    @rule_action()
+    def first(self):
+        self.log.append('first')
+
+    @rule_action()
+    def second(self):
+        self.log.append('second')
+
+    @rule_action(concurrent=True)
+    def broken(self):
+        raise ValueError('webhook down')
+
+    @rule_action()
+    def failing(self):
+        raise KeyError('db')
+
+
+class ConcurrentActionTests(TestCase):
+
+    def _do(self, *names):
+        actions = ConcurrentActions()
+        engine.do_actions([{'name': name} for name in names], actions)
+        return actions.log
+
+    def test_concurrent_actions_run_together(self):
+        # Each concurrent action waits for the other at the barrier, so
+        # running them one after another would time out.
+        log = self._do('first', 'webhook', 'second', 'notify')
+        self.assertEqual(log[:2], ['first', 'second'])
+        self.assertEqual(sorted(log[2:]), ['notify', 'webhook'])
+
+    def test_single_error_is_raised_as_is(self):
+        with self.assertRaisesRegex(ValueError, 'webhook down'):
+            self._do('broken', 'first')
+
+    def test_errors_are_raised_together(self):
+        actions = ConcurrentActions()
+        with self.assertRaises(engine.ActionErrors) as context:
+            engine.do_actions([{'name': 'broken'}, {'name': 'failing'},
+                               {'name': 'second'}], actions)
+        errors = context.exception.errors
+        self.assertEqual([type(error) for error in errors],
+                         [KeyError, ValueError])
+        self.assertIn('2 actions failed', str(context.exception))
+        # Nothing starts after a sequential action fails
+        self.assertEqual(actions.log, [])
+
+    def test_set_action_executor(self):
+        executor = ThreadPoolExecutor(2)
+        try:
+            previous = engine.set_action_executor(executor)
+            with patch.object(executor, 'submit',
+                              wraps=executor.submit) as submit:
+                self._do('webhook', 'notify')
+            self.assertEqual(submit.call_count, 2)
+        finally:
+            engine.set_action_executor(previous)
+            executor.shutdown()
+
+
+class FlagVariables(BaseVariables):
+
+    @boolean_rule_variable
+    def flag(self):
+        return True
+
+
+class MessageActions(BaseActions):
+
+    def __init__(self):
+        self.calls = []
+
+    @rule_action(params={'message': FIELD_TEXT})
+    def record(self, message):
+        self.calls.append(('record', message))
+
+    @rule_action(params={'message': FIELD_TEXT}, concurrent=True)
+    def say(self, message):
+        self.calls.append(('say', message))
+
+
+class CompiledConcurrentActionTests(TestCase):
+
+    def test_concurrent_actions(self):
+        rules = [
+            {'conditions': {'name': 'flag', 'operator': 'is_true',
+                            'value': ''},
+             'actions': [{'name': 'record', 'params': {'message': 'a'}}]},
+            {'conditions': {'name': 'flag', 'operator': 'is_true',
+                            'value': ''},
+             'actions': [{'name': 'say', 'params': {'message': 'flag'}}]},
+        ]
+        compiled = compile_rules(rules, FlagVariables, MessageActions)
+        self.assertTrue(compiled.rules[1].concurrent)
+        self.assertFalse(compiled.rules[0].concurrent)
+        actions = MessageActions()
+        with patch('business_rules.compiler.run_action_calls') as run_calls:
+            compiled.run(FlagVariables(), actions)
+        run_calls.assert_called_once_with(
+            [('say', actions.say, {'message': 'flag'})])
+        compiled.run(FlagVariables(), actions)
+        self.assertEqual(actions.calls, [('record', 'a'), ('record', 'a'),
+                                         ('say', 'flag')])
@@ -0,0 +1,180 @@
+from business_rules import compile_rules, run_all
+from business_rules.actions import BaseActions, rule_action
+from business_rules.deferred import ActionBatcher, BatchedCall, actions_class
+from business_rules.fields import FIELD_NUMERIC
+from business_rules.stream import iter_evaluate
+from business_rules.variables import BaseVariables, numeric_rule_variable
+
+from unittest import TestCase
+from mock import patch
+
+
+class SomeVariables(BaseVariables):
+
+    def __init__(self, number):
+        self.number = number
+
+    @numeric_rule_variable
+    def num(self):
+        return self.number
+
+
+class SomeActions(BaseActions):
+
+    def __init__(self, log, key=None):
+        self.log = log
+        self.key = key
+
+    @rule_action(params={'amount': FIELD_NUMERIC},
+                 batch_handler='put_on_sale_bulk')
+    def put_on_sale(self, amount):
+        self.log.append(('single', self.key, amount))
+
+    def put_on_sale_bulk(self, calls):
+        self.log.append(('bulk', [(call.actions.key, call.params['amount'])
+                                  for call in calls]))
+
+    @rule_action(batch_handler='notify_bulk')
+    def notify(self):
+        self.log.append(('single notify', self.key))
+
+    def notify_bulk(self, calls):
+        self.log.append(('bulk notify', [call.actions.key
+                                         for call in calls]))
+
+    @rule_action()
+    def log_now(self):
+        self.log.append(('now', self.key))
+
+
+RULES = [
+    {'conditions': {'name': 'num', 'operator': 'greater_than', 'value': 5},
+     'actions': [{'name': 'notify'},
+                 {'name': 'put_on_sale', 'params': {'amount': 10}},
+                 {'name': 'log_now'}]},
+    {'conditions': {'name': 'num', 'operator': 'greater_than', 'value': 8},
+     'actions': [{'name': 'put_on_sale', 'params': {'amount': 20}}]},
+]
+
+
+class ActionBatcherTests(TestCase):
+
+    def test_run_all_queues_batched_actions_until_flush(self):
+        log = []
+        with ActionBatcher() as batcher:
+            for key, number in [('a', 9), ('b', 1), ('c', 6)]:
+                run_all(RULES, SomeVariables(number),
+                        batcher.wrap(SomeActions(log, key)))
+            self.assertEqual(log, [('now', 'a'), ('now', 'c')])
+            self.assertEqual(batcher.pending, 5)
+        self.assertEqual(batcher.pending, 0)
+        # Groups flush in the order of their first call, each call in order
+        self.assertEqual(log[2:], [
+            ('bulk notify', ['a', 'c']),
+            ('bulk', [('a', 10), ('a', 20), ('c', 10)]),
+        ])
+
+    def test_compiled_rule_set_with_batcher(self):
+        log = []
+        compiled = compile_rules(RULES, SomeVariables, SomeActions)
+        batcher = ActionBatcher()
+        compiled.run(SomeVariables(9), batcher.wrap(SomeActions(log, 'a')))
+        self.assertEqual(batcher.flush(), 3)
+        self.assertEqual(batcher.flush(), 0)
+        self.assertEqual(log, [('now', 'a'), ('bulk notify', ['a']),
+                               ('bulk', [('a', 10), ('a', 20)])])
+
+    def test_iter_evaluate_compiles_for_the_wrapped_class(self):
+        log = []
+        batcher = ActionBatcher()
+        facts = [('a', 9), ('b', 1)]
+        results = list(iter_evaluate(
+            RULES, facts, lambda fact: SomeVariables(fact[1]),
+            lambda fact: batcher.wrap(SomeActions(log, fact[0]))))
+        self.assertEqual(results, [[0, 1], []])
+        self.assertEqual(batcher.flush(), 3)
+        self.assertEqual(log, [('now', 'a'), ('bulk notify', ['a']),
+                               ('bulk', [('a', 10), ('a', 20)])])
+        self.assertIs(actions_class(batcher.wrap(SomeActions(log))),
+                      SomeActions)
+        self.assertIs(actions_class(SomeActions(log)), SomeActions)
+
+    def test_flush_on_size(self):
+        log = []
+        batcher = ActionBatcher(max_size=2)
+        actions = batcher.wrap(SomeActions(log, 'a'))
+        actions.put_on_sale(amount=1)
+        self.assertEqual(log, [])
+        actions.put_on_sale(amount=2)
+        self.assertEqual(log, [('bulk', [('a', 1), ('a', 2)])])
+        self.assertEqual(batcher.pending, 0)
+
+    @patch('business_rules.deferred.default_timer')
+    def test_flush_on_delay(self, timer):
+        log = []
+        batcher = ActionBatcher(max_delay=5)
+        actions = batcher.wrap(SomeActions(log, 'a'))
+        timer.return_value = 100
+        actions.put_on_sale(amount=1)
+        timer.return_value = 104
+        actions.put_on_sale(amount=2)
+        self.assertEqual(log, [])
+        timer.return_value = 105
+        actions.put_on_sale(amount=3)
+        self.assertEqual(log, [('bulk', [('a', 1), ('a', 2), ('a', 3)])])
+        # The delay counts from the oldest call queued since the flush
+        timer.return_value = 108
+        actions.put_on_sale(amount=4)
+        self.assertEqual(batcher.pending, 1)
+
+    @patch('business_rules.deferred.default_timer')
+    def test_failed_handler_keeps_its_batch_queued(self, timer):
+        log = []
+        batcher = ActionBatcher(max_delay=5)
+        wrapped = batcher.wrap(SomeActions(log, 'a'))
+        timer.return_value = 100
+        wrapped.put_on_sale(amount=1)
+        wrapped.notify()
+        with patch.object(SomeActions, 'put_on_sale_bulk',
+                          side_effect=ValueError('db down')):
+            with self.assertRaises(ValueError):
+                batcher.flush()
+        self.assertEqual(batcher.pending, 2)
+        self.assertEqual(log, [])
+        # The queued calls keep their deadline
+        timer.return_value = 105
+        wrapped.put_on_sale(amount=2)
+        self.assertEqual(batcher.pending, 0)
+        self.assertEqual(log, [('bulk', [('a', 1), ('a', 2)]),
+                               ('bulk notify', ['a'])])
+
+    def test_batched_call_fields(self):
+        actions = SomeActions([], 'a')
+        batcher = ActionBatcher()
+        with patch.object(SomeActions, 'put_on_sale_bulk') as bulk:
+            batcher.wrap(actions).put_on_sale(amount=3)
+            batcher.flush()
+        bulk.assert_called_once_with([BatchedCall(actions, {'amount': 3})])
+
+    def test_unknown_action_and_missing_handler(self):
+        class OtherActions(BaseActions):
+
+            @rule_action(batch_handler='missing')
+            def act(self):
+                pass
+
+        batcher = ActionBatcher()
+        with self.assertRaisesRegex(AssertionError,
+                                    "Action nope is not defined"):
+            run_all([{'conditions': {'name': 'num', 'operator': 'equal_to',
+                                     'value': 1},
+                      'actions': [{'name': 'nope'}]}],
+                    SomeVariables(1), batcher.wrap(OtherActions()))
+        with self.assertRaisesRegex(AssertionError,
+                                    "Batch handler missing of action act"):
+            batcher.wrap(OtherActions()).act()
+
+    def test_batch_handler_must_be_a_name(self):
+        with self.assertRaisesRegex(AssertionError,
+                                    "batch_handler must be the name"):
+            rule_action(batch_handler=len)
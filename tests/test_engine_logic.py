@@ -1,6 +1,8 @@
 from business_rules import engine
-from business_rules.variables import BaseVariables
-from business_rules.operators import StringType
+from business_rules.fields import FIELD_NO_INPUT, FIELD_TEXT
+from business_rules.variables import (BaseVariables, rule_variable,
+                                      string_rule_variable)
+from business_rules.operators import StringType, type_operator
 from business_rules.actions import BaseActions
 
 from mock import patch, MagicMock
@@ -164,12 +166,73 @@ class EngineTests(TestCase):
     ### Operator comparisons
     ###
     def test_check_operator_comparison(self):
-        string_type = StringType('yo yo')
-        with patch.object(string_type, 'contains', return_value=True):
-            result = engine._do_operator_comparison(
-                    string_type, 'contains', 'its mocked')
+        class SomeVariables(BaseVariables):
+            @string_rule_variable
+            def foo(self):
+                return 'yo yo'
+
+        condition = {'name': 'foo', 'operator': 'contains',
+                     'value': 'its mocked'}
+        with patch.object(StringType, 'contains', return_value=True):
+            result = engine.check_condition(condition, SomeVariables())
             self.assertTrue(result)
-            string_type.contains.assert_called_once_with('its mocked')
+            StringType.contains.assert_called_once_with('its mocked')
+        self.assertFalse(engine.check_condition(condition, SomeVariables()))
+
+    def test_check_custom_operator(self):
+        class ShoutingType(StringType):
+            @type_operator(FIELD_TEXT)
+            def shouts(self, other_string):
+                return self.value == other_string.upper()
+
+            @type_operator(FIELD_NO_INPUT)
+            def is_loud(self):
+                return self.value.isupper()
+
+        class SomeVariables(BaseVariables):
+            @rule_variable(ShoutingType)
+            def foo(self):
+                return 'HEY'
+
+        def check(op, value=''):
+            return engine.check_condition(
+                {'name': 'foo', 'operator': op, 'value': value},
+                SomeVariables())
+
+        self.assertTrue(check('shouts', 'hey'))
+        self.assertTrue(check('is_loud'))
+        # inherited operators still work on the subclass
+        self.assertTrue(check('starts_with', 'HE'))
+        with self.assertRaisesRegex(AssertionError,
+                                    "Operator whispers does not exist for "
+                                    "type ShoutingType"):
+            check('whispers', 'hey')
+
+    def test_check_operator_of_type_with_init(self):
+        class EmailType(StringType):
+            def __init__(self, value):
+                super(EmailType, self).__init__(value)
+                self.domain = self.value.rpartition('@')[2]
+
+            @type_operator(FIELD_TEXT)
+            def has_domain(self, domain):
+                return self.domain == domain
+
+        class SomeVariables(BaseVariables):
+            @rule_variable(EmailType)
+            def email(self):
+                return 'me@example.com'
+
+        def condition(op, value):
+            return {'name': 'email', 'operator': op, 'value': value}
+
+        variables = SomeVariables()
+        self.assertTrue(engine.check_condition(
+            condition('has_domain', 'example.com'), variables))
+        self.assertFalse(engine.check_condition(
+            condition('has_domain', 'example.org'), variables))
+        self.assertTrue(engine.check_condition(
+            condition('starts_with', 'me@'), variables))
 
 
     ###
@@ -193,3 +256,69 @@ class EngineTests(TestCase):
         err_string = "Action fakeone is not defined in class BaseActions"
         with self.assertRaisesRegex(AssertionError, err_string):
             engine.do_actions(actions, BaseActions())
+
+    def test_invalid_action_before_valid_one(self):
+        defined_actions = BaseActions()
+        defined_actions.real = MagicMock()
+        err_string = "Action missing is not defined in class BaseActions"
+        with self.assertRaisesRegex(AssertionError, err_string):
+            engine.do_actions([{'name': 'missing'}, {'name': 'real'}],
+                              defined_actions)
+        self.assertEqual(defined_actions.real.call_count, 0)
+
+
+class CachedVariables(BaseVariables):
+
+    def __init__(self):
+        self.calls = 0
+
+    @string_rule_variable(cached=True)
+    def cached_name(self):
+        self.calls += 1
+        return 'foo'
+
+    @string_rule_variable
+    def uncached_name(self):
+        self.calls += 1
+        return 'foo'
+
+
+class VariableCacheTests(TestCase):
+
+    def _rules(self, name):
+        condition = {'name': name, 'operator': 'equal_to', 'value': 'foo'}
+        return [{'conditions': {'all': [condition, condition]},
+                 'actions': []},
+                {'conditions': condition, 'actions': []}]
+
+    def test_cached_variable_computed_once_per_run_all(self):
+        variables = CachedVariables()
+        engine.run_all(self._rules('cached_name'), variables, BaseActions())
+        self.assertEqual(variables.calls, 1)
+
+        # the cache is dropped at the end of the call
+        self.assertEqual(variables._rule_variable_cache, None)
+        engine.run_all(self._rules('cached_name'), variables, BaseActions())
+        self.assertEqual(variables.calls, 2)
+
+    def test_uncached_variable_computed_per_condition(self):
+        variables = CachedVariables()
+        engine.run_all(self._rules('uncached_name'), variables, BaseActions())
+        self.assertEqual(variables.calls, 3)
+
+    def test_cached_variable_outside_run_all(self):
+        variables = CachedVariables()
+        condition = {'name': 'cached_name', 'operator': 'equal_to',
+                     'value': 'foo'}
+        engine.check_condition(condition, variables)
+        engine.check_condition(condition, variables)
+        self.assertEqual(variables.calls, 2)
+
+    def test_nested_run_all_keeps_outer_cache(self):
+        variables = CachedVariables()
+        cache = {}
+        variables._rule_variable_cache = cache
+        engine.run_all(self._rules('cached_name'), variables, BaseActions())
+        self.assertTrue(variables._rule_variable_cache is cache)
+        self.assertEqual(variables.calls, 1)
+
@@ -0,0 +1,26 @@
+import subprocess
+import sys
+from unittest import TestCase, skipIf
+
+import business_rules
+
+
+class ImportTests(TestCase):
+
+    @skipIf(sys.version_info < (3, 7), "lazy exports need module __getattr__")
+    def test_package_import_skips_the_operators(self):
+        output = subprocess.check_output([
+            sys.executable, '-c',
+            'import sys, business_rules; '
+            'print(sorted(m for m in sys.modules if m.startswith("busi")))'])
+        self.assertEqual(output.decode('ascii').strip(),
+                         "['business_rules', 'business_rules.engine']")
+
+    def test_lazy_exports(self):
+        from business_rules.compiler import compile_rules
+        from business_rules.utils import export_rule_data
+        self.assertIs(business_rules.compile_rules, compile_rules)
+        self.assertIs(business_rules.export_rule_data, export_rule_data)
+        self.assertIn('run_all_batch', dir(business_rules))
+        with self.assertRaises(AttributeError):
+            business_rules.no_such_export
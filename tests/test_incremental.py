@@ -0,0 +1,97 @@
+from business_rules import run_all
+from business_rules.actions import BaseActions
+from business_rules.incremental import IncrementalEvaluator
+from business_rules.variables import (BaseVariables,
+                                      numeric_rule_variable,
+                                      string_rule_variable)
+
+from unittest import TestCase
+
+
+class ChangingVariables(BaseVariables):
+
+    def __init__(self, **values):
+        self.values = values
+        self.reads = []
+
+    def _read(self, name):
+        self.reads.append(name)
+        return self.values[name]
+
+    @numeric_rule_variable
+    def amount(self):
+        return self._read('amount')
+
+    @string_rule_variable
+    def country(self):
+        return self._read('country')
+
+    @string_rule_variable
+    def status(self):
+        return self._read('status')
+
+
+RULES = [
+    {'conditions': {'all': [
+        {'name': 'amount', 'operator': 'greater_than', 'value': 100},
+        {'name': 'country', 'operator': 'equal_to', 'value': 'US'}]},
+     'actions': []},
+    {'conditions': {'any': [
+        {'name': 'status', 'operator': 'equal_to', 'value': 'vip'},
+        {'name': 'amount', 'operator': 'greater_than', 'value': 100}]},
+     'actions': []},
+    {'conditions': {'name': 'country', 'operator': 'starts_with',
+                    'value': 'C'},
+     'actions': []},
+]
+
+
+class IncrementalEvaluatorTests(TestCase):
+
+    def _expected(self, variables):
+        triggered = []
+        for index, rule in enumerate(RULES):
+            if run_all([rule], ChangingVariables(**variables.values),
+                       BaseActions()):
+                triggered.append(index)
+        return triggered
+
+    def test_updates_match_full_evaluation(self):
+        variables = ChangingVariables(amount=50, country='US', status='new')
+        evaluator = IncrementalEvaluator(RULES, variables)
+        self.assertEqual(evaluator.evaluate(), [])
+
+        variables.values['amount'] = 150
+        self.assertEqual(evaluator.update(['amount']), [0, 1])
+        self.assertEqual(evaluator.triggered, self._expected(variables))
+
+        variables.values['country'] = 'CA'
+        self.assertEqual(evaluator.update(['country']), [2])
+        self.assertEqual(evaluator.triggered, [1, 2])
+
+        variables.values['country'] = 'US'
+        self.assertEqual(evaluator.update(['country']), [0])
+        self.assertEqual(evaluator.triggered, self._expected(variables))
+
+    def test_only_affected_conditions_are_checked(self):
+        variables = ChangingVariables(amount=150, country='US', status='new')
+        evaluator = IncrementalEvaluator(RULES, variables)
+        evaluator.evaluate()
+        # the shared `amount > 100` leaf is read once
+        self.assertEqual(sorted(variables.reads),
+                         ['amount', 'country', 'country', 'status'])
+
+        del variables.reads[:]
+        variables.values['status'] = 'vip'
+        self.assertEqual(evaluator.update(['status']), [])
+        self.assertEqual(variables.reads, ['status'])
+
+        del variables.reads[:]
+        self.assertEqual(evaluator.update(['unused']), [])
+        self.assertEqual(variables.reads, [])
+
+    def test_first_update_evaluates_everything(self):
+        variables = ChangingVariables(amount=150, country='CH', status='new')
+        evaluator = IncrementalEvaluator(RULES, variables)
+        self.assertEqual(evaluator.triggered, [])
+        self.assertEqual(evaluator.update(['amount']), [1, 2])
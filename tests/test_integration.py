@@ -1,10 +1,14 @@
 from business_rules.engine import check_condition
 from business_rules import export_rule_data
+from business_rules.utils import cached_rule_data
 from business_rules.actions import rule_action, BaseActions
-from business_rules.variables import BaseVariables, string_rule_variable, numeric_rule_variable, boolean_rule_variable
+from business_rules.variables import BaseVariables, string_rule_variable, numeric_rule_variable, boolean_rule_variable, select_rule_variable
 from business_rules.fields import FIELD_TEXT, FIELD_NUMERIC, FIELD_SELECT
 
 from unittest import TestCase
+from decimal import Decimal
+import hashlib
+import json
 
 class SomeVariables(BaseVariables):
 
@@ -171,3 +175,46 @@ class IntegrationTests(TestCase):
                             {'input_type': 'text', 'label': 'Matches Regex', 'name': 'matches_regex'},
                             {'input_type': 'none', 'label': 'Non Empty', 'name': 'non_empty'},
                             {'input_type': 'text', 'label': 'Starts With', 'name': 'starts_with'}]})
+
+    def test_export_rule_data_returns_a_copy(self):
+        first = export_rule_data(SomeVariables, SomeActions)
+        first['variables'].pop()
+        self.assertEqual(export_rule_data(SomeVariables(), SomeActions()),
+                         cached_rule_data(SomeVariables, SomeActions).data)
+        self.assertEqual(len(export_rule_data(SomeVariables, SomeActions)
+                             ['variables']), 3)
+
+    def test_cached_rule_data(self):
+        rule_data = cached_rule_data(SomeVariables(), SomeActions())
+        self.assertIs(cached_rule_data(SomeVariables, SomeActions), rule_data)
+        self.assertEqual(json.loads(rule_data.json.decode('utf-8')),
+                         rule_data.data)
+        self.assertEqual(rule_data.etag,
+                         hashlib.sha1(rule_data.json).hexdigest())
+
+    def test_export_rule_data_does_not_serialize(self):
+        class DecimalVariables(BaseVariables):
+
+            @select_rule_variable(options=[Decimal('1.5'), Decimal('2')])
+            def size(self):
+                return Decimal('2')
+
+        data = export_rule_data(DecimalVariables, SomeActions)
+        self.assertEqual(data['variables'][0]['options'],
+                         [Decimal('1.5'), Decimal('2')])
+        with self.assertRaises(TypeError):
+            cached_rule_data(DecimalVariables, SomeActions).json
+
+    def test_cached_rule_data_is_invalidated_by_rule_member_changes(self):
+        class MoreVariables(SomeVariables):
+            pass
+
+        before = cached_rule_data(MoreVariables, SomeActions)
+        MoreVariables.eleven = numeric_rule_variable()(lambda self: 11)
+        after = cached_rule_data(MoreVariables, SomeActions)
+        self.assertIsNot(after, before)
+        self.assertNotEqual(after.etag, before.etag)
+        self.assertEqual(len(after.data['variables']), 4)
+
+        MoreVariables.unrelated = 'not a rule member'
+        self.assertIs(cached_rule_data(MoreVariables, SomeActions), after)
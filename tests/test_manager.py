@@ -0,0 +1,102 @@
+from business_rules.actions import BaseActions, rule_action
+from business_rules.fields import FIELD_TEXT
+from business_rules.manager import RuleSetManager, rule_hash
+from business_rules.variables import (BaseVariables,
+                                      boolean_rule_variable,
+                                      numeric_rule_variable)
+
+from decimal import Decimal
+from unittest import TestCase
+
+
+class SomeVariables(BaseVariables):
+
+    def __init__(self, number=10):
+        self.number = number
+
+    @numeric_rule_variable
+    def num(self):
+        return self.number
+
+    @boolean_rule_variable
+    def flag(self):
+        return True
+
+
+class SomeActions(BaseActions):
+
+    @rule_action(params={'message': FIELD_TEXT})
+    def say(self, message):
+        pass
+
+
+RULES = [
+    {'conditions': {'name': 'num', 'operator': 'greater_than', 'value': 5},
+     'actions': [{'name': 'say', 'params': {'message': 'high'}}]},
+    {'conditions': {'name': 'num', 'operator': 'less_than', 'value': 3},
+     'actions': [{'name': 'say', 'params': {'message': 'low'}}]},
+    {'conditions': {'name': 'flag', 'operator': 'is_true', 'value': ''},
+     'actions': []},
+]
+
+
+class RuleSetManagerTests(TestCase):
+
+    def test_load_recompiles_only_changed_rules(self):
+        manager = RuleSetManager(SomeVariables, SomeActions, RULES)
+        old = manager.rule_set
+        self.assertEqual(manager.evaluate(SomeVariables(), SomeActions()),
+                         [0, 2])
+
+        changed = dict(RULES[2], conditions={'name': 'flag',
+                                             'operator': 'is_false',
+                                             'value': ''})
+        self.assertEqual(manager.load(RULES[:2] + [changed]), 1)
+        new = manager.rule_set
+        self.assertTrue(new is not old)
+        self.assertTrue(new.rules[0] is old.rules[0])
+        self.assertTrue(new.rules[1] is old.rules[1])
+        self.assertTrue(new.rules[2] is not old.rules[2])
+        self.assertTrue(manager.run(SomeVariables(number=1), SomeActions()))
+        self.assertEqual(manager.evaluate(SomeVariables(), SomeActions()),
+                         [0])
+        # the old rule set is left as it was
+        self.assertEqual(old.evaluate(SomeVariables(), SomeActions()), [0, 2])
+
+    def test_reordering_and_duplicates_need_no_compiling(self):
+        manager = RuleSetManager(SomeVariables, SomeActions, RULES)
+        self.assertEqual(manager.load(list(reversed(RULES)) + RULES[:1]), 0)
+        self.assertEqual(manager.evaluate(SomeVariables(), SomeActions()),
+                         [0, 2, 3])
+
+    def test_invalid_rules_keep_the_live_set(self):
+        manager = RuleSetManager(SomeVariables, SomeActions, RULES)
+        live = manager.rule_set
+        bad = {'conditions': {'name': 'nope', 'operator': 'equal_to',
+                              'value': 1},
+               'actions': []}
+        with self.assertRaises(AssertionError):
+            manager.load(RULES + [bad])
+        self.assertTrue(manager.rule_set is live)
+        self.assertEqual(manager.load(RULES), 0)
+
+    def test_rule_hash_ignores_key_order(self):
+        rule = {'conditions': {'name': 'num', 'operator': 'equal_to',
+                               'value': 1},
+                'actions': []}
+        reordered = {'actions': [],
+                     'conditions': {'value': 1, 'operator': 'equal_to',
+                                    'name': 'num'}}
+        self.assertEqual(rule_hash(rule), rule_hash(reordered))
+        self.assertNotEqual(rule_hash(rule), rule_hash(dict(rule, actions=[
+            {'name': 'say', 'params': {'message': 'hi'}}])))
+
+    def test_rule_hash_tells_decimals_from_strings(self):
+        def rule(value):
+            return {'conditions': {'name': 'num', 'operator': 'equal_to',
+                                   'value': value},
+                    'actions': []}
+
+        self.assertNotEqual(rule_hash(rule(Decimal('5'))), rule_hash(rule('5')))
+        self.assertEqual(rule_hash(rule(Decimal('5'))),
+                         rule_hash(rule(Decimal('5'))))
@@ -0,0 +1,120 @@
+from business_rules import engine
+from business_rules.actions import BaseActions, rule_action
+from business_rules.observers import BaseObserver, Histogram, StatsCollector
+from business_rules.variables import BaseVariables, numeric_rule_variable
+
+from unittest import TestCase
+
+
+class SomeVariables(BaseVariables):
+
+    @numeric_rule_variable
+    def ten(self):
+        return 10
+
+    @numeric_rule_variable(cached=True)
+    def five(self):
+        return 5
+
+
+class SomeActions(BaseActions):
+
+    @rule_action()
+    def act(self):
+        pass
+
+
+RULES = [
+    {'conditions': {'all': [
+        {'name': 'ten', 'operator': 'greater_than', 'value': 1},
+        {'name': 'five', 'operator': 'equal_to', 'value': 5}]},
+     'actions': [{'name': 'act'}]},
+    {'conditions': {'name': 'five', 'operator': 'less_than', 'value': 5},
+     'actions': [{'name': 'act'}]},
+]
+
+
+class RecordingObserver(BaseObserver):
+
+    def __init__(self):
+        self.events = []
+
+    def rule_started(self, index, rule):
+        self.events.append(('rule_started', index))
+
+    def rule_finished(self, index, rule, triggered, duration):
+        self.events.append(('rule_finished', index, triggered))
+
+    def condition_checked(self, condition, result):
+        self.events.append(('condition', condition['name'], bool(result)))
+
+    def variable_fetched(self, name, duration):
+        self.events.append(('variable', name))
+
+    def action_executed(self, name, duration):
+        self.events.append(('action', name))
+
+
+class ObserverTests(TestCase):
+
+    def tearDown(self):
+        engine.set_observer(None)
+
+    def test_no_observer_by_default(self):
+        self.assertEqual(engine.set_observer(None), None)
+
+    def test_callbacks(self):
+        observer = RecordingObserver()
+        self.assertEqual(engine.set_observer(observer), None)
+        engine.run_all(RULES, SomeVariables(), SomeActions())
+        self.assertEqual(observer.events, [
+            ('rule_started', 0),
+            ('variable', 'ten'),
+            ('condition', 'ten', True),
+            ('variable', 'five'),
+            ('condition', 'five', True),
+            ('action', 'act'),
+            ('rule_finished', 0, True),
+            ('rule_started', 1),
+            # cached, so not fetched again
+            ('condition', 'five', False),
+            ('rule_finished', 1, False)])
+        self.assertTrue(engine.set_observer(None) is observer)
+
+    def test_base_observer_does_nothing(self):
+        engine.set_observer(BaseObserver())
+        self.assertTrue(engine.run_all(RULES, SomeVariables(), SomeActions()))
+
+
+class StatsCollectorTests(TestCase):
+
+    def tearDown(self):
+        engine.set_observer(None)
+
+    def test_collects_stats(self):
+        stats = StatsCollector()
+        engine.set_observer(stats)
+        engine.run_all(RULES, SomeVariables(), SomeActions())
+        engine.run_all(RULES, SomeVariables(), SomeActions())
+        snapshot = stats.snapshot()
+        self.assertEqual(snapshot['rules'][0]['runs'], 2)
+        self.assertEqual(snapshot['rules'][0]['triggered'], 2)
+        self.assertEqual(snapshot['rules'][1]['triggered'], 0)
+        self.assertEqual(snapshot['rules'][1]['time']['count'], 2)
+        self.assertEqual(snapshot['conditions'],
+                         {'ten greater_than': [2, 0],
+                          'five equal_to': [2, 0],
+                          'five less_than': [0, 2]})
+        self.assertEqual(snapshot['variables']['five']['count'], 2)
+        self.assertEqual(snapshot['actions']['act']['count'], 2)
+
+        stats.reset()
+        self.assertEqual(stats.snapshot()['rules'], {})
+
+    def test_histogram_buckets(self):
+        histogram = Histogram()
+        for duration in [0.0000005, 0.000001, 0.000003, 0.001]:
+            histogram.add(duration)
+        self.assertEqual(histogram.to_dict(),
+                         {'count': 4, 'total': 0.0010045, 'max': 0.001,
+                          'buckets': {0: 1, 1: 1, 2: 1, 10: 1}})
@@ -1,9 +1,13 @@
 from business_rules.operators import (StringType,
                                       NumericType, BooleanType, SelectType,
-                                      SelectMultipleType)
+                                      SelectMultipleType, SelectValues,
+                                      SelectOperand,
+                                      NativeNumericType,
+                                      RegexCache, RegexScan)
 
 from unittest import TestCase
 from decimal import Decimal
+import re
 import sys
 
 class StringOperatorTests(TestCase):
@@ -41,12 +45,65 @@ class StringOperatorTests(TestCase):
         self.assertTrue(StringType("hello").matches_regex(r"^h"))
         self.assertFalse(StringType("hello").matches_regex(r"^sh"))
 
+    def test_string_matches_compiled_regex(self):
+        self.assertTrue(StringType("hello").matches_regex.raw_operator(
+            StringType("hello"), re.compile(r"l+")))
+
     def test_non_empty(self):
         self.assertTrue(StringType("hello").non_empty())
         self.assertFalse(StringType("").non_empty())
         self.assertFalse(StringType(None).non_empty())
 
 
+class RegexCacheTests(TestCase):
+
+    def test_compiles_once(self):
+        cache = RegexCache()
+        self.assertTrue(cache.compile(r"^a") is cache.compile(r"^a"))
+        self.assertEqual(len(cache), 1)
+
+    def test_passes_compiled_patterns_through(self):
+        pattern = re.compile(r"^a")
+        self.assertTrue(RegexCache().compile(pattern) is pattern)
+
+    def test_evicts_least_recently_used(self):
+        cache = RegexCache(maxsize=2)
+        first = cache.compile("a")
+        cache.compile("b")
+        cache.compile("a")  # "b" is now the least recently used
+        cache.compile("c")
+        self.assertEqual(len(cache), 2)
+        self.assertTrue(cache.compile("a") is first)
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+
+
+class RegexScanTests(TestCase):
+
+    def test_same_answers_as_search(self):
+        patterns = [re.compile(p) for p in
+                    [r"^h", r"^he(?:l|x)+o$", r"\Ax+", r"^", r"^H"]]
+        scan = RegexScan(patterns)
+        for text in ["hello", "xhellox", "", "HELLO", "helxlo"]:
+            self.assertEqual(
+                scan.matches(text),
+                frozenset(i for i, p in enumerate(patterns) if p.search(text)))
+            # and again from the last-string cache
+            self.assertEqual(
+                scan.matches(text),
+                frozenset(i for i, p in enumerate(patterns) if p.search(text)))
+
+    def test_can_combine(self):
+        self.assertTrue(RegexScan.can_combine(re.compile(r"^(?:a|b)")))
+        self.assertTrue(RegexScan.can_combine(re.compile(r"\Aa[|(]b")))
+        self.assertTrue(RegexScan.can_combine(re.compile(r"^[]|]\|")))
+        self.assertFalse(RegexScan.can_combine(re.compile(r"a|b")))
+        self.assertFalse(RegexScan.can_combine(re.compile(r"^a|b")))
+        self.assertFalse(RegexScan.can_combine(re.compile(r"lo$")))
+        self.assertFalse(RegexScan.can_combine(re.compile(r"^(a)\1")))
+        self.assertFalse(RegexScan.can_combine(re.compile(r"(?m)^a")))
+
+
 class NumericOperatorTests(TestCase):
 
     def test_instantiate(self):
@@ -117,6 +174,42 @@ class NumericOperatorTests(TestCase):
         self.assertTrue(NumericType(10).less_than_or_equal_to(10))
 
 
+class NativeNumericOperatorTests(TestCase):
+
+    def test_instantiate(self):
+        err_string = "foo is not a valid numeric type"
+        with self.assertRaisesRegex(AssertionError, err_string):
+            NativeNumericType("foo")
+
+    def test_keeps_native_values(self):
+        self.assertTrue(type(NativeNumericType(10).value) is int)
+        self.assertTrue(type(NativeNumericType(10.5).value) is float)
+        self.assertTrue(type(NativeNumericType(Decimal(1)).value) is Decimal)
+
+    def test_same_results_as_decimal_mode(self):
+        values = [1, 10, 11, 10.0, 10.1, 10.000001, 10.000002, 10.00001,
+                  Decimal('10.0'), Decimal('10.000001'), Decimal('9.9999')]
+        operators = ['equal_to', 'greater_than', 'greater_than_or_equal_to',
+                     'less_than', 'less_than_or_equal_to']
+        for left in values:
+            for right in values:
+                for operator in operators:
+                    self.assertEqual(
+                        getattr(NativeNumericType(left), operator)(right),
+                        getattr(NumericType(left), operator)(right),
+                        (left, operator, right))
+
+    def test_global_switch(self):
+        self.assertTrue(type(NumericType(1)) is NumericType)
+        NumericType.native_numbers = True
+        try:
+            self.assertTrue(type(NumericType(1)) is NativeNumericType)
+            self.assertTrue(NumericType(10).equal_to(10.0000001))
+        finally:
+            NumericType.native_numbers = False
+        self.assertTrue(type(NumericType(1)) is NumericType)
+
+
 class BooleanOperatorTests(TestCase):
 
     def test_instantiate(self):
@@ -146,6 +239,17 @@ class SelectOperatorTests(TestCase):
         self.assertFalse(SelectType([1, 2]).does_not_contain(2))
         self.assertFalse(SelectType([1, 2, "a"]).does_not_contain("A"))
 
+    def test_mixed_strings_and_other_values(self):
+        self.assertFalse(SelectType(["1", 2]).contains(1))
+        self.assertTrue(SelectType(["1", 2.0]).contains(2))
+        self.assertTrue(SelectType(("X", None)).contains(None))
+
+    def test_unhashable_values(self):
+        self.assertTrue(SelectType([[1], "A"]).contains([1]))
+        self.assertTrue(SelectType([[1], "A"]).contains("a"))
+        self.assertFalse(SelectType([[1], "A"]).contains({}))
+        self.assertTrue(SelectType([1, 2]).does_not_contain([1]))
+
 
 class SelectMultipleOperatorTests(TestCase):
 
@@ -183,6 +287,44 @@ class SelectMultipleOperatorTests(TestCase):
         self.assertFalse(SelectMultipleType([1, 2, 3]).
                          shares_exactly_one_element_with([2, 3, "a"]))
 
+    def test_shares_exactly_one_element_counts_repeats(self):
+        self.assertFalse(SelectMultipleType([1, 2]).
+                         shares_exactly_one_element_with([2, 2]))
+        self.assertFalse(SelectMultipleType(["a"]).
+                         shares_exactly_one_element_with(["A", "a"]))
+
+    def test_prepared_rule_values(self):
+        values = SelectValues([2, "A"])
+        self.assertEqual(values.keys, frozenset([2, "a"]))
+        self.assertEqual(list(values), [2, "A"])
+        self.assertTrue(SelectMultipleType([1, 2, "a"]).contains_all(values))
+        self.assertFalse(SelectMultipleType([1, 2]).is_contained_by(values))
+        self.assertTrue(SelectMultipleType([1, "a"]).
+                        shares_exactly_one_element_with(values))
+
+    def test_cast_value_keeps_its_key_set(self):
+        value = SelectMultipleType([1, "A"]).value
+        self.assertTrue(isinstance(value, SelectOperand))
+        self.assertEqual(value.select_keys(), frozenset([1, "a"]))
+        self.assertTrue(value.select_keys() is value.select_keys())
+        self.assertTrue(SelectMultipleType(value).value is value)
+
+    def test_unhashable_values(self):
+        self.assertTrue(SelectMultipleType([[1], "a"]).
+                        contains_all(["A", [1]]))
+        self.assertFalse(SelectMultipleType([[1], "a"]).
+                         contains_all([[2]]))
+        self.assertTrue(SelectMultipleType([[1]]).
+                        is_contained_by([[1], 2]))
+        self.assertTrue(SelectMultipleType([[1], 3]).
+                        shares_at_least_one_element_with([3]))
+        self.assertFalse(SelectMultipleType([[1], 3]).
+                         shares_at_least_one_element_with([4]))
+        self.assertTrue(SelectMultipleType([[1], 3]).
+                        shares_exactly_one_element_with([[1], 4]))
+        self.assertTrue(SelectMultipleType([[1], 3]).
+                        shares_no_elements_with([[2]]))
+
     def test_shares_no_elements_with(self):
         self.assertTrue(SelectMultipleType([1, 2]).
                         shares_no_elements_with([4, 3]))
@@ -1,4 +1,10 @@
-from business_rules.operators import BaseType, type_operator
+from business_rules.operators import (BaseType, NumericType, StringType,
+                                      NativeNumericType, BooleanType,
+                                      SelectType, SelectMultipleType,
+                                      get_operator,
+                                      takes_instances, type_operator,
+                                      value_operator)
+from decimal import Decimal
 from unittest import TestCase
 from mock import MagicMock
 
@@ -63,3 +69,78 @@ class OperatorsClassTests(TestCase):
         some_type.other_operator('blah')
         some_type.other_operator(other_param='blah')
         self.assertEqual(some_type._assert_valid_value_and_cast.call_count, 0)
+
+    def test_value_operator(self):
+        class SomeType(StringType):
+            @value_operator('text', label='Is It')
+            def is_it(cls, value, other):
+                return (cls, value, other)
+
+        self.assertEqual(SomeType('val').is_it('foo'), (SomeType, 'val', 'foo'))
+        self.assertEqual(SomeType.is_it.label, 'Is It')
+        operator = get_operator(SomeType, 'is_it')
+        self.assertEqual(operator.function('val', 'foo'),
+                         (SomeType, 'val', 'foo'))
+        self.assertTrue(operator.cast_arguments)
+        self.assertFalse(operator.no_input)
+        self.assertEqual(operator.cast(None), '')
+
+    def test_get_operator_binds_the_subclass(self):
+        class LooseNumericType(NumericType):
+            EPSILON = Decimal('0.5')
+
+        operator = get_operator(LooseNumericType, 'greater_than_or_equal_to')
+        self.assertTrue(operator.function(Decimal('1.7'), Decimal('2')))
+        self.assertFalse(get_operator(NumericType, 'greater_than_or_equal_to')
+                         .function(Decimal('1.7'), Decimal('2')))
+        self.assertTrue(get_operator(NumericType, 'no_such_operator') is None)
+
+    def test_get_operator_follows_class_changes(self):
+        class SomeType(StringType):
+            pass
+
+        self.assertTrue(get_operator(SomeType, 'contains').function('abc', 'b'))
+        SomeType.contains = type_operator('text')(
+            lambda self, other: other not in self.value)
+        operator = get_operator(SomeType, 'contains')
+        self.assertFalse(operator.function(operator.cast('abc'), 'b'))
+
+    def test_operators_run_on_instances_of_types_with_init(self):
+        class EmailType(StringType):
+            def __init__(self, value):
+                super(EmailType, self).__init__(value)
+                self.domain = self.value.rpartition('@')[2]
+
+            @type_operator('text')
+            def has_domain(self, domain):
+                return self.domain == domain
+
+        self.assertTrue(takes_instances(EmailType))
+        self.assertFalse(takes_instances(StringType))
+        operator = get_operator(EmailType, 'has_domain')
+        operand = operator.cast('me@example.com')
+        self.assertTrue(isinstance(operand, EmailType))
+        self.assertTrue(operator.function(operand, 'example.com'))
+        # Built-in operators run on the instance too and cast their argument
+        self.assertTrue(get_operator(EmailType, 'ends_with')
+                        .function(operand, '.com'))
+        self.assertFalse(get_operator(EmailType, 'ends_with').cast_arguments)
+
+    def test_comparisons_follow_replaced_operators(self):
+        class StrictNumericType(NumericType):
+            @type_operator('numeric')
+            def equal_to(self, other):
+                return self.value == other
+
+        operator = get_operator(StrictNumericType, 'less_than_or_equal_to')
+        self.assertTrue(operator.function(operator.cast(1), 1))
+        self.assertFalse(operator.function(operator.cast(1),
+                                           Decimal('0.9999999')))
+        self.assertTrue(get_operator(NumericType, 'less_than_or_equal_to')
+                        .function(Decimal(1), Decimal('0.9999999')))
+
+    def test_built_in_types_have_no_instance_dict(self):
+        for operand in [StringType('a'), NumericType(1), NativeNumericType(1),
+                        BooleanType(True), SelectType([1]),
+                        SelectMultipleType([1])]:
+            self.assertFalse(hasattr(operand, '__dict__'))
@@ -0,0 +1,125 @@
+from business_rules.actions import BaseActions, rule_action
+from business_rules.deferred import ActionBatcher
+from business_rules.engine import run_all
+from business_rules.fields import FIELD_NUMERIC
+from business_rules.parallel import _WorkerState, run_all_parallel
+from business_rules.variables import BaseVariables, numeric_rule_variable
+
+import pickle
+from unittest import TestCase
+
+
+class NumberVariables(BaseVariables):
+
+    def __init__(self, number):
+        self.number = number
+
+    @numeric_rule_variable
+    def number_value(self):
+        return self.number
+
+
+class NumberActions(BaseActions):
+    log = []
+
+    def __init__(self, number):
+        self.number = number
+
+    @rule_action(params={'amount': FIELD_NUMERIC})
+    def record(self, amount):
+        NumberActions.log.append((self.number, amount))
+
+
+RULES = [
+    {'conditions': {'name': 'number_value', 'operator': 'greater_than',
+                    'value': 10},
+     'actions': [{'name': 'record', 'params': {'amount': 1}}]},
+    {'conditions': {'name': 'number_value', 'operator': 'less_than',
+                    'value': 15},
+     'actions': [{'name': 'record', 'params': {'amount': 2}}]},
+]
+
+
+def expected_results(numbers, stop_on_first_trigger=False):
+    results = []
+    for number in numbers:
+        triggered = [index for index, rule in enumerate(RULES)
+                     if run_all([rule], NumberVariables(number),
+                                NumberActions(number))]
+        if stop_on_first_trigger:
+            triggered = triggered[:1]
+        results.append(triggered)
+    return results
+
+
+class RunAllParallelTests(TestCase):
+
+    def setUp(self):
+        NumberActions.log = []
+
+    def test_processes(self):
+        numbers = list(range(30))
+        results = list(run_all_parallel(RULES, numbers, NumberVariables,
+                                        NumberActions, workers=2,
+                                        chunksize=4))
+        self.assertEqual(results, expected_results(numbers))
+
+    def test_threads_run_actions(self):
+        expected = expected_results(range(25))
+        NumberActions.log = []
+        results = list(run_all_parallel(RULES, iter(range(25)),
+                                        NumberVariables, NumberActions,
+                                        workers=3, chunksize=2,
+                                        executor='thread'))
+        self.assertEqual(results, expected)
+        self.assertEqual(len(NumberActions.log),
+                         sum(len(result) for result in results))
+
+    def test_threads_with_batched_actions(self):
+        class BatchedActions(NumberActions):
+
+            @rule_action(params={'amount': FIELD_NUMERIC},
+                         batch_handler='record_bulk')
+            def record(self, amount):
+                raise AssertionError("should be batched")
+
+            def record_bulk(self, calls):
+                NumberActions.log.extend((call.actions.number,
+                                          call.params['amount'])
+                                         for call in calls)
+
+        expected = expected_results(range(8, 18))
+        NumberActions.log = []
+        with ActionBatcher() as batcher:
+            results = list(run_all_parallel(
+                RULES, range(8, 18), NumberVariables,
+                lambda number: batcher.wrap(BatchedActions(number)),
+                workers=2, chunksize=3, executor='thread'))
+            self.assertEqual(NumberActions.log, [])
+        self.assertEqual(results, expected)
+        self.assertEqual(len(NumberActions.log),
+                         sum(len(result) for result in results))
+
+    def test_stop_on_first_trigger(self):
+        results = list(run_all_parallel(RULES, [5, 12, 20], NumberVariables,
+                                        NumberActions, workers=1,
+                                        executor='thread',
+                                        stop_on_first_trigger=True))
+        self.assertEqual(results, expected_results([5, 12, 20], True))
+
+    def test_no_objects(self):
+        self.assertEqual(list(run_all_parallel(RULES, [], NumberVariables,
+                                               NumberActions, workers=1,
+                                               executor='thread')), [])
+
+    def test_unknown_executor(self):
+        with self.assertRaisesRegex(AssertionError, "Unknown executor fork"):
+            list(run_all_parallel(RULES, [1], NumberVariables, NumberActions,
+                                  executor='fork'))
+
+    def test_worker_state_pickles_without_compiled_rules(self):
+        state = _WorkerState(RULES, NumberVariables, NumberActions)
+        state.compiled_for(NumberVariables(1), NumberActions(1))
+        restored = pickle.loads(pickle.dumps(state))
+        self.assertEqual(restored.rule_list, RULES)
+        self.assertEqual(restored.compiled, {})
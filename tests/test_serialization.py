@@ -0,0 +1,169 @@
+import io
+import json
+from decimal import Decimal
+
+from business_rules import compile_rules, compiler, serialization
+from business_rules.actions import BaseActions, rule_action
+from business_rules.fields import FIELD_NUMERIC
+from business_rules.operators import NumericType
+from business_rules.variables import (BaseVariables,
+                                      numeric_rule_variable,
+                                      select_multiple_rule_variable,
+                                      select_rule_variable,
+                                      string_rule_variable)
+
+from mock import patch
+from unittest import TestCase
+
+
+class SomeVariables(BaseVariables):
+
+    def __init__(self, number=10, text='hello', tags=('a', 'B')):
+        self.number = number
+        self.word = text
+        self.tag_list = list(tags)
+
+    @numeric_rule_variable
+    def num(self):
+        return self.number
+
+    @string_rule_variable
+    def text(self):
+        return self.word
+
+    @select_multiple_rule_variable()
+    def tags(self):
+        return self.tag_list
+
+    @select_rule_variable()
+    def pair(self):
+        return [('a', 1), 'b']
+
+
+class SomeActions(BaseActions):
+
+    def __init__(self):
+        self.calls = []
+
+    @rule_action(params={'amount': FIELD_NUMERIC})
+    def pay(self, amount):
+        self.calls.append(amount)
+
+
+RULES = [
+    {'conditions': {'all': [
+        {'name': 'num', 'operator': 'greater_than', 'value': 5.5},
+        {'any': [
+            {'name': 'text', 'operator': 'starts_with', 'value': 'he'},
+            {'name': 'text', 'operator': 'matches_regex', 'value': '^x+$'},
+        ]},
+     ]},
+     'actions': [{'name': 'pay', 'params': {'amount': 1.25}}]},
+    {'conditions': {'name': 'tags', 'operator': 'contains_all',
+                    'value': ['A', 'b']},
+     'actions': [{'name': 'pay', 'params': {'amount': 2}}]},
+    {'conditions': {'name': 'num', 'operator': 'less_than', 'value': 3},
+     'actions': []},
+]
+
+
+class SerializationTests(TestCase):
+
+    def test_round_trip_matches_compile_rules(self):
+        data = serialization.dumps(RULES, SomeVariables, SomeActions)
+        loaded = serialization.loads(data, SomeVariables, SomeActions)
+        compiled = compile_rules(RULES, SomeVariables, SomeActions)
+        for variables in [SomeVariables(), SomeVariables(number=1),
+                          SomeVariables(text='xx', tags=['b'])]:
+            self.assertEqual(loaded.evaluate(variables, SomeActions()),
+                             compiled.evaluate(variables, SomeActions()))
+
+        actions = SomeActions()
+        self.assertTrue(loaded.run(SomeVariables(), actions))
+        self.assertEqual(actions.calls, [1.25, 2])
+
+    def test_decimal_constants_round_trip(self):
+        self.assertFalse(NumericType.native_numbers)
+        rules = [{'conditions': {'name': 'num', 'operator': 'equal_to',
+                                 'value': 0.1},
+                  'actions': []}]
+        data = serialization.dumps(rules, SomeVariables, SomeActions)
+        condition = serialization.loads(data, SomeVariables,
+                                        SomeActions).rules[0].conditions
+        compiled = compile_rules(rules, SomeVariables, SomeActions)
+        self.assertTrue(isinstance(condition.value, Decimal))
+        self.assertEqual(condition.value, compiled.rules[0].conditions.value)
+
+    def test_constants_keep_their_type(self):
+        rules = [
+            {'conditions': {'name': 'pair', 'operator': 'contains',
+                            'value': ('a', 1)},
+             'actions': []},
+            {'conditions': {'name': 'pair', 'operator': 'contains',
+                            'value': [Decimal('1.5'), ('b', {'c': 2})]},
+             'actions': []},
+        ]
+        data = serialization.dumps(rules, SomeVariables, SomeActions)
+        loaded = serialization.loads(data, SomeVariables, SomeActions)
+        self.assertEqual([rule.conditions.value for rule in loaded.rules],
+                         [('a', 1), [Decimal('1.5'), ('b', {'c': 2})]])
+        self.assertEqual(loaded.evaluate(SomeVariables(), None), [0])
+
+    def test_names_are_resolved_once_per_load(self):
+        data = serialization.dumps(RULES * 3, SomeVariables, SomeActions)
+        with patch('business_rules.compiler._resolve_condition',
+                   wraps=compiler._resolve_condition) as resolve:
+            with patch('business_rules.serialization.action_builder',
+                       wraps=compiler.action_builder) as action_builder:
+                loaded = serialization.loads(data, SomeVariables,
+                                             SomeActions)
+        # num greater_than, text starts_with, text matches_regex,
+        # tags contains_all and num less_than
+        self.assertEqual(resolve.call_count, 5)
+        self.assertEqual(action_builder.call_count, 1)
+        self.assertEqual(loaded.evaluate(SomeVariables(), None),
+                         [0, 1, 3, 4, 6, 7])
+
+    def test_actions_cls_none(self):
+        data = serialization.dumps(RULES, SomeVariables, None)
+        loaded = serialization.loads(data, SomeVariables, None)
+        self.assertEqual(loaded.rules[0].actions, [])
+        self.assertEqual(loaded.evaluate(SomeVariables(), None), [0, 1])
+
+    def test_invalid_rules_raise_on_dumps(self):
+        bad_operator = [{'conditions': {'name': 'num', 'operator': 'foo',
+                                        'value': 1},
+                         'actions': []}]
+        with self.assertRaises(AssertionError):
+            serialization.dumps(bad_operator, SomeVariables, SomeActions)
+        bad_action = [dict(RULES[2], actions=[{'name': 'refund'}])]
+        with self.assertRaises(AssertionError):
+            serialization.dumps(bad_action, SomeVariables, SomeActions)
+
+    def test_header_mismatch_uses_fallback(self):
+        data = serialization.dumps(RULES, SomeVariables, SomeActions)
+        stale = data[:3] + bytearray([serialization.FORMAT_VERSION + 1]) \
+            + data[4:]
+        with self.assertRaises(ValueError):
+            serialization.loads(stale, SomeVariables, SomeActions)
+        loaded = serialization.loads(stale, SomeVariables, SomeActions,
+                                     fallback_json=json.dumps(RULES))
+        self.assertEqual(loaded.evaluate(SomeVariables(), SomeActions()),
+                         [0, 1])
+
+    def test_native_numbers_setting_is_part_of_header(self):
+        data = serialization.dumps(RULES, SomeVariables, SomeActions)
+        NumericType.native_numbers = True
+        try:
+            with self.assertRaises(ValueError):
+                serialization.loads(data, SomeVariables, SomeActions)
+        finally:
+            NumericType.native_numbers = False
+
+    def test_dump_and_load_files(self):
+        fp = io.BytesIO()
+        serialization.dump(RULES, SomeVariables, SomeActions, fp)
+        fp.seek(0)
+        loaded = serialization.load(fp, SomeVariables, SomeActions)
+        self.assertEqual(loaded.evaluate(SomeVariables(), SomeActions()),
+                         [0, 1])
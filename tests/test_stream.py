@@ -0,0 +1,132 @@
+from business_rules import compile_rules
+from business_rules.__main__ import import_class, main
+from business_rules.actions import BaseActions, rule_action
+from business_rules.stream import evaluate_jsonl, iter_evaluate
+from business_rules.variables import (BaseVariables,
+                                      numeric_rule_variable,
+                                      string_rule_variable)
+
+import argparse
+import io
+import json
+import os
+import shutil
+import tempfile
+import types
+from unittest import TestCase
+
+
+class FactVariables(BaseVariables):
+
+    def __init__(self, fact):
+        self.fact = fact
+
+    @numeric_rule_variable
+    def amount(self):
+        return self.fact['amount']
+
+    @string_rule_variable
+    def kind(self):
+        return self.fact['kind']
+
+
+class FactActions(BaseActions):
+    log = []
+
+    def __init__(self, fact):
+        self.fact = fact
+
+    @rule_action()
+    def flag(self):
+        FactActions.log.append(self.fact['amount'])
+
+
+RULES = [
+    {'conditions': {'name': 'amount', 'operator': 'greater_than',
+                    'value': 100},
+     'actions': [{'name': 'flag'}]},
+    {'conditions': {'name': 'kind', 'operator': 'equal_to',
+                    'value': 'refund'},
+     'actions': []},
+]
+
+FACTS = [{'amount': 150, 'kind': 'refund'},
+         {'amount': 5, 'kind': 'sale'},
+         {'amount': 500, 'kind': 'sale'}]
+
+
+class IterEvaluateTests(TestCase):
+
+    def setUp(self):
+        FactActions.log = []
+
+    def test_lazily_evaluates_rule_list(self):
+        results = iter_evaluate(RULES, iter(FACTS), FactVariables)
+        self.assertTrue(isinstance(results, types.GeneratorType))
+        self.assertEqual(next(results), [0, 1])
+        self.assertEqual(list(results), [[], [0]])
+        # no actions factory, no actions
+        self.assertEqual(FactActions.log, [])
+
+    def test_compiled_rule_set_with_actions(self):
+        compiled = compile_rules(RULES, FactVariables, FactActions)
+        results = list(iter_evaluate(compiled, FACTS, FactVariables,
+                                     FactActions, stop_on_first_trigger=True))
+        self.assertEqual(results, [[0], [], [0]])
+        self.assertEqual(FactActions.log, [150, 500])
+
+    def test_rule_list_with_actions(self):
+        list(iter_evaluate(RULES, FACTS, FactVariables, FactActions))
+        self.assertEqual(FactActions.log, [150, 500])
+
+    def test_facts_can_be_variables_objects(self):
+        facts = [FactVariables(fact) for fact in FACTS]
+        self.assertEqual(list(iter_evaluate(RULES, facts)),
+                         [[0, 1], [], [0]])
+
+
+class JsonLinesTests(TestCase):
+
+    def test_evaluate_jsonl(self):
+        lines = [json.dumps(fact).encode('utf-8') for fact in FACTS]
+        input_file = io.BytesIO(b'\n'.join([lines[0], b'', lines[1],
+                                            lines[2]]) + b'\n')
+        output_file = io.BytesIO()
+        count = evaluate_jsonl(RULES, input_file, output_file, FactVariables,
+                               batch_size=2)
+        self.assertEqual(count, 3)
+        self.assertEqual(
+            [json.loads(line.decode('utf-8'))
+             for line in output_file.getvalue().splitlines()],
+            [{'line': 1, 'triggered': [0, 1]},
+             {'line': 3, 'triggered': []},
+             {'line': 4, 'triggered': [0]}])
+
+    def test_main(self):
+        directory = tempfile.mkdtemp()
+        try:
+            paths = dict((name, os.path.join(directory, name))
+                         for name in ['rules.json', 'in.jsonl', 'out.jsonl'])
+            with open(paths['rules.json'], 'w') as f:
+                json.dump(RULES, f)
+            with open(paths['in.jsonl'], 'w') as f:
+                f.write('\n'.join(json.dumps(fact) for fact in FACTS))
+            FactActions.log = []
+            main(['--rules', paths['rules.json'],
+                  '--variables', 'tests.test_stream:FactVariables',
+                  '--actions', 'tests.test_stream:FactActions',
+                  '--input', paths['in.jsonl'],
+                  '--output', paths['out.jsonl']])
+            with open(paths['out.jsonl']) as f:
+                results = [json.loads(line) for line in f]
+        finally:
+            shutil.rmtree(directory)
+        self.assertEqual([result['triggered'] for result in results],
+                         [[0, 1], [], [0]])
+        self.assertEqual(FactActions.log, [150, 500])
+
+    def test_import_class(self):
+        self.assertTrue(import_class('tests.test_stream:FactVariables')
+                        is FactVariables)
+        with self.assertRaises(argparse.ArgumentTypeError):
+            import_class('tests.test_stream')
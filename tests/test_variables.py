@@ -8,6 +8,7 @@ from business_rules.variables import (rule_variable,
                                       select_multiple_rule_variable)
 
 from business_rules.operators import (NumericType,
+                        NativeNumericType,
                         StringType,
                         BooleanType,
                         SelectType,
@@ -42,6 +43,15 @@ class RuleVariableTests(TestCase):
         self.assertEqual(func.field_type, StringType)
         self.assertEqual(func.options, ['op1', 'op2'])
 
+    def test_rule_variable_cached_flag(self):
+        @rule_variable(StringType)
+        def uncached(self): pass
+        self.assertFalse(uncached.cached)
+
+        @string_rule_variable(cached=True)
+        def cached(self): pass
+        self.assertTrue(cached.cached)
+
     def test_rule_variable_works_as_decorator(self):
         @rule_variable(StringType, 'Blah')
         def some_test_function(self): pass
@@ -65,6 +75,13 @@ class RuleVariableTests(TestCase):
         self.assertEqual(getattr(numeric_var, 'field_type'), NumericType)
         self.assertEqual(getattr(numeric_var, 'label'), 'My Label')
 
+    def test_native_numeric_rule_variable(self):
+
+        @numeric_rule_variable(native=True)
+        def numeric_var(): pass
+
+        self.assertEqual(getattr(numeric_var, 'field_type'), NativeNumericType)
+
     def test_numeric_rule_variable_no_parens(self):
 
         @numeric_rule_variable
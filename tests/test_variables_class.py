@@ -31,3 +31,45 @@ class VariablesClassTests(TestCase):
         # should work on an instance of the class too
         self.assertEqual(len(SomeVariables().get_all_variables()), 1)
 
+
+    def test_get_all_variables_follows_class_changes(self):
+        class BaseVars(BaseVariables):
+
+            @rule_variable(StringType)
+            def first(self):
+                return "first"
+
+        class SomeVariables(BaseVars):
+            pass
+
+        def names():
+            return [v['name'] for v in SomeVariables.get_all_variables()]
+
+        self.assertEqual(names(), ['first'])
+        self.assertIs(SomeVariables.rule_members(),
+                      SomeVariables.rule_members())
+
+        BaseVars.second = rule_variable(StringType)(lambda self: "second")
+        self.assertEqual(names(), ['first', 'second'])
+
+        SomeVariables.first = None
+        self.assertEqual(names(), ['second'])
+
+        del SomeVariables.first
+        del BaseVars.second
+        self.assertEqual(names(), ['first'])
+
+    def test_get_all_variables_skips_unreadable_members(self):
+        class Unreadable(object):
+            def __get__(self, obj, cls):
+                raise AttributeError
+
+        class SomeVariables(BaseVariables):
+            broken = Unreadable()
+
+            @rule_variable(StringType)
+            def this_is_rule_1(self):
+                return "blah"
+
+        self.assertEqual([v['name'] for v in SomeVariables.get_all_variables()],
+                         ['this_is_rule_1'])